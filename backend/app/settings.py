@@ -11,7 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 import dj_database_url
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -50,6 +50,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'common.middleware.QueryBudgetMiddleware',
+    'common.middleware.DatabaseRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,6 +89,94 @@ DATABASES = {
     'default': dj_database_url.parse(DATABASE_URL)
 }
 
+# Réplicas de leitura (URLs separadas por vírgula), como replica_1, replica_2, ...
+# Requisições GET/HEAD leem de uma réplica; escritas vão para o primário
+# (common.db_routers, common.middleware.DatabaseRoutingMiddleware)
+DATABASE_REPLICA_URLS = config('DATABASE_REPLICA_URLS', default='', cast=Csv())
+for index, replica_url in enumerate(DATABASE_REPLICA_URLS, start=1):
+    DATABASES[f'replica_{index}'] = {
+        **dj_database_url.parse(replica_url),
+        # Nos testes as réplicas apontam para o banco de teste do primário
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['common.db_routers.PrimaryReplicaRouter']
+
+# Segundos em que um cliente lê do primário após escrever (leia o que escreveu)
+DATABASE_PRIMARY_PIN_SECONDS = config('DATABASE_PRIMARY_PIN_SECONDS', default=5, cast=int)
+
+
+# Orçamento de queries por endpoint (raise, log ou off)
+# Padrão: raise em desenvolvimento, log em produção
+QUERY_BUDGET_MODE = config('QUERY_BUDGET_MODE', default='raise' if DEBUG else 'log')
+
+# Busca textual do feed de notícias:
+# - common.filters.NewsSearchFilter: full-text search do PostgreSQL (ILIKE nos demais bancos)
+# - common.filters.BM25SearchFilter: índice BM25 embutido (manage.py build_search_index)
+NEWS_SEARCH_BACKEND = config('NEWS_SEARCH_BACKEND', default='common.filters.NewsSearchFilter')
+NEWS_SEARCH_INDEX_PATH = config('NEWS_SEARCH_INDEX_PATH', default=str(BASE_DIR / 'var' / 'news_search.bm25'))
+
+# Segundos em que uma página do feed de leitores é servida do cache sem revalidação (0 desativa)
+NEWS_FEED_CACHE_TIMEOUT = config('NEWS_FEED_CACHE_TIMEOUT', default=60, cast=int)
+
+# Leituras de notícias, categorias e preferências pelas views assíncronas
+# (common.async_views); requer um servidor ASGI (app.asgi)
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=False, cast=bool)
+
+# RabbitMQ (mesmo broker do curador): fila dos jobs de upload de notícias
+RABBITMQ_HOST = config('RABBITMQ_HOST', default='localhost')
+RABBITMQ_PORT = config('RABBITMQ_PORT', default=5672, cast=int)
+RABBITMQ_USER = config('RABBITMQ_USER', default='admin')
+RABBITMQ_PASSWORD = config('RABBITMQ_PASSWORD', default='admin')
+
+# Jobs de upload (common.upload_jobs), processados por manage.py process_upload_jobs.
+# Com UPLOAD_JOBS_EAGER o job roda na própria requisição, sem RabbitMQ.
+UPLOAD_JOBS_EAGER = config('UPLOAD_JOBS_EAGER', default=False, cast=bool)
+# Arquivos de upload (common.news_upload): tamanho máximo enviado (bytes, comprimido
+# se for gzip) e de uma notícia (caracteres), que limita a memória da leitura
+NEWS_UPLOAD_MAX_BYTES = config('NEWS_UPLOAD_MAX_BYTES', default=500 * 1024 * 1024, cast=int)
+NEWS_UPLOAD_MAX_ITEM_CHARS = config('NEWS_UPLOAD_MAX_ITEM_CHARS', default=1024 * 1024, cast=int)
+# Tamanho máximo depois de descomprimir (bytes) e número máximo de notícias de um
+# arquivo: um .gz pequeno não gera milhões de itens na transação da criação do job
+NEWS_UPLOAD_MAX_DECOMPRESSED_BYTES = config(
+    'NEWS_UPLOAD_MAX_DECOMPRESSED_BYTES', default=1024 * 1024 * 1024, cast=int
+)
+NEWS_UPLOAD_MAX_ITEMS = config('NEWS_UPLOAD_MAX_ITEMS', default=100000, cast=int)
+# Segundos sem heartbeat após os quais um job em processamento é retomado por outro worker
+UPLOAD_JOB_LEASE_SECONDS = config('UPLOAD_JOB_LEASE_SECONDS', default=300, cast=int)
+# Segundos após os quais um job ainda pendente é processado pelos workers sem mensagem na fila
+UPLOAD_JOB_PENDING_GRACE_SECONDS = config('UPLOAD_JOB_PENDING_GRACE_SECONDS', default=30, cast=int)
+UPLOAD_JOB_MAX_ATTEMPTS = config('UPLOAD_JOB_MAX_ATTEMPTS', default=3, cast=int)
+# Notícias de um job com extração e classificação (OpenAI) em andamento ao mesmo tempo
+UPLOAD_JOB_CONCURRENCY = config('UPLOAD_JOB_CONCURRENCY', default=4, cast=int)
+# Itens de um job gravados por transação (notícias, análises e resultados)
+UPLOAD_JOB_WRITE_CHUNK = config('UPLOAD_JOB_WRITE_CHUNK', default=50, cast=int)
+
+# Chamadas à OpenAI (common.llm_gateway): modelo padrão, modelo/timeout (s) por
+# tarefa e retentativas de falhas transitórias
+LLM_MODEL = config('OPENAI_MODEL', default='gpt-3.5-turbo')
+LLM_TASKS = {
+    'extraction': {'timeout': config('LLM_EXTRACTION_TIMEOUT', default=30, cast=float)},
+    'classification': {'timeout': config('LLM_CLASSIFICATION_TIMEOUT', default=15, cast=float)},
+    'batch_extraction': {'timeout': config('LLM_BATCH_TIMEOUT', default=60, cast=float)},
+}
+LLM_MAX_RETRIES = config('LLM_MAX_RETRIES', default=3, cast=int)
+
+# Limites de taxa da OpenAI por processo (common.rate_limit); 0 desativa
+LLM_REQUESTS_PER_MINUTE = config('LLM_REQUESTS_PER_MINUTE', default=500, cast=int)
+LLM_TOKENS_PER_MINUTE = config('LLM_TOKENS_PER_MINUTE', default=200000, cast=int)
+
+# Extração e classificação em lote (common.services.extract_and_classify_news_batch):
+# notícias por chamada e limite de tokens estimados (prompt + resposta) por chamada
+LLM_BATCH_SIZE = config('LLM_BATCH_SIZE', default=5, cast=int)
+LLM_BATCH_MAX_TOKENS = config('LLM_BATCH_MAX_TOKENS', default=8000, cast=int)
+
+# Cache dos resultados da OpenAI (common.llm_cache): validade em segundos (0 desativa),
+# máximo de entradas e gravações entre limpezas
+LLM_CACHE_TIMEOUT = config('LLM_CACHE_TIMEOUT', default=30 * 24 * 3600, cast=int)
+LLM_CACHE_MAX_ENTRIES = config('LLM_CACHE_MAX_ENTRIES', default=100000, cast=int)
+LLM_CACHE_PRUNE_EVERY = 100
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -137,7 +227,13 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    # JSON via orjson; MessagePack com Accept: application/msgpack
+    'DEFAULT_RENDERER_CLASSES': [
+        'common.renderers.ORJSONRenderer',
+        'common.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PAGINATION_CLASS': 'common.pagination.AsyncPageNumberPagination',
     'PAGE_SIZE': 10,
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -0,0 +1,270 @@
+"""
+Views assíncronas das leituras públicas da API
+
+Servidas por um servidor ASGI (gunicorn com workers do uvicorn), as leituras
+de notícias, categorias e preferências não ocupam um worker enquanto
+esperam o banco: usam o ORM assíncrono e o cache assíncrono do Django.
+
+Cada view reaproveita o ViewSet (ou a view de função) síncrono equivalente:
+mesmos permissões, filtros, paginação, serializers, validadores HTTP
+(common.conditional) e cache do feed (common.feed_cache), com a mesma
+resposta. Apenas GET e HEAD passam pelo caminho assíncrono; os demais
+métodos são delegados à view síncrona (em thread, via sync_to_async).
+
+O que ainda é síncrono e pode consultar o banco (autenticação JWT,
+django-filter, índice BM25) roda em thread; os serializers recebem objetos
+já carregados e apenas transformam dados em memória.
+
+Ativadas por settings.ASYNC_READ_VIEWS (common.urls).
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404
+from django.urls import path
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from . import conditional
+from .feed_cache import aget_scope_state, feed_cache
+from .models import Category
+from .renderers import MessagePackRenderer, ORJSONRenderer
+from .serializers import CategorySerializer, NEWS_LIST_VALUES, news_list_rows
+from .views import CategoryViewSet, NewsViewSet, list_categories_for_preferences
+
+# A API navegável monta formulários de forma síncrona; as leituras
+# assíncronas respondem apenas JSON e MessagePack
+RENDERER_CLASSES = [ORJSONRenderer, MessagePackRenderer]
+
+
+async def authenticate(request):
+    """
+    Equivalente assíncrono de Request._authenticate para JWT e sessão.
+    Define request.user e request.auth; falhas de autenticação são propagadas.
+    """
+    request.user, request.auth = AnonymousUser(), None
+    for authenticator in request.authenticators:
+        if isinstance(authenticator, JWTAuthentication):
+            header = authenticator.get_header(request)
+            raw_token = authenticator.get_raw_token(header) if header is not None else None
+            if raw_token is None:
+                continue
+            validated_token = authenticator.get_validated_token(raw_token)
+            user = await sync_to_async(authenticator.get_user)(validated_token)
+            request.user, request.auth = user, validated_token
+            return
+        if isinstance(authenticator, SessionAuthentication):
+            # Leituras (GET/HEAD) não exigem verificação de CSRF
+            user = await request._request.auser()
+            if user and user.is_active:
+                request.user = user
+                return
+            continue
+        result = await sync_to_async(authenticator.authenticate)(request)
+        if result is not None:
+            request.user, request.auth = result
+            return
+
+
+def async_read_view(sync_view, handler):
+    """
+    View que atende GET/HEAD com `handler(request, view, **kwargs)` e os
+    demais métodos com `sync_view`, a view DRF síncrona da mesma rota.
+    """
+    view_class = sync_view.cls
+    actions = getattr(sync_view, 'actions', None)
+
+    async def dispatch(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+        view = view_class(**sync_view.initkwargs)
+        view.renderer_classes = RENDERER_CLASSES
+        view.args, view.kwargs = args, kwargs
+        view.headers = view.default_response_headers
+        if actions:
+            view.action_map = actions
+        request = view.initialize_request(request, *args, **kwargs)
+        view.request = request
+        if actions:
+            view.action = actions['get']
+
+        try:
+            await authenticate(request)
+            view.format_kwarg = view.get_format_suffix(**kwargs)
+            request.accepted_renderer, request.accepted_media_type = view.perform_content_negotiation(request)
+            view.check_permissions(request)
+            response = await handler(request, view, *args, **kwargs)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+
+        response = view.finalize_response(request, response, *args, **kwargs)
+        if isinstance(response, Response):
+            # orjson / MessagePack: barato o suficiente para não sair do event loop
+            response.render()
+        return response
+
+    # get_view_budget (QueryBudgetMiddleware) encontra o orçamento pela view síncrona
+    dispatch.cls = view_class
+    dispatch.initkwargs = sync_view.initkwargs
+    if actions:
+        dispatch.actions = actions
+    if hasattr(sync_view, 'query_budget'):
+        dispatch.query_budget = sync_view.query_budget
+    # Como as views DRF: a verificação de CSRF fica com SessionAuthentication
+    return csrf_exempt(dispatch)
+
+
+def preload(*loaders):
+    """Executa os `aload_*` de common.conditional antes do handler"""
+    def decorator(handler):
+        async def inner(request, view, *args, **kwargs):
+            for loader in loaders:
+                await loader(request, *args, **kwargs)
+            return await handler(request, view, *args, **kwargs)
+        return inner
+    return decorator
+
+
+async def get_object_or_404(queryset, **lookup):
+    obj = await queryset.filter(**lookup).afirst()
+    if obj is None:
+        raise Http404(f'No {queryset.model._meta.object_name} matches the given query.')
+    return obj
+
+
+async def paginated_data(view, queryset, to_data):
+    """Dados da página de `queryset` (ou da lista inteira, sem paginação)"""
+    page = await view.paginator.apaginate_queryset(queryset, view.request, view=view)
+    if page is not None:
+        return view.get_paginated_response(to_data(page)).data
+    return to_data([item async for item in queryset])
+
+
+async def filtered_queryset(view):
+    """
+    view.filter_queryset(view.get_queryset()) em thread: get_queryset pode
+    consultar o perfil do leitor, DjangoFilterBackend valida category/author
+    no banco e a busca BM25 lê o índice.
+    """
+    return await sync_to_async(lambda: view.filter_queryset(view.get_queryset()))()
+
+
+async def news_rows_data(view, queryset):
+    """Equivalente assíncrono de NewsViewSet.list_rows_response"""
+    return await paginated_data(view, queryset.values(*NEWS_LIST_VALUES), news_list_rows)
+
+
+async def cached_feed_response(request, name, category_ids, render):
+    """Equivalente assíncrono de NewsViewSet.cached_feed_response"""
+    key = feed_cache.make_key(name, category_ids, request)
+    stamp = (await aget_scope_state(request, category_ids)).version
+    data, cache_status = await feed_cache.aget_or_render(key, stamp, render)
+    response = Response(data)
+    response['X-Feed-Cache'] = cache_status
+    return response
+
+
+# Notícias
+
+@preload(conditional.aload_news_list_state)
+@condition(etag_func=conditional.news_list_etag, last_modified_func=conditional.news_list_last_modified)
+async def news_list(request, view):
+    async def render():
+        return await news_rows_data(view, await filtered_queryset(view))
+
+    feed_profile = view.get_feed_profile()
+    if feed_profile is None or feed_profile.is_admin or not settings.NEWS_FEED_CACHE_TIMEOUT:
+        return Response(await render())
+
+    category_ids = [] if request.query_params.get('category') else feed_profile.category_ids
+    return await cached_feed_response(request, 'list', category_ids, render)
+
+
+@preload(conditional.aload_news_detail_state)
+@condition(etag_func=conditional.news_detail_etag, last_modified_func=conditional.news_detail_last_modified)
+async def news_detail(request, view, pk):
+    news = await get_object_or_404(await filtered_queryset(view), pk=pk)
+    view.check_object_permissions(request, news)
+    return Response(view.get_serializer(news).data)
+
+
+@preload(conditional.aload_news_list_state)
+async def news_my_preferences(request, view):
+    feed_profile = view.get_feed_profile()
+    if feed_profile is None:
+        return Response({'error': 'Perfil do usuário não encontrado'}, status=404)
+
+    async def render():
+        queryset = view.get_queryset()
+        if feed_profile.category_ids:
+            queryset = queryset.filter(category__in=feed_profile.category_ids)
+        return await news_rows_data(view, queryset)
+
+    if feed_profile.is_admin or not settings.NEWS_FEED_CACHE_TIMEOUT:
+        return Response(await render())
+    return await cached_feed_response(request, 'my_preferences', feed_profile.category_ids, render)
+
+
+# Categorias
+
+@preload(conditional.aload_category_list_state)
+@condition(etag_func=conditional.category_list_etag, last_modified_func=conditional.category_list_last_modified)
+async def category_list(request, view):
+    queryset = view.filter_queryset(view.get_queryset())
+    data = await paginated_data(view, queryset, lambda page: view.get_serializer(page, many=True).data)
+    return Response(data)
+
+
+@preload(conditional.aload_category_detail_state)
+@condition(etag_func=conditional.category_detail_etag, last_modified_func=conditional.category_detail_last_modified)
+async def category_detail(request, view, pk):
+    category = await get_object_or_404(view.filter_queryset(view.get_queryset()), pk=pk)
+    view.check_object_permissions(request, category)
+    return Response(view.get_serializer(category).data)
+
+
+@preload(conditional.aload_category_list_state)
+@condition(etag_func=conditional.category_list_etag, last_modified_func=conditional.category_list_last_modified)
+async def preferences(request, view):
+    categories = [category async for category in Category.objects.all().order_by('name')]
+    return Response({'categories': CategorySerializer(categories, many=True).data})
+
+
+# Mesmas rotas (e nomes) do router de common.urls, antes dele
+_router_initkwargs = {'basename': 'news', 'detail': False}
+
+urlpatterns = [
+    path('news/', async_read_view(
+        NewsViewSet.as_view({'get': 'list', 'post': 'create'}, **_router_initkwargs),
+        news_list,
+    ), name='news-list'),
+    path('news/my_preferences/', async_read_view(
+        NewsViewSet.as_view(
+            {'get': 'my_preferences'}, **_router_initkwargs, **NewsViewSet.my_preferences.kwargs
+        ),
+        news_my_preferences,
+    ), name='news-my-preferences'),
+    path('news/<int:pk>/', async_read_view(
+        NewsViewSet.as_view(
+            {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+            basename='news', detail=True,
+        ),
+        news_detail,
+    ), name='news-detail'),
+    path('categories/', async_read_view(
+        CategoryViewSet.as_view({'get': 'list', 'post': 'create'}, basename='category', detail=False),
+        category_list,
+    ), name='category-list'),
+    path('categories/<int:pk>/', async_read_view(
+        CategoryViewSet.as_view(
+            {'get': 'retrieve', 'put': 'update', 'patch': 'partial_update', 'delete': 'destroy'},
+            basename='category', detail=True,
+        ),
+        category_detail,
+    ), name='category-detail'),
+    path('preferences/', async_read_view(list_categories_for_preferences, preferences), name='list_preferences'),
+]
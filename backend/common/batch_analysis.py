@@ -0,0 +1,153 @@
+"""
+Análise de notícias em lote com matrizes esparsas documento × termo
+
+A análise por notícia (SentimentAnalyzer, identify_context,
+CategoryClassifier) percorre, em Python, as palavras de cada texto: uma vez
+para o sentimento e uma vez por autômato de palavras-chave. Em backfills de
+centenas de milhares de notícias esse laço domina o tempo.
+
+BatchTermEngine faz o mesmo cálculo para um bloco de notícias com
+scipy.sparse:
+
+- o vocabulário é fixo: os termos dos léxicos (palavras de sentimento,
+  palavras-chave de contexto e de categoria), cada um com uma coluna em uma
+  tabela hash; palavras-chave de várias palavras ('ministério da saúde')
+  são termos próprios;
+- term_matrix() monta a matriz documento × termo X (csr_matrix) do bloco:
+  as palavras de cada documento são contadas em C (Counter) e cruzadas com o
+  vocabulário por interseção de conjuntos, sem laço por palavra;
+- cada léxico é uma matriz termo × rótulo de pesos W (csr_matrix), montada
+  uma vez por processo; as pontuações do bloco inteiro são um único produto
+  X @ W (product), com X.sign() para as palavras-chave.
+
+O resultado é idêntico ao da análise por notícia: cada palavra-chave conta
+uma vez por texto (binary=True), as palavras de sentimento contam todas as
+ocorrências.
+"""
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from .keyword_automaton import tokenize
+
+
+class TermMatrix:
+    """Matriz documento × termo (csr_matrix) e o total de palavras de cada documento"""
+
+    def __init__(self, matrix, lengths):
+        self.matrix = matrix
+        # Total de palavras de cada documento (a normalização das pontuações)
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.lengths)
+
+
+class BatchTermEngine:
+    """Vocabulário fixo e matrizes de pesos dos léxicos, montados uma vez por processo"""
+
+    def __init__(self, lexicons):
+        """
+        Args:
+            lexicons: Dict nome -> iterável de (termo, rótulo, peso); o mesmo
+                termo pode aparecer mais de uma vez (os pesos se somam)
+        """
+        self.vocabulary = {}
+        self.words = {}
+        self.phrases = []
+
+        entries_by_lexicon = {}
+        for name, entries in lexicons.items():
+            cells = entries_by_lexicon[name] = []
+            for term, label, weight in entries:
+                column = self._column(tuple(tokenize(term)))
+                if column is not None:
+                    cells.append((column, label, weight))
+
+        # Matrizes termo × rótulo, com o vocabulário já completo
+        self.labels = {}
+        self.weights = {}
+        for name, cells in entries_by_lexicon.items():
+            labels = self.labels[name] = list(dict.fromkeys(label for _, label, _ in cells))
+            label_columns = {label: index for index, label in enumerate(labels)}
+            # Entradas repetidas do mesmo (termo, rótulo) são somadas pelo csr_matrix
+            self.weights[name] = sparse.csr_matrix(
+                (
+                    np.array([weight for _, _, weight in cells], dtype=np.int64),
+                    (
+                        np.array([column for column, _, _ in cells], dtype=np.int64),
+                        np.array([label_columns[label] for _, label, _ in cells], dtype=np.int64),
+                    ),
+                ),
+                shape=(len(self.vocabulary), len(labels)),
+            )
+
+    def _column(self, words):
+        if not words:
+            return None
+        column = self.vocabulary.get(words)
+        if column is None:
+            column = self.vocabulary[words] = len(self.vocabulary)
+            if len(words) == 1:
+                self.words[words[0]] = column
+            else:
+                self.phrases.append((column, words, f" {' '.join(words)} "))
+        return column
+
+    def term_matrix(self, token_lists):
+        """Matriz documento × termo das listas de palavras (uma por documento)"""
+        indptr = [0]
+        indices = []
+        data = []
+        lengths = []
+        words = self.words
+
+        for tokens in token_lists:
+            counts = Counter(tokens)
+            row = {words[word]: counts[word] for word in counts.keys() & words.keys()}
+
+            joined = None
+            for column, phrase_words, phrase in self.phrases:
+                if all(word in counts for word in phrase_words):
+                    # Todas as palavras estão no texto: confere se estão em sequência
+                    if joined is None:
+                        joined = f" {' '.join(tokens)} "
+                    occurrences = joined.count(phrase)
+                    if occurrences:
+                        row[column] = occurrences
+
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+            lengths.append(len(tokens))
+
+        matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.int64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(lengths), len(self.vocabulary)),
+        )
+        return TermMatrix(matrix, lengths)
+
+    def product(self, matrix, lexicon, binary=False):
+        """
+        Pontuações por rótulo de cada documento: X @ W do bloco inteiro
+
+        Args:
+            binary: Cada termo conta uma vez por documento (palavras-chave), em
+                vez de pelo número de ocorrências: X.sign() @ W
+
+        Returns:
+            Lista com um Counter rótulo -> pontuação por documento
+        """
+        terms = matrix.matrix.sign() if binary else matrix.matrix
+        scores = (terms @ self.weights[lexicon]).tocsr()
+        scores.eliminate_zeros()
+
+        labels = self.labels[lexicon]
+        indptr = scores.indptr.tolist()
+        indices = scores.indices.tolist()
+        data = scores.data.tolist()
+        return [
+            Counter({labels[column]: score for column, score in zip(indices[start:end], data[start:end])})
+            for start, end in zip(indptr, indptr[1:])
+        ]
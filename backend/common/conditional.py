@@ -0,0 +1,146 @@
+"""
+Validadores HTTP (ETag / Last-Modified) das leituras de notícias e categorias
+
+Calculados sem serializar a resposta: a partir de common_category
+(news_version e updated_at, mantidos pelos signals de News e de User e pelo
+curador), da notícia pedida e dos parâmetros da requisição. São usados com
+django.views.decorators.http.condition, que responde 304 a If-None-Match /
+If-Modified-Since e acrescenta os cabeçalhos às respostas 200.
+
+As views assíncronas (common.async_views) carregam o mesmo estado antes,
+pelas funções `aload_*` (ORM assíncrono); os validadores então apenas leem
+o que ficou memorizado na requisição.
+"""
+import hashlib
+
+from .feed_cache import aget_feed_profile, aget_scope_state, get_feed_profile, get_scope_state
+from .models import Category, News
+
+
+def make_etag(*parts):
+    """ETag forte a partir das partes que determinam o corpo da resposta"""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def _representation(request):
+    # Accept também escolhe a representação (JSON ou MessagePack)
+    params = sorted((param, sorted(values)) for param, values in request.GET.lists())
+    return params, request.META.get('HTTP_ACCEPT', '')
+
+
+def _object_pk(kwargs):
+    try:
+        return int(kwargs.get('pk'))
+    except (TypeError, ValueError):
+        return None
+
+
+def news_feed_scope(request):
+    """Categorias que restringem /api/news/ para o usuário da requisição (vazio: todas)"""
+    profile = get_feed_profile(request)
+    if profile is None or profile.is_admin or request.GET.get('category'):
+        return []
+    return profile.category_ids
+
+
+# Feed de notícias (NewsViewSet.list)
+
+async def aload_news_list_state(request, *args, **kwargs):
+    await aget_feed_profile(request)
+    if not request.GET.get('period'):
+        await aget_scope_state(request, news_feed_scope(request))
+
+
+def news_list_etag(request, *args, **kwargs):
+    # Com `period` o conteúdo muda com o relógio, sem alteração de notícias
+    if request.GET.get('period'):
+        return None
+    scope = news_feed_scope(request)
+    return make_etag('news-list', scope, _representation(request), get_scope_state(request, scope))
+
+
+def news_list_last_modified(request, *args, **kwargs):
+    if request.GET.get('period'):
+        return None
+    return get_scope_state(request, news_feed_scope(request)).last_modified
+
+
+# Detalhe da notícia (NewsViewSet.retrieve)
+
+def _news_detail_queryset(pk):
+    return (
+        News.objects.filter(pk=pk, is_active=True)
+        .values_list('updated_at', 'category__updated_at', 'category__news_version')
+    )
+
+
+def _news_detail_state(request, pk):
+    states = request.__dict__.setdefault('_news_detail_states', {})
+    if pk not in states:
+        states[pk] = _news_detail_queryset(pk).first()
+    return states[pk]
+
+
+async def aload_news_detail_state(request, *args, **kwargs):
+    pk = _object_pk(kwargs)
+    states = request.__dict__.setdefault('_news_detail_states', {})
+    if pk is not None and pk not in states:
+        states[pk] = await _news_detail_queryset(pk).afirst()
+
+
+def news_detail_etag(request, *args, **kwargs):
+    pk = _object_pk(kwargs)
+    state = _news_detail_state(request, pk) if pk is not None else None
+    return make_etag('news-detail', pk, state, _representation(request)) if state else None
+
+
+def news_detail_last_modified(request, *args, **kwargs):
+    pk = _object_pk(kwargs)
+    state = _news_detail_state(request, pk) if pk is not None else None
+    return max(state[0], state[1]) if state else None
+
+
+# Categorias (CategoryViewSet e list_categories_for_preferences)
+
+async def aload_category_list_state(request, *args, **kwargs):
+    await aget_scope_state(request, [])
+
+
+def category_list_etag(request, *args, **kwargs):
+    return make_etag(
+        'category-list', request.path, _representation(request), get_scope_state(request, [])
+    )
+
+
+def category_list_last_modified(request, *args, **kwargs):
+    return get_scope_state(request, []).last_modified
+
+
+def _category_detail_queryset(pk):
+    return Category.objects.filter(pk=pk).values_list('updated_at', 'news_version')
+
+
+def _category_detail_state(request, pk):
+    states = request.__dict__.setdefault('_category_detail_states', {})
+    if pk not in states:
+        states[pk] = _category_detail_queryset(pk).first()
+    return states[pk]
+
+
+async def aload_category_detail_state(request, *args, **kwargs):
+    pk = _object_pk(kwargs)
+    states = request.__dict__.setdefault('_category_detail_states', {})
+    if pk is not None and pk not in states:
+        states[pk] = await _category_detail_queryset(pk).afirst()
+
+
+def category_detail_etag(request, *args, **kwargs):
+    pk = _object_pk(kwargs)
+    state = _category_detail_state(request, pk) if pk is not None else None
+    return make_etag('category-detail', pk, state, _representation(request)) if state else None
+
+
+def category_detail_last_modified(request, *args, **kwargs):
+    pk = _object_pk(kwargs)
+    state = _category_detail_state(request, pk) if pk is not None else None
+    return state[0] if state else None
@@ -0,0 +1,66 @@
+"""
+Roteamento de leituras entre o banco primário e réplicas de leitura
+
+Com settings.DATABASE_REPLICAS configurado, as requisições de leitura
+(GET/HEAD/OPTIONS) leem de uma réplica, escolhida uma vez por requisição,
+e todas as escritas vão para o primário ('default'). A decisão é feita por
+DatabaseRoutingMiddleware (common.middleware) e guardada em uma ContextVar,
+que acompanha a requisição também nas threads de sync_to_async.
+
+- Fora de requisições (comandos, signals em testes, shell): primário.
+- Requisições de escrita: primário do início ao fim.
+- Uma escrita durante uma requisição de leitura fixa o restante dela no primário.
+- Após uma escrita bem-sucedida, o cliente é fixado no primário por
+  DATABASE_PRIMARY_PIN_SECONDS (leia o que escreveu), enquanto a réplica
+  alcança o primário.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+PRIMARY = 'default'
+
+# Alias usado pelas leituras da requisição atual (None fora de requisições)
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_aliases():
+    return settings.DATABASE_REPLICAS
+
+
+def route_reads(alias):
+    """Define o banco de leitura da requisição atual; retorna o token para reset_reads"""
+    return _read_alias.set(alias)
+
+
+def reset_reads(token):
+    _read_alias.reset(token)
+
+
+def choose_replica():
+    return random.choice(replica_aliases())
+
+
+class PrimaryReplicaRouter:
+    """Database router: leituras na réplica da requisição, escritas e migrações no primário"""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get()
+
+    def db_for_write(self, model, **hints):
+        if _read_alias.get() not in (None, PRIMARY):
+            _read_alias.set(PRIMARY)
+        return PRIMARY
+
+    def allow_relation(self, obj1, obj2, **hints):
+        pool = {PRIMARY, *replica_aliases()}
+        if obj1._state.db in pool and obj2._state.db in pool:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Réplicas recebem o schema pela replicação do primário
+        if db in replica_aliases():
+            return False
+        return None
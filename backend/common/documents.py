@@ -0,0 +1,57 @@
+"""
+Texto de uma notícia preparado uma vez para todas as análises
+
+A análise de uma notícia (NewsAnalysisService) passava o texto completo a
+cada analisador, e cada um o normalizava de novo: o sentimento com lower()
+e duas substituições de regex, os contextos e as categorias com lower() e
+a quebra em palavras. AnalyzedDocument faz essa preparação uma vez por
+notícia (texto original, texto em minúsculas, palavras, posições e
+contagens) e os analisadores (sentimento, entidades, contextos e
+categorias) a consomem.
+
+As palavras são as de common.keyword_automaton.tokenize, iguais às da
+normalização anterior do sentimento (sequências de \\w em minúsculas).
+"""
+from collections import Counter
+from functools import cached_property
+
+from .keyword_automaton import WORD_RE
+
+
+class AnalyzedDocument:
+    """
+    Texto de uma notícia com as palavras já extraídas
+
+    Attributes:
+        text: Texto original (as entidades dependem das maiúsculas)
+        normalized: Texto em minúsculas
+        tokens: Palavras do texto, em minúsculas
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.normalized = text.lower()
+        self.tokens = WORD_RE.findall(self.normalized)
+
+    @classmethod
+    def from_parts(cls, title, summary='', content=''):
+        """Documento de título, resumo e conteúdo (o texto completo das análises)"""
+        return cls(f"{title or ''} {summary or ''} {content or ''}")
+
+    @classmethod
+    def of(cls, text):
+        """O próprio documento, ou um documento do texto"""
+        return text if isinstance(text, cls) else cls(text)
+
+    @cached_property
+    def offsets(self):
+        """Posição (início, fim) de cada palavra em `normalized`"""
+        return [match.span() for match in WORD_RE.finditer(self.normalized)]
+
+    @cached_property
+    def counts(self):
+        """Ocorrências de cada palavra"""
+        return Counter(self.tokens)
+
+    def __len__(self):
+        return len(self.tokens)
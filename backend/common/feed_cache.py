@@ -0,0 +1,198 @@
+"""
+Cache das páginas do feed de notícias por conjunto de categorias preferidas
+
+Leitores com as mesmas categorias preferidas recebem o mesmo feed, então a
+página renderizada é guardada sob (categorias, parâmetros da requisição).
+A validade de cada entrada é o `stamp` do escopo: a soma de
+Category.news_version das categorias, incrementado pelos signals de News e
+pelo curador a cada notícia incluída, alterada ou removida.
+
+- Entrada com stamp atual e idade < NEWS_FEED_CACHE_TIMEOUT: servida direto.
+- Entrada desatualizada: uma única requisição (lock via cache.add) renderiza
+  a nova versão; as concorrentes recebem a entrada antiga (stale-while-revalidate).
+- Sem entrada: quem não obtém o lock espera brevemente pela renderização
+  do dono do lock antes de renderizar por conta própria.
+
+O lock vale dentro do backend de cache configurado (por processo com
+LocMemCache; global com um cache compartilhado, ex. Redis).
+"""
+import asyncio
+import hashlib
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+
+from .models import Category, UserProfile
+
+HIT = 'hit'
+STALE = 'stale'
+MISS = 'miss'
+
+FeedProfile = namedtuple('FeedProfile', ['is_admin', 'category_ids'])
+ScopeState = namedtuple('ScopeState', ['version', 'last_modified', 'categories'])
+
+
+def _profile_rows(user):
+    return UserProfile.objects.filter(user=user).values_list('user_type', 'preferred_categories')
+
+
+def _feed_profile(user, rows):
+    if not rows:
+        return None
+    return FeedProfile(
+        is_admin=rows[0][0] == 'admin' or user.is_superuser,
+        category_ids=sorted(pk for _, pk in rows if pk is not None),
+    )
+
+
+def get_feed_profile(request):
+    """
+    Tipo de usuário e categorias preferidas do usuário da requisição (uma
+    query, memorizada na requisição), ou None para anônimos e usuários sem perfil.
+    """
+    if not hasattr(request, '_feed_profile'):
+        request._feed_profile = None
+        user = request.user
+        if user.is_authenticated:
+            request._feed_profile = _feed_profile(user, list(_profile_rows(user)))
+    return request._feed_profile
+
+
+async def aget_feed_profile(request):
+    """Versão assíncrona de get_feed_profile (mesma memória na requisição)"""
+    if not hasattr(request, '_feed_profile'):
+        request._feed_profile = None
+        user = request.user
+        if user.is_authenticated:
+            rows = [row async for row in _profile_rows(user)]
+            request._feed_profile = _feed_profile(user, rows)
+    return request._feed_profile
+
+
+def _scope_aggregates(category_ids):
+    categories = Category.objects.all()
+    if category_ids:
+        categories = categories.filter(pk__in=category_ids)
+    return categories, {
+        'version': Sum('news_version'),
+        'last_modified': Max('updated_at'),
+        'categories': Count('pk'),
+    }
+
+
+def _scope_state(aggregates):
+    return ScopeState(aggregates['version'] or 0, aggregates['last_modified'], aggregates['categories'])
+
+
+def get_scope_state(request, category_ids):
+    """
+    Versão, última alteração e número das categorias `category_ids` (vazio:
+    todas). Uma query em common_category, memorizada na requisição.
+    """
+    states = request.__dict__.setdefault('_feed_scope_states', {})
+    key = tuple(sorted(category_ids))
+    if key not in states:
+        categories, aggregates = _scope_aggregates(category_ids)
+        states[key] = _scope_state(categories.aggregate(**aggregates))
+    return states[key]
+
+
+async def aget_scope_state(request, category_ids):
+    """Versão assíncrona de get_scope_state (mesma memória na requisição)"""
+    states = request.__dict__.setdefault('_feed_scope_states', {})
+    key = tuple(sorted(category_ids))
+    if key not in states:
+        categories, aggregates = _scope_aggregates(category_ids)
+        states[key] = _scope_state(await categories.aaggregate(**aggregates))
+    return states[key]
+
+
+class FeedCache:
+    key_prefix = 'news_feed'
+    # Entradas desatualizadas continuam disponíveis (como stale) por este múltiplo do timeout
+    stale_factor = 10
+    lock_timeout = 10
+    wait_timeout = 2
+    poll_interval = 0.05
+
+    @property
+    def timeout(self):
+        return settings.NEWS_FEED_CACHE_TIMEOUT
+
+    def make_key(self, name, category_ids, request):
+        """Chave para o feed `name` restrito a `category_ids` (vazio: todas as categorias)"""
+        scope = ','.join(str(pk) for pk in sorted(category_ids)) or 'all'
+        params = sorted(
+            (param, sorted(values)) for param, values in request.GET.lists()
+        )
+        digest = hashlib.sha1(repr((request.get_host(), params)).encode('utf-8')).hexdigest()
+        return f'{self.key_prefix}:{name}:{scope}:{digest}'
+
+    def get_or_render(self, key, stamp, render):
+        """
+        Retorna (dados, status) para `key`, chamando `render()` apenas quando
+        necessário. `status` é HIT, STALE ou MISS.
+        """
+        entry = cache.get(key)
+        if entry is not None and entry['stamp'] == stamp and time.time() - entry['created'] < self.timeout:
+            return entry['data'], HIT
+
+        lock_key = f'{key}:lock'
+        if cache.add(lock_key, True, self.lock_timeout):
+            try:
+                return self._render(key, stamp, render), MISS
+            finally:
+                cache.delete(lock_key)
+
+        if entry is not None:
+            return entry['data'], STALE
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(self.poll_interval)
+            entry = cache.get(key)
+            if entry is not None and entry['stamp'] == stamp:
+                return entry['data'], HIT
+        return self._render(key, stamp, render), MISS
+
+    async def aget_or_render(self, key, stamp, render):
+        """Versão assíncrona de get_or_render; `render` é uma corrotina"""
+        entry = await cache.aget(key)
+        if entry is not None and entry['stamp'] == stamp and time.time() - entry['created'] < self.timeout:
+            return entry['data'], HIT
+
+        lock_key = f'{key}:lock'
+        if await cache.aadd(lock_key, True, self.lock_timeout):
+            try:
+                return await self._arender(key, stamp, render), MISS
+            finally:
+                await cache.adelete(lock_key)
+
+        if entry is not None:
+            return entry['data'], STALE
+
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(self.poll_interval)
+            entry = await cache.aget(key)
+            if entry is not None and entry['stamp'] == stamp:
+                return entry['data'], HIT
+        return await self._arender(key, stamp, render), MISS
+
+    def _render(self, key, stamp, render):
+        data = render()
+        entry = {'stamp': stamp, 'created': time.time(), 'data': data}
+        cache.set(key, entry, self.timeout * self.stale_factor)
+        return data
+
+    async def _arender(self, key, stamp, render):
+        data = await render()
+        entry = {'stamp': stamp, 'created': time.time(), 'data': data}
+        await cache.aset(key, entry, self.timeout * self.stale_factor)
+        return data
+
+
+feed_cache = FeedCache()
@@ -0,0 +1,81 @@
+"""
+Filtros customizados para as views
+"""
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Case, F, FloatField, Value, When
+from django.utils.module_loading import import_string
+from rest_framework import filters
+from rest_framework.settings import api_settings
+
+from .search_index import get_search_index, indexed_documents
+
+
+def get_news_search_backend():
+    """Backend de busca do feed configurado em settings.NEWS_SEARCH_BACKEND"""
+    return import_string(settings.NEWS_SEARCH_BACKEND)
+
+
+class NewsSearchFilter(filters.SearchFilter):
+    """
+    Busca textual de notícias.
+
+    No PostgreSQL usa o full-text search sobre News.search_vector (índice GIN,
+    configuração 'portuguese') e ordena por relevância (ts_rank) quando não há
+    `ordering` explícito. Nos demais bancos usa o SearchFilter padrão (ILIKE
+    em `search_fields`).
+    """
+    search_config = 'portuguese'
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        if connections[queryset.db].vendor != 'postgresql':
+            return super().filter_queryset(request, queryset, view)
+
+        order_by_rank = not request.query_params.get(api_settings.ORDERING_PARAM)
+        return self.fulltext_queryset(queryset, search_terms, order_by_rank)
+
+    def fulltext_queryset(self, queryset, search_terms, order_by_rank=True):
+        """Filtra por search_vector @@ websearch_to_tsquery e anota `search_rank`"""
+        query = SearchQuery(' '.join(search_terms), config=self.search_config, search_type='websearch')
+        queryset = queryset.filter(search_vector=query).annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        )
+        if order_by_rank:
+            queryset = queryset.order_by('-search_rank', '-published_at')
+        return queryset
+
+
+class BM25SearchFilter(filters.SearchFilter):
+    """
+    Busca textual de notícias pelo índice BM25 embutido (common.search_index).
+
+    Não depende do banco: serve para deploys e testes sem PostgreSQL. Considera
+    as `max_results` notícias mais relevantes e ordena por score BM25 quando não
+    há `ordering` explícito.
+    """
+    max_results = 1000
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        index = get_search_index()
+        # Notícias inseridas pelo curador (SQL bruto, sem linha no journal)
+        index.catch_up(indexed_documents)
+        ranked = index.search(' '.join(search_terms), limit=self.max_results)
+        queryset = queryset.filter(pk__in=[news_id for news_id, _ in ranked])
+
+        if ranked and not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.annotate(
+                search_rank=Case(
+                    *[When(pk=news_id, then=Value(score)) for news_id, score in ranked],
+                    output_field=FloatField()
+                )
+            ).order_by('-search_rank', '-published_at')
+        return queryset
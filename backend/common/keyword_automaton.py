@@ -0,0 +1,103 @@
+"""
+Busca de palavras-chave em um único passo pelo texto
+
+Os classificadores por palavras-chave (categorias, contextos e o fallback do
+AINewsClassifier) testavam cada palavra-chave com `keyword in texto`: uma
+varredura do texto inteiro por palavra-chave, e 'ia' ou 'app' casavam dentro
+de outras palavras ('dia', 'happy').
+
+KeywordAutomaton compila as palavras-chave de um classificador em um
+autômato de Aho-Corasick cujos símbolos são palavras, não caracteres: o
+texto é quebrado em palavras uma vez (tokenize, uma regex em C) e o
+autômato o percorre uma vez, palavra a palavra, encontrando todas as
+palavras-chave ao mesmo tempo. Palavras-chave de várias palavras
+('ministério da saúde', 'bem-estar') casam com a sequência de palavras, e
+nenhuma casa com parte de uma palavra.
+
+Os autômatos são montados uma vez por processo, na importação dos
+classificadores (common.services).
+"""
+import re
+from collections import Counter
+
+WORD_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Palavras do texto em minúsculas (a mesma quebra usada nas palavras-chave)"""
+    return WORD_RE.findall(text.lower())
+
+
+class KeywordAutomaton:
+    """
+    Autômato de Aho-Corasick sobre palavras. Cada palavra-chave tem um
+    rótulo (categoria, contexto) e um peso; a mesma palavra-chave pode ser
+    registrada em vários rótulos, ou repetida no mesmo.
+    """
+
+    def __init__(self, keywords):
+        """
+        Args:
+            keywords: Iterável de (palavra-chave, rótulo, peso)
+        """
+        self.keywords = []
+        self.labels = []
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [[]]
+
+        for phrase, label, weight in keywords:
+            tokens = tokenize(phrase)
+            if not tokens:
+                continue
+            if label not in self.labels:
+                self.labels.append(label)
+            state = 0
+            for token in tokens:
+                next_state = self.goto[state].get(token)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][token] = next_state
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append([])
+                state = next_state
+            self.output[state].append(len(self.keywords))
+            self.keywords.append((phrase, label, weight))
+
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        # Em largura: o estado de falha de cada estado já está pronto quando
+        # os filhos dele são visitados
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for token, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and token not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(token, 0) if state else 0
+                # Palavras-chave que terminam no estado de falha também terminam aqui
+                self.output[child] = self.output[child] + self.output[self.fail[child]]
+
+    def find(self, tokens):
+        """Índices (em self.keywords) das palavras-chave presentes em `tokens`"""
+        goto, fail, output = self.goto, self.fail, self.output
+        found = set()
+        state = 0
+        for token in tokens:
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+    def scores(self, tokens):
+        """Soma, por rótulo, dos pesos das palavras-chave presentes (cada uma conta uma vez)"""
+        scores = Counter()
+        for index in self.find(tokens):
+            _, label, weight = self.keywords[index]
+            scores[label] += weight
+        return scores
@@ -0,0 +1,162 @@
+"""
+Cache dos resultados das chamadas à OpenAI
+
+Uploads reenviados, notícias repetidas entre arquivos e reprocessamentos
+pedem à IA a mesma extração ou classificação do mesmo texto. Os resultados
+ficam na tabela LLMCacheEntry, endereçados pelo conteúdo: a chave é o
+SHA-256 do texto normalizado (NFC, espaços colapsados), da tarefa, do
+modelo e da versão do prompt. Alterar o prompt de uma tarefa exige
+incrementar a sua versão (common.services), o que invalida as entradas
+antigas.
+
+- entradas com mais de LLM_CACHE_TIMEOUT segundos não são usadas
+  (0 desativa o cache); as expiradas e as menos usadas além de
+  LLM_CACHE_MAX_ENTRIES são removidas a cada LLM_CACHE_PRUNE_EVERY
+  gravações do processo ou por manage.py llm_cache --prune;
+- acertos e faltas são contados por tarefa no processo (LLMCache.stats) e
+  os acertos também por entrada (LLMCacheEntry.hits);
+- dentro de llm_cache_bypass() as entradas existentes são ignoradas e
+  regravadas com o novo resultado (refresh forçado);
+- falhas do banco no cache contam como falta: a chamada segue para a IA.
+
+O curador (news-curator/llm_gateway.py) usa a mesma tabela e a mesma chave.
+"""
+import hashlib
+import json
+import logging
+import threading
+import unicodedata
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import F
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+
+from .models import LLMCacheEntry
+
+logger = logging.getLogger(__name__)
+
+_bypass = ContextVar('llm_cache_bypass', default=False)
+
+
+@contextmanager
+def llm_cache_bypass(enabled=True):
+    """Ignora as entradas existentes do cache e as regrava (refresh forçado)"""
+    token = _bypass.set(enabled)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def normalize_text(text):
+    """Texto em NFC com espaços colapsados: variações de formatação usam a mesma entrada"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def cache_key(task, model, prompt_version, text):
+    """Chave da entrada: SHA-256 de tarefa, modelo, versão do prompt e texto normalizado"""
+    payload = json.dumps([task, model, str(prompt_version), normalize_text(text)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMCache:
+    """Leitura e gravação de LLMCacheEntry, com contadores de acertos e faltas por tarefa"""
+
+    def __init__(self):
+        self.stats = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    @property
+    def enabled(self):
+        return settings.LLM_CACHE_TIMEOUT > 0
+
+    def _count(self, task, outcome):
+        with self._lock:
+            self.stats[task][outcome] += 1
+
+    def totals(self):
+        """Acertos, faltas e refreshes do processo, somados entre as tarefas"""
+        with self._lock:
+            return sum(self.stats.values(), Counter())
+
+    def get(self, task, model, prompt_version, text):
+        """Resultado em cache para o texto, ou None (falta, expirado ou refresh forçado)"""
+        if not self.enabled:
+            return None
+        if _bypass.get():
+            self._count(task, 'bypass')
+            return None
+
+        key = cache_key(task, model, prompt_version, text)
+        created_after = timezone.now() - timedelta(seconds=settings.LLM_CACHE_TIMEOUT)
+        try:
+            response = (
+                LLMCacheEntry.objects.filter(key=key, created_at__gte=created_after)
+                .values_list('response', flat=True)
+                .first()
+            )
+            if response is not None:
+                LLMCacheEntry.objects.filter(key=key).update(hits=F('hits') + 1, last_hit_at=Now())
+        except DatabaseError as e:
+            logger.warning(f"Cache LLM indisponível ({task}): {e}")
+            response = None
+
+        self._count(task, 'miss' if response is None else 'hit')
+        return response
+
+    def set(self, task, model, prompt_version, text, response):
+        """Grava (ou renova) o resultado da IA para o texto"""
+        if not self.enabled:
+            return
+        key = cache_key(task, model, prompt_version, text)
+        try:
+            LLMCacheEntry.objects.update_or_create(
+                key=key,
+                defaults={
+                    'task': task,
+                    'model': model,
+                    'prompt_version': str(prompt_version),
+                    'response': response,
+                    'hits': 0,
+                    'created_at': timezone.now(),
+                    'last_hit_at': None,
+                },
+            )
+        except DatabaseError as e:
+            logger.warning(f"Cache LLM: falha ao gravar ({task}): {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % max(1, settings.LLM_CACHE_PRUNE_EVERY) == 0
+        if prune:
+            try:
+                self.prune()
+            except DatabaseError as e:
+                logger.warning(f"Cache LLM: falha na limpeza: {e}")
+
+    def prune(self):
+        """Remove as entradas expiradas e as menos usadas além de LLM_CACHE_MAX_ENTRIES; retorna o total removido"""
+        created_before = timezone.now() - timedelta(seconds=settings.LLM_CACHE_TIMEOUT)
+        removed, _ = LLMCacheEntry.objects.filter(created_at__lt=created_before).delete()
+
+        excess = LLMCacheEntry.objects.count() - settings.LLM_CACHE_MAX_ENTRIES
+        if excess > 0:
+            least_used = list(
+                LLMCacheEntry.objects.order_by(Coalesce('last_hit_at', 'created_at'))
+                .values_list('key', flat=True)[:excess]
+            )
+            removed += LLMCacheEntry.objects.filter(key__in=least_used).delete()[0]
+        if removed:
+            logger.info(f"Cache LLM: {removed} entradas removidas")
+        return removed
+
+
+llm_cache = LLMCache()
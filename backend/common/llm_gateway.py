@@ -0,0 +1,159 @@
+"""
+Gateway das chamadas à OpenAI do backend
+
+Um único cliente OpenAI por processo (get_llm_gateway), cujo pool de
+conexões HTTP keep-alive é compartilhado por todas as threads, no lugar de
+um cliente novo a cada classificação ou extração. Para cada chamada o
+gateway:
+
+- escolhe modelo e timeout pela tarefa (settings.LLM_TASKS);
+- respeita o limite de taxa compartilhado (common.rate_limit);
+- refaz, com backoff exponencial e jitter, as falhas transitórias
+  (timeout, conexão, 429 e 5xx), até LLM_MAX_RETRIES vezes;
+- mede latência e tokens de prompt/resposta (response.usage), enviados no
+  signal llm_call_measured e acumulados em LLMGateway.usage.
+
+O curador (news-curator/llm_gateway.py) segue o mesmo desenho.
+"""
+import logging
+import os
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+import openai
+from django.conf import settings
+from django.dispatch import Signal
+from openai import OpenAI
+
+from .rate_limit import estimate_tokens, llm_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Enviado após cada chamada (task, model, latency_ms, prompt_tokens,
+# completion_tokens, attempts, success)
+llm_call_measured = Signal()
+
+# Falhas transitórias: refeitas com backoff
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class LLMGateway:
+    """Cliente OpenAI compartilhado, com configuração por tarefa, retentativas e métricas"""
+
+    def __init__(self, api_key, tasks, default_model, max_retries=3, backoff_base=0.5, backoff_max=20.0,
+                 rate_limiter=None, sleep=time.sleep):
+        self.api_key = api_key
+        self.tasks = tasks
+        self.default_model = default_model
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = rate_limiter
+        self.sleep = sleep
+        # As retentativas são do gateway, não do SDK
+        self.client = OpenAI(api_key=api_key, max_retries=0)
+        self.usage = defaultdict(Counter)
+        self._usage_lock = threading.Lock()
+
+    def task_options(self, task):
+        """(modelo, timeout) da tarefa"""
+        options = self.tasks.get(task, {})
+        return options.get('model') or self.default_model, options.get('timeout', 30)
+
+    def backoff(self, attempt, error=None):
+        """Espera antes da retentativa `attempt` (1, 2, ...): full jitter, ou o Retry-After do 429"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return max(delay, min(self.backoff_max, float(retry_after))) if retry_after else delay
+        except ValueError:
+            return delay
+
+    def complete(self, task, messages, **kwargs):
+        """chat.completions.create para a tarefa `task`; levanta o último erro se as tentativas se esgotarem"""
+        model, timeout = self.task_options(task)
+        tokens = estimate_tokens(messages, kwargs.get('max_tokens', 0))
+        attempt = 0
+        while True:
+            attempt += 1
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(tokens)
+            start = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model=model, messages=messages, timeout=timeout, **kwargs
+                )
+            except RETRYABLE_ERRORS as e:
+                latency_ms = (time.perf_counter() - start) * 1000
+                if attempt > self.max_retries:
+                    self._record(task, model, latency_ms, None, attempt, success=False)
+                    raise
+                delay = self.backoff(attempt, e)
+                logger.warning(
+                    f"LLM {task}: {type(e).__name__} na tentativa {attempt}; nova tentativa em {delay:.1f} s"
+                )
+                self.sleep(delay)
+                continue
+            except Exception:
+                self._record(task, model, (time.perf_counter() - start) * 1000, None, attempt, success=False)
+                raise
+            self._record(task, model, (time.perf_counter() - start) * 1000, response, attempt, success=True)
+            return response
+
+    def _record(self, task, model, latency_ms, response, attempts, success):
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        with self._usage_lock:
+            self.usage[task].update({
+                'calls': 1,
+                'errors': 0 if success else 1,
+                'retries': attempts - 1,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'latency_ms': round(latency_ms),
+            })
+        logger.debug(
+            f"LLM {task} ({model}): {latency_ms:.0f} ms, {prompt_tokens}+{completion_tokens} tokens, "
+            f"{attempts} tentativa(s)"
+        )
+        llm_call_measured.send(
+            sender=self.__class__,
+            task=task,
+            model=model,
+            latency_ms=latency_ms,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            attempts=attempts,
+            success=success,
+        )
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway():
+    """Gateway do processo; None sem OPENAI_API_KEY (os chamadores usam os fallbacks locais)"""
+    global _gateway
+    api_key = os.getenv('OPENAI_API_KEY')
+    if not api_key:
+        return None
+    with _gateway_lock:
+        if _gateway is None or _gateway.api_key != api_key:
+            _gateway = LLMGateway(
+                api_key,
+                tasks=settings.LLM_TASKS,
+                default_model=settings.LLM_MODEL,
+                max_retries=settings.LLM_MAX_RETRIES,
+                rate_limiter=llm_rate_limiter(),
+            )
+        return _gateway
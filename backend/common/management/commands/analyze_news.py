@@ -1,10 +1,134 @@
 """
 Comando Django para análise automática de sentimentos e entidades em notícias
+
+As notícias selecionadas são divididas em faixas de chave primária de
+--batch-size notícias. Com --workers N as faixas são distribuídas entre N
+processos: cada um abre a sua conexão com o banco e carrega os analisadores
+e léxicos uma vez (get_analysis_service, get_batch_engine), e o processo
+principal soma os resultados e mostra o progresso à medida que as faixas
+terminam. --compare-workers mede a vazão (notícias/s) com cada quantidade
+de workers, para dimensionar backfills.
 """
+import multiprocessing
+import time
+from datetime import timedelta
+
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
 from django.utils import timezone
+
 from common.models import News
-from common.services import NewsAnalysisService
+from common.news_writes import NewsUpdateBuffer
+from common.services import NewsAnalysisService, get_analysis_service, get_batch_engine
+
+# Opções repassadas aos workers (as do Django, como stdout, não são serializáveis)
+TASK_OPTIONS = (
+    'all', 'ids', 'category', 'days', 'classify_categories', 'auto_assign_categories', 'confidence_threshold'
+)
+
+
+def news_queryset(options):
+    """Determina o queryset de notícias baseado nas opções"""
+    queryset = News.objects.all()
+
+    # Filtrar por IDs específicos
+    if options['ids']:
+        queryset = queryset.filter(id__in=options['ids'])
+        return queryset
+
+    # Filtrar por categoria
+    if options['category']:
+        queryset = queryset.filter(category__name__icontains=options['category'])
+
+    # Filtrar por dias
+    if options['days']:
+        cutoff_date = timezone.now() - timedelta(days=options['days'])
+        queryset = queryset.filter(created_at__gte=cutoff_date)
+
+    # Se não for --all, filtrar apenas não analisadas
+    if not options['all']:
+        queryset = queryset.filter(analysis_timestamp__isnull=True)
+
+    return queryset
+
+
+def pk_ranges(pks, size):
+    """Faixas (primeira, última pk) de `size` notícias da lista ordenada de pks"""
+    return [(pks[start], pks[min(start + size, len(pks)) - 1]) for start in range(0, len(pks), size)]
+
+
+def analyze_range(service, options, pk_range):
+    """
+    Analisa (e, se pedido, classifica) as notícias selecionadas de uma faixa
+    de pks; retorna as contagens e as mensagens para o processo principal
+    """
+    batch_list = list(news_queryset(options).filter(pk__range=pk_range).order_by('pk'))
+    results = service.batch_analyze_news(batch_list, force_reanalyze=options['all'])
+    outcome = {
+        'selected': len(batch_list),
+        'processed': results['processed'],
+        'errors': results['errors'],
+        'classified': 0,
+        'auto_assigned': 0,
+        'messages': [
+            ('error', f'Erro na notícia {error["news_id"]}: {error["error"]}')
+            for error in results['error_details'][:3]  # Mostrar apenas os primeiros 3
+        ],
+    }
+
+    # Classificação de categorias se solicitado
+    if options['classify_categories']:
+        suggestions = service.suggest_categories_for_news_batch(batch_list)
+        outcome['classified'] = len(suggestions)
+
+        # Auto-atribuir categorias se solicitado (gravadas em lote)
+        if options['auto_assign_categories']:
+            news_by_id = {news.id: news for news in batch_list}
+            assignments = NewsUpdateBuffer(['category'])
+            assigned = []
+            for suggestion in suggestions:
+                classification = suggestion['classification']
+
+                if (classification['confidence'] >= options['confidence_threshold'] and
+                        suggestion['category_object']):
+                    news = news_by_id[suggestion['news_id']]
+                    news.category = suggestion['category_object']
+                    assignments.add(news)
+                    assigned.append((news, classification))
+            assignments.flush()
+
+            failed = {news.id: error for news, error in assignments.failed}
+            outcome['auto_assigned'] = assignments.written
+            for news, classification in assigned:
+                if news.id in failed:
+                    outcome['messages'].append((
+                        'error', f"Erro ao auto-atribuir categoria para notícia {news.id}: {failed[news.id]}"
+                    ))
+                else:
+                    outcome['messages'].append(('info', (
+                        f"Auto-atribuída categoria '{classification['suggested_category']}' "
+                        f"para notícia {news.id} (confiança: {classification['confidence']:.1%})"
+                    )))
+
+    return outcome
+
+
+def _init_worker():
+    """Prepara um processo do pool: Django, conexão própria e léxicos carregados uma vez"""
+    import django
+
+    # Com spawn o processo começa sem o Django configurado; com fork,
+    # setup() não refaz o que já foi carregado
+    django.setup()
+    # A conexão com o banco é aberta pelo próprio worker na primeira consulta
+    # (o processo principal fecha as suas antes de criar o pool)
+    get_analysis_service()
+    get_batch_engine()
+
+
+def _analyze_range_task(task):
+    options, pk_range = task
+    return analyze_range(get_analysis_service(), options, pk_range)
 
 
 class Command(BaseCommand):
@@ -16,45 +140,60 @@ class Command(BaseCommand):
             action='store_true',
             help='Analisar todas as notícias (reanalisa mesmo as já processadas)'
         )
-        
+
         parser.add_argument(
             '--ids',
             nargs='+',
             type=int,
             help='IDs específicos de notícias para analisar'
         )
-        
+
         parser.add_argument(
             '--category',
             type=str,
             help='Analisar apenas notícias de uma categoria específica'
         )
-        
+
         parser.add_argument(
             '--days',
             type=int,
             help='Analisar notícias dos últimos N dias'
         )
-        
+
         parser.add_argument(
             '--batch-size',
             type=int,
             default=100,
             help='Tamanho do lote para processamento (padrão: 100)'
         )
-        
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Processos que analisam os lotes em paralelo (padrão: 1, no próprio processo)'
+        )
+
+        parser.add_argument(
+            '--compare-workers',
+            nargs='+',
+            type=int,
+            metavar='N',
+            help='Mede a vazão com cada quantidade de workers, reanalisando as mesmas notícias (implica --all)'
+        )
+
         parser.add_argument(
             '--classify-categories',
             action='store_true',
             help='Executar classificação automática de categorias'
         )
-        
+
         parser.add_argument(
             '--auto-assign-categories',
             action='store_true',
             help='Atribuir automaticamente categorias com alta confiança'
         )
-        
+
         parser.add_argument(
             '--confidence-threshold',
             type=float,
@@ -63,136 +202,113 @@ class Command(BaseCommand):
         )
 
     def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['workers'] < 1:
+            raise CommandError('--batch-size e --workers devem ser maiores que zero.')
+        if options['compare_workers']:
+            if min(options['compare_workers']) < 1:
+                raise CommandError('--compare-workers deve listar quantidades maiores que zero.')
+            options['all'] = True
+
         self.stdout.write(
             self.style.SUCCESS('Iniciando análise de notícias...')
         )
-        
+
         try:
-            # Importar modelos
-            from common.models import News, Category
-            from common.services import NewsAnalysisService
-            from django.utils import timezone
-            from datetime import timedelta
-            from django.db.models import Q
-            
-            # Determinar quais notícias analisar
-            queryset = self._get_news_queryset(options)
-            
-            if not queryset.exists():
+            task_options = {key: options[key] for key in TASK_OPTIONS}
+
+            # Faixas de pk calculadas uma vez: a seleção (ex.: notícias sem
+            # análise) muda à medida que os lotes são gravados
+            pks = list(news_queryset(task_options).order_by('pk').values_list('pk', flat=True))
+            if not pks:
                 self.stdout.write(
                     self.style.WARNING('Nenhuma notícia encontrada para análise.')
                 )
                 return
-            
-            total_count = queryset.count()
+
+            total_count = len(pks)
             self.stdout.write(f'Encontradas {total_count} notícias para análise.')
-            
-            # Processar em lotes
-            batch_size = options['batch_size']
-            analysis_service = NewsAnalysisService()
-            
-            total_success = 0
-            total_errors = 0
-            total_classified = 0
-            total_auto_assigned = 0
-            
-            for i in range(0, total_count, batch_size):
-                # Converter para lista para evitar problemas com slice
-                batch_list = list(queryset[i:i + batch_size])
-                self.stdout.write(f'Processando lote {i//batch_size + 1}...')
-                
-                # Análise de sentimento
-                results = analysis_service.batch_analyze_news(batch_list)
-                
-                total_success += results['processed']
-                total_errors += results['errors']
-                
-                # Classificação de categorias se solicitado
-                if options['classify_categories']:
-                    self.stdout.write('Executando classificação de categorias...')
-                    
-                    suggestions = analysis_service.suggest_categories_for_news_batch(batch_list)
-                    total_classified += len(suggestions)
-                    
-                    # Auto-atribuir categorias se solicitado
-                    if options['auto_assign_categories']:
-                        confidence_threshold = options['confidence_threshold']
-                        
-                        for suggestion in suggestions:
-                            classification = suggestion['classification']
-                            
-                            if (classification['confidence'] >= confidence_threshold and 
-                                suggestion['category_object']):
-                                
-                                try:
-                                    news = News.objects.get(id=suggestion['news_id'])
-                                    news.category = suggestion['category_object']
-                                    news.save()
-                                    total_auto_assigned += 1
-                                    
-                                    self.stdout.write(
-                                        f"Auto-atribuída categoria '{classification['suggested_category']}' "
-                                        f"para notícia {news.id} (confiança: {classification['confidence']:.1%})"
-                                    )
-                                except Exception as e:
-                                    self.stdout.write(
-                                        self.style.ERROR(
-                                            f"Erro ao auto-atribuir categoria para notícia {suggestion['news_id']}: {e}"
-                                        )
-                                    )
-                
-                # Mostrar erros se houver
-                if results['error_details']:
-                    for error in results['error_details'][:3]:  # Mostrar apenas os primeiros 3
-                        self.stdout.write(
-                            self.style.ERROR(
-                                f'Erro na notícia {error["news_id"]}: {error["error"]}'
-                            )
-                        )
-            
+            ranges = pk_ranges(pks, options['batch_size'])
+
+            if options['compare_workers']:
+                self._compare_workers(ranges, task_options, total_count, options['compare_workers'])
+                return
+
+            totals, elapsed, processes = self._run(ranges, task_options, options['workers'])
+
             # Resumo final
             summary = (
-                f'\\nAnálise concluída!\\n'
-                f'Total processado: {total_count}\\n'
-                f'Sucessos: {total_success}\\n'
-                f'Erros: {total_errors}'
+                f'\nAnálise concluída!\n'
+                f'Total processado: {total_count}\n'
+                f'Sucessos: {totals["processed"]}\n'
+                f'Erros: {totals["errors"]}'
             )
-            
+
             if options['classify_categories']:
                 summary += (
-                    f'\\n\\nClassificação de categorias:\\n'
-                    f'Total classificado: {total_classified}'
+                    f'\n\nClassificação de categorias:\n'
+                    f'Total classificado: {totals["classified"]}'
                 )
-                
+
                 if options['auto_assign_categories']:
-                    summary += f'\\nCategorias auto-atribuídas: {total_auto_assigned}'
-            
+                    summary += f'\nCategorias auto-atribuídas: {totals["auto_assigned"]}'
+
+            summary += '\n\n' + self._throughput(totals['selected'], elapsed, processes)
             self.stdout.write(self.style.SUCCESS(summary))
-            
+
         except Exception as e:
             raise CommandError(f'Erro durante a análise: {str(e)}')
 
-    def _get_news_queryset(self, options):
-        """Determina o queryset de notícias baseado nas opções"""
-        queryset = News.objects.all()
-        
-        # Filtrar por IDs específicos
-        if options['ids']:
-            queryset = queryset.filter(id__in=options['ids'])
-            return queryset
-        
-        # Filtrar por categoria
-        if options['category']:
-            queryset = queryset.filter(category__name__icontains=options['category'])
-        
-        # Filtrar por dias
-        if options['days']:
-            from datetime import timedelta
-            cutoff_date = timezone.now() - timedelta(days=options['days'])
-            queryset = queryset.filter(created_at__gte=cutoff_date)
-        
-        # Se não for --all, filtrar apenas não analisadas
-        if not options['all']:
-            queryset = queryset.filter(analysis_timestamp__isnull=True)
-        
-        return queryset.order_by('created_at')
\ No newline at end of file
+    def _run(self, ranges, task_options, workers):
+        """
+        Analisa as faixas com até `workers` processos; retorna os totais, o
+        tempo decorrido e o número de processos usados
+        """
+        totals = dict.fromkeys(('selected', 'processed', 'errors', 'classified', 'auto_assigned'), 0)
+        start = time.perf_counter()
+
+        # Não há mais processos que faixas
+        processes = min(workers, len(ranges))
+        if processes == 1:
+            service = NewsAnalysisService()
+            outcomes = (analyze_range(service, task_options, pk_range) for pk_range in ranges)
+            self._collect(outcomes, totals, len(ranges), start)
+        else:
+            # Os workers abrem as próprias conexões: as do processo principal
+            # são fechadas antes de o pool ser criado (fork)
+            connections.close_all()
+            with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+                tasks = [(task_options, pk_range) for pk_range in ranges]
+                self._collect(pool.imap_unordered(_analyze_range_task, tasks), totals, len(ranges), start)
+
+        return totals, time.perf_counter() - start, processes
+
+    def _collect(self, outcomes, totals, batches, start):
+        """Soma os resultados dos lotes à medida que terminam e mostra o progresso"""
+        for done, outcome in enumerate(outcomes, 1):
+            for key in totals:
+                totals[key] += outcome[key]
+
+            for level, message in outcome['messages']:
+                self.stdout.write(self.style.ERROR(message) if level == 'error' else message)
+
+            elapsed = time.perf_counter() - start
+            self.stdout.write(
+                f'Lote {done}/{batches}: {totals["processed"]} analisadas, {totals["errors"]} erros '
+                f'({totals["selected"] / elapsed if elapsed else 0:.0f} notícias/s)'
+            )
+
+    def _throughput(self, count, elapsed, workers):
+        rate = count / elapsed if elapsed else 0
+        return f'Vazão: {rate:.1f} notícias/s com {workers} worker(s) ({rate / workers:.1f} por worker)'
+
+    def _compare_workers(self, ranges, task_options, total_count, worker_counts):
+        """Reanalisa as mesmas notícias com cada quantidade de workers e compara a vazão"""
+        report = []
+        for workers in worker_counts:
+            self.stdout.write(self.style.SUCCESS(f'\n{workers} worker(s)'))
+            totals, elapsed, processes = self._run(ranges, task_options, workers)
+            report.append(self._throughput(totals['selected'], elapsed, processes))
+
+        self.stdout.write(self.style.SUCCESS(f'\nVazão ({total_count} notícias):'))
+        for line in report:
+            self.stdout.write(f'  {line}')
@@ -0,0 +1,133 @@
+"""
+Comando Django para comparar a extração de entidades anterior (uma regex não
+compilada por regra, com re.IGNORECASE) com a de common.entities (uma
+passada da regex compilada)
+"""
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.entities import EntityMatcher
+from common.models import News
+from common.services import ENTITY_TYPES
+from .benchmark_search import VOCABULARY
+
+# Regras anteriores do EntityExtractor
+LEGACY_PATTERNS = {
+    'pessoa': [
+        r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',
+        r'\b(?:Sr\.|Sra\.|Dr\.|Dra\.)\s[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',
+    ],
+    'organizacao': [
+        r'\b[A-Z][A-Za-z]*(?:\s[A-Z][A-Za-z]*)*\s(?:S\.A\.|Ltda\.|Inc\.|Corp\.)\b',
+        r'\b(?:Ministério|Secretaria|Prefeitura|Governo)\s[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',
+        r'\b[A-Z]{2,}\b',
+    ],
+    'local': [
+        r'\b(?:São Paulo|Rio de Janeiro|Brasília|Salvador|Fortaleza|Belo Horizonte)\b',
+        r'\b[A-Z][a-z]+(?:\s[A-Z][a-z]+)*(?:\s-\s[A-Z]{2})?\b',
+    ],
+    'valor_monetario': [
+        r'R\$\s*\d+(?:\.\d{3})*(?:,\d{2})?\b',
+        r'\b\d+(?:\.\d{3})*(?:,\d{2})?\s*(?:reais|milhões|bilhões)\b',
+    ],
+    'porcentagem': [
+        r'\b\d+(?:,\d+)?%\b',
+    ]
+}
+
+PHRASES = [
+    'o presidente Lula', 'a Dra. Ana Souza', 'o Ministério da Saúde', 'a Petrobras S.A.',
+    'em São Paulo', 'no Rio de Janeiro', 'Campinas - SP', 'segundo o IBGE', 'o Banco Central',
+    'R$ 1.500,00', '3 bilhões', '4,5%', 'Maria Silva', 'a Prefeitura de Curitiba', 'o STF',
+]
+
+
+def _legacy_entities(text):
+    entities = {}
+    for entity_type, patterns in LEGACY_PATTERNS.items():
+        found_entities = set()
+        for pattern in patterns:
+            found_entities.update(re.findall(pattern, text, re.IGNORECASE))
+        entities[entity_type] = [entity.strip() for entity in found_entities if len(entity.strip()) > 2][:5]
+    return entities
+
+
+class Command(BaseCommand):
+    help = 'Mede a vazão (textos/s) da extração de entidades: regras anteriores versus common.entities'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--texts',
+            type=int,
+            default=2000,
+            help='Quantidade de textos (padrão: 2000)'
+        )
+        parser.add_argument(
+            '--words',
+            type=int,
+            default=400,
+            help='Palavras por texto sintético (padrão: 400)'
+        )
+        parser.add_argument(
+            '--from-db',
+            action='store_true',
+            help='Usar as notícias do banco em vez de textos sintéticos'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Repetições por medição; vale a melhor (padrão: 3)'
+        )
+
+    def handle(self, *args, **options):
+        texts = self._texts(options)
+        if not texts:
+            self.stdout.write(self.style.WARNING('Nenhum texto para medir.'))
+            return
+
+        chars = sum(len(text) for text in texts)
+        self.stdout.write(f'{len(texts)} textos, {chars / len(texts):.0f} caracteres em média')
+
+        matcher = EntityMatcher(types=ENTITY_TYPES, limit=5)
+        results = {}
+        for name, extract in (('regex por regra', _legacy_entities), ('compilado', matcher.extract)):
+            seconds = self._measure(extract, texts, options['repeat'])
+            results[name] = len(texts) / seconds if seconds else 0
+            self.stdout.write(f'  {name}: {results[name]:.0f} textos/s')
+
+        if results['regex por regra']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Compilado {results['compilado'] / results['regex por regra']:.1f}x mais rápido"
+            ))
+
+    def _texts(self, options):
+        if options['from_db']:
+            news = News.objects.values_list('title', 'summary', 'content')[:options['texts']]
+            return [f'{title} {summary} {content}' for title, summary, content in news]
+
+        # Frases de ~12 palavras do vocabulário, com uma entidade a cada frase
+        rng = random.Random(0)
+        texts = []
+        for _ in range(options['texts']):
+            sentences = []
+            for _ in range(max(1, options['words'] // 12)):
+                words = [rng.choice(VOCABULARY) for _ in range(10)]
+                words.insert(rng.randrange(len(words)), rng.choice(PHRASES))
+                sentence = ' '.join(words)
+                sentences.append(sentence[0].upper() + sentence[1:] + '.')
+            texts.append(' '.join(sentences))
+        return texts
+
+    def _measure(self, extract, texts, repeat):
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            for text in texts:
+                extract(text)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,98 @@
+"""
+Comando Django para medir a serialização do feed: NewsListSerializer + JSONRenderer
+versus o caminho rápido (values() + news_list_rows + orjson/MessagePack)
+"""
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from common.models import News, Category
+from common.renderers import MessagePackRenderer, ORJSONRenderer
+from common.serializers import NEWS_LIST_VALUES, NewsListSerializer, news_list_rows
+
+
+class Command(BaseCommand):
+    help = 'Mede linhas/s da serialização do feed (serializers do DRF versus caminho rápido)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=1000,
+            help='Notícias por rodada (padrão: 1000); faltantes são criadas e descartadas ao final'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Rodadas por medição (padrão: 5)'
+        )
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            self._ensure_news(rows)
+
+            queryset = News.objects.filter(is_active=True).order_by('-published_at')[:rows]
+            # As consultas ficam fora da medição: compara-se apenas montagem e renderização
+            instances = list(queryset.select_related('author', 'category').defer('search_vector'))
+            values = list(queryset.values(*NEWS_LIST_VALUES))
+
+            cases = [
+                ('NewsListSerializer + JSONRenderer',
+                 lambda: JSONRenderer().render(NewsListSerializer(instances, many=True).data)),
+                ('news_list_rows + JSONRenderer',
+                 lambda: JSONRenderer().render(news_list_rows(values))),
+                ('news_list_rows + ORJSONRenderer',
+                 lambda: ORJSONRenderer().render(news_list_rows(values))),
+                ('news_list_rows + MessagePackRenderer',
+                 lambda: MessagePackRenderer().render(news_list_rows(values))),
+            ]
+
+            baseline = None
+            for name, render in cases:
+                seconds = self._measure(render, options['repeat'])
+                rows_per_second = len(values) / seconds
+                baseline = baseline or rows_per_second
+                self.stdout.write(
+                    f'{name:40} {rows_per_second:12,.0f} linhas/s  ({rows_per_second / baseline:.1f}x)'
+                )
+
+            # Descarta as notícias criadas para a medição
+            transaction.set_rollback(True)
+
+    def _ensure_news(self, rows):
+        missing = rows - News.objects.filter(is_active=True).count()
+        if missing <= 0:
+            return
+
+        categories = list(Category.objects.all())
+        if not categories:
+            raise CommandError('É necessário ao menos uma categoria.')
+        authors = [
+            User.objects.get_or_create(username=f'benchmark_autor_{i}')[0] for i in range(20)
+        ]
+        News.objects.bulk_create(
+            News(
+                title=f'Notícia de benchmark {i}',
+                content='Conteúdo ' * 50,
+                summary=f'Resumo da notícia de benchmark {i}',
+                source='Benchmark',
+                category=categories[i % len(categories)],
+                author=authors[i % len(authors)],
+            )
+            for i in range(missing)
+        )
+        Category.objects.refresh_active_news_count()
+
+    def _measure(self, render, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            render()
+            timings.append(time.perf_counter() - start)
+        return statistics.median(timings)
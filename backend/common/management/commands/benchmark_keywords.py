@@ -0,0 +1,117 @@
+"""
+Comando Django para comparar a classificação por palavras-chave com substring
+(`keyword in texto`, uma varredura por palavra-chave) e com o autômato de
+common.keyword_automaton (uma passada pelo texto)
+"""
+import random
+import re
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.keyword_automaton import tokenize
+from common.models import News
+from common.services import (
+    CATEGORY_AUTOMATON, CATEGORY_KEYWORDS, CONTEXT_AUTOMATON, CONTEXT_KEYWORDS,
+    FIXED_CATEGORY_AUTOMATON, FIXED_CATEGORY_KEYWORDS,
+)
+from .benchmark_search import VOCABULARY
+
+
+def _substring_scores(text):
+    """Implementação anterior: cada palavra-chave procurada no texto inteiro"""
+    normalized_text = re.sub(r'\s+', ' ', re.sub(r'[^\w\s]', ' ', text.lower())).strip()
+    text_lower = text.lower()
+    categories = {
+        category: sum(2 for keyword in keywords['primary'] if keyword in normalized_text)
+        + sum(1 for keyword in keywords['secondary'] if keyword in normalized_text)
+        for category, keywords in CATEGORY_KEYWORDS.items()
+    }
+    contexts = [
+        context for context, keywords in CONTEXT_KEYWORDS.items()
+        if any(keyword in text_lower for keyword in keywords)
+    ]
+    fixed = {
+        category: sum(1 for word in words if word in text_lower)
+        for category, words in FIXED_CATEGORY_KEYWORDS.items()
+    }
+    return categories, contexts, fixed
+
+
+def _automaton_scores(text):
+    """Uma tokenização e uma passada de cada autômato"""
+    words = tokenize(text)
+    categories = CATEGORY_AUTOMATON.scores(words)
+    contexts = CONTEXT_AUTOMATON.scores(words)
+    fixed = FIXED_CATEGORY_AUTOMATON.scores(words)
+    return categories, [context for context in CONTEXT_KEYWORDS if contexts[context]], fixed
+
+
+class Command(BaseCommand):
+    help = 'Mede a vazão (textos/s) da classificação por palavras-chave: substring versus autômato'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--texts',
+            type=int,
+            default=2000,
+            help='Quantidade de textos (padrão: 2000)'
+        )
+        parser.add_argument(
+            '--words',
+            type=int,
+            default=400,
+            help='Palavras por texto sintético (padrão: 400)'
+        )
+        parser.add_argument(
+            '--from-db',
+            action='store_true',
+            help='Usar as notícias do banco em vez de textos sintéticos'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Repetições por medição; vale a melhor (padrão: 3)'
+        )
+
+    def handle(self, *args, **options):
+        texts = self._texts(options)
+        if not texts:
+            self.stdout.write(self.style.WARNING('Nenhum texto para medir.'))
+            return
+
+        chars = sum(len(text) for text in texts)
+        self.stdout.write(f'{len(texts)} textos, {chars / len(texts):.0f} caracteres em média')
+
+        results = {}
+        for name, scorer in (('substring', _substring_scores), ('autômato', _automaton_scores)):
+            seconds = self._measure(scorer, texts, options['repeat'])
+            results[name] = len(texts) / seconds if seconds else 0
+            self.stdout.write(f'  {name}: {results[name]:.0f} textos/s')
+
+        if results['substring']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Autômato {results['autômato'] / results['substring']:.1f}x mais rápido"
+            ))
+
+    def _texts(self, options):
+        if options['from_db']:
+            news = News.objects.values_list('title', 'summary', 'content')[:options['texts']]
+            return [f'{title} {summary} {content}' for title, summary, content in news]
+
+        rng = random.Random(0)
+        return [
+            ' '.join(rng.choice(VOCABULARY) for _ in range(options['words']))
+            for _ in range(options['texts'])
+        ]
+
+    def _measure(self, scorer, texts, repeat):
+        best = None
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            for text in texts:
+                scorer(text)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best
@@ -0,0 +1,145 @@
+"""
+Comando Django para comparar a busca ILIKE (SearchFilter) com o full-text search do PostgreSQL
+"""
+import statistics
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Q
+
+from common.filters import NewsSearchFilter
+from common.models import News, Category
+
+BENCHMARK_SOURCE = '__benchmark_search__'
+SEED_CHUNK_SIZE = 50000
+
+VOCABULARY = [
+    'governo', 'economia', 'mercado', 'inflação', 'juros', 'banco', 'empresa', 'investimento',
+    'tecnologia', 'inteligência', 'artificial', 'software', 'internet', 'startup', 'dados',
+    'futebol', 'campeonato', 'jogador', 'time', 'copa', 'saúde', 'hospital', 'vacina',
+    'médico', 'escola', 'universidade', 'professor', 'aluno', 'ensino', 'clima', 'floresta',
+    'polícia', 'segurança', 'crime', 'presidente', 'ministro', 'congresso', 'eleição',
+    'cidade', 'estado', 'brasil', 'mundo', 'projeto', 'pesquisa', 'resultado', 'ano',
+    'semana', 'anúncio', 'crescimento', 'queda', 'acordo', 'crise', 'cultura', 'música',
+    'cinema', 'festival', 'população', 'trabalho', 'salário', 'energia',
+]
+
+
+class Command(BaseCommand):
+    help = 'Mede a latência da busca de notícias: ILIKE (SearchFilter) versus full-text search (PostgreSQL)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            nargs='+',
+            type=int,
+            default=[100000, 1000000],
+            help='Quantidades de notícias a medir (padrão: 100000 1000000)'
+        )
+        parser.add_argument(
+            '--terms',
+            nargs='+',
+            default=['economia', 'inteligência artificial', 'vacina hospital'],
+            help='Termos de busca'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Repetições por medição (padrão: 5)'
+        )
+        parser.add_argument(
+            '--keep',
+            action='store_true',
+            help='Manter as notícias geradas ao final'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('O benchmark de busca requer PostgreSQL.')
+
+        author = User.objects.order_by('id').first()
+        category_ids = list(Category.objects.values_list('id', flat=True))
+        if author is None or not category_ids:
+            raise CommandError('É necessário ao menos um usuário e uma categoria.')
+
+        seeded = News.objects.filter(source=BENCHMARK_SOURCE).count()
+        try:
+            for size in sorted(options['sizes']):
+                existing = News.objects.exclude(source=BENCHMARK_SOURCE).count()
+                missing = size - existing - seeded
+                if missing > 0:
+                    self.stdout.write(f'Gerando {missing} notícias...')
+                    self._seed(seeded, missing, author.id, category_ids)
+                    seeded += missing
+
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE common_news')
+
+                self.stdout.write(self.style.SUCCESS(f'\n{existing + seeded} notícias'))
+                for term in options['terms']:
+                    ilike_ms = self._measure(self._ilike_queryset(term), options['repeat'])
+                    fts_ms = self._measure(self._fulltext_queryset(term), options['repeat'])
+                    self.stdout.write(
+                        f'  "{term}": ILIKE {ilike_ms:.1f} ms | FTS {fts_ms:.1f} ms '
+                        f'| {ilike_ms / fts_ms if fts_ms else 0:.1f}x'
+                    )
+        finally:
+            if not options['keep']:
+                with connection.cursor() as cursor:
+                    cursor.execute('DELETE FROM common_news WHERE source = %s', [BENCHMARK_SOURCE])
+
+    def _seed(self, offset, count, author_id, category_ids):
+        """Insere notícias sintéticas com texto aleatório do vocabulário (SQL direto, em blocos)"""
+        for start in range(offset + 1, offset + count + 1, SEED_CHUNK_SIZE):
+            end = min(start + SEED_CHUNK_SIZE - 1, offset + count)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO common_news (
+                        title, content, summary, source, category_id, author_id,
+                        published_at, created_at, updated_at, is_active
+                    )
+                    SELECT
+                        array_to_string(ARRAY(
+                            SELECT vocab.words[1 + floor(random() * cardinality(vocab.words))::int]
+                            FROM generate_series(1, 8) WHERE i > 0), ' '),
+                        array_to_string(ARRAY(
+                            SELECT vocab.words[1 + floor(random() * cardinality(vocab.words))::int]
+                            FROM generate_series(1, 300) WHERE i > 0), ' '),
+                        array_to_string(ARRAY(
+                            SELECT vocab.words[1 + floor(random() * cardinality(vocab.words))::int]
+                            FROM generate_series(1, 30) WHERE i > 0), ' '),
+                        %s, (%s::bigint[])[1 + i %% %s], %s,
+                        NOW() - i * INTERVAL '1 minute', NOW(), NOW(), true
+                    FROM generate_series(%s, %s) AS i, (SELECT %s::text[] AS words) AS vocab
+                    """,
+                    [BENCHMARK_SOURCE, category_ids, len(category_ids), author_id, start, end, VOCABULARY]
+                )
+
+    def _feed_queryset(self):
+        return News.objects.filter(is_active=True).defer('search_vector')
+
+    def _ilike_queryset(self, term):
+        """Equivalente ao SearchFilter: cada palavra em title, content ou summary (ILIKE)"""
+        queryset = self._feed_queryset()
+        for word in term.split():
+            queryset = queryset.filter(
+                Q(title__icontains=word) | Q(content__icontains=word) | Q(summary__icontains=word)
+            )
+        return queryset.order_by('-published_at')
+
+    def _fulltext_queryset(self, term):
+        return NewsSearchFilter().fulltext_queryset(self._feed_queryset(), term.split())
+
+    def _measure(self, queryset, repeat):
+        """Mediana (ms) de uma página do feed: COUNT(*) + 10 primeiros resultados"""
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset.count()
+            list(queryset[:10])
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
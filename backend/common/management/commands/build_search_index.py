@@ -0,0 +1,29 @@
+"""
+Comando Django para (re)gerar o índice BM25 embutido da busca de notícias
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from common.search_index import get_search_index, indexed_documents
+
+
+class Command(BaseCommand):
+    help = 'Gera o segmento base do índice BM25 (NEWS_SEARCH_INDEX_PATH) a partir das notícias ativas'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            help='Arquivo do índice (padrão: settings.NEWS_SEARCH_INDEX_PATH)'
+        )
+
+    def handle(self, *args, **options):
+        index = get_search_index(options['path'])
+
+        start = time.perf_counter()
+        count = index.rebuild(indexed_documents())
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{count} notícias indexadas em {index.path} ({elapsed:.1f}s).'
+        ))
@@ -0,0 +1,54 @@
+"""
+Comando Django para consultar e limpar o cache dos resultados da OpenAI
+"""
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Sum
+
+from common.llm_cache import llm_cache
+from common.models import LLMCacheEntry
+
+
+class Command(BaseCommand):
+    help = 'Estatísticas e limpeza do cache dos resultados da OpenAI (common.llm_cache)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Remove as entradas expiradas e as menos usadas além de LLM_CACHE_MAX_ENTRIES'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Remove todas as entradas (opcionalmente só as de --task)'
+        )
+        parser.add_argument(
+            '--task',
+            type=str,
+            help='Tarefa a limpar com --clear (ex.: extraction, classification, extract_classify)'
+        )
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            entries = LLMCacheEntry.objects.all()
+            if options['task']:
+                entries = entries.filter(task=options['task'])
+            removed, _ = entries.delete()
+            self.stdout.write(self.style.SUCCESS(f'{removed} entradas removidas.'))
+        elif options['prune']:
+            removed = llm_cache.prune()
+            self.stdout.write(self.style.SUCCESS(f'{removed} entradas removidas.'))
+
+        tasks = (
+            LLMCacheEntry.objects.values('task', 'model', 'prompt_version')
+            .annotate(entries=Count('key'), hits=Sum('hits'))
+            .order_by('task', 'model', 'prompt_version')
+        )
+        if not tasks:
+            self.stdout.write('Cache vazio.')
+            return
+        for row in tasks:
+            self.stdout.write(
+                f"{row['task']} ({row['model']}, prompt v{row['prompt_version']}): "
+                f"{row['entries']} entradas, {row['hits']} acertos"
+            )
@@ -0,0 +1,157 @@
+"""
+Comando Django para medir a vazão das leituras da API sob carga concorrente
+
+Abre `--concurrency` conexões keep-alive (HTTP/1.1, asyncio da biblioteca
+padrão) contra um servidor em execução e repete GETs nos caminhos pedidos
+durante `--duration` segundos. Serve para comparar o servidor WSGI
+(gunicorn app.wsgi) com o ASGI (gunicorn app.asgi com workers do uvicorn e
+ASYNC_READ_VIEWS ativo) nas mesmas rotas.
+"""
+import asyncio
+import itertools
+import statistics
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Mede requisições/s e latência das leituras da API com clientes concorrentes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            default='http://127.0.0.1:8000',
+            help='Endereço do servidor (padrão: http://127.0.0.1:8000)'
+        )
+        parser.add_argument(
+            '--paths',
+            nargs='+',
+            default=['/api/news/', '/api/categories/', '/api/preferences/'],
+            help='Caminhos requisitados, em rodízio'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=200,
+            help='Clientes simultâneos (padrão: 200)'
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=20,
+            help='Duração da medição em segundos (padrão: 20)'
+        )
+        parser.add_argument(
+            '--token',
+            help='Access token JWT enviado como Authorization: Bearer'
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Informe uma URL http://host:porta')
+
+        latencies, errors, elapsed = asyncio.run(self._run(
+            url.hostname, url.port or 80, options['paths'], options['concurrency'],
+            options['duration'], options['token']
+        ))
+        if not latencies:
+            raise CommandError(f'Nenhuma requisição concluída ({errors} erros)')
+
+        latencies.sort()
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(latencies)} requisições em {elapsed:.1f} s com {options["concurrency"]} clientes'
+        ))
+        self.stdout.write(f'  {len(latencies) / elapsed:.1f} req/s')
+        self.stdout.write(
+            f'  latência: p50 {statistics.median(latencies) * 1000:.1f} ms '
+            f'| p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f} ms '
+            f'| máx {latencies[-1] * 1000:.1f} ms'
+        )
+        self.stdout.write(f'  erros: {errors}')
+
+    async def _run(self, host, port, paths, concurrency, duration, token):
+        latencies = []
+        errors = 0
+        requests = itertools.cycle(
+            self._request(host, port, path, token) for path in paths
+        )
+        start = time.perf_counter()
+        deadline = start + duration
+
+        async def client():
+            nonlocal errors
+            reader = writer = None
+            while time.perf_counter() < deadline:
+                try:
+                    if writer is None:
+                        reader, writer = await asyncio.open_connection(host, port)
+                    sent = time.perf_counter()
+                    writer.write(next(requests))
+                    status, keep_alive = await self._read_response(reader)
+                    if status != 200:
+                        errors += 1
+                    else:
+                        latencies.append(time.perf_counter() - sent)
+                    if not keep_alive:
+                        writer.close()
+                        writer = None
+                except (OSError, asyncio.IncompleteReadError, ValueError):
+                    errors += 1
+                    if writer is not None:
+                        writer.close()
+                    writer = None
+            if writer is not None:
+                writer.close()
+
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+    def _request(self, host, port, path, token):
+        headers = [
+            f'GET {path} HTTP/1.1',
+            f'Host: {host}:{port}',
+            'Accept: application/json',
+            'Connection: keep-alive',
+        ]
+        if token:
+            headers.append(f'Authorization: Bearer {token}')
+        return ('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1')
+
+    async def _read_response(self, reader):
+        """Lê uma resposta completa; retorna (status, conexão reaproveitável)"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise asyncio.IncompleteReadError(b'', None)
+        status = int(status_line.split()[1])
+
+        length = None
+        chunked = False
+        keep_alive = True
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            name, value = name.strip().lower(), value.strip().lower()
+            if name == 'content-length':
+                length = int(value)
+            elif name == 'transfer-encoding':
+                chunked = 'chunked' in value
+            elif name == 'connection':
+                keep_alive = value != 'close'
+
+        if chunked:
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif length is not None:
+            await reader.readexactly(length)
+        else:
+            await reader.read()
+            keep_alive = False
+        return status, keep_alive
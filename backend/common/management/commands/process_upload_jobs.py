@@ -0,0 +1,85 @@
+"""
+Comando Django do worker de uploads de notícias
+
+Consome a fila de jobs de upload no RabbitMQ (common.messaging) e processa
+cada job (common.upload_jobs). Ao iniciar e a cada `--idle-interval`
+segundos sem mensagens, retoma os jobs interrompidos (worker que caiu no
+meio do processamento) ou pendentes sem mensagem na fila. Vários workers
+podem rodar em paralelo: cada job é reivindicado por um só.
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from pika.exceptions import AMQPError
+
+from common.messaging import consume_upload_jobs
+from common.models import UploadJob
+from common.upload_jobs import run_upload_job, stale_upload_jobs
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Processa os jobs de upload de notícias (fila do RabbitMQ)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--job',
+            type=int,
+            help='Processa apenas este job, sem RabbitMQ, e termina'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Retoma os jobs interrompidos ou pendentes, sem RabbitMQ, e termina'
+        )
+        parser.add_argument(
+            '--idle-interval',
+            type=float,
+            default=30,
+            help='Segundos sem mensagens entre verificações de jobs a retomar (padrão: 30)'
+        )
+        parser.add_argument(
+            '--reconnect-delay',
+            type=float,
+            default=5,
+            help='Segundos de espera antes de reconectar ao RabbitMQ (padrão: 5)'
+        )
+
+    def handle(self, *args, **options):
+        if options['job']:
+            if not UploadJob.objects.filter(pk=options['job']).exists():
+                raise CommandError(f"Job de upload {options['job']} não encontrado")
+            self._run(options['job'])
+            return
+
+        self._resume()
+        if options['once']:
+            return
+
+        while True:
+            try:
+                self.stdout.write(self.style.SUCCESS('Aguardando jobs de upload...'))
+                consume_upload_jobs(self._run, self._resume, options['idle_interval'])
+            except AMQPError as e:
+                self.stderr.write(f'Conexão com o RabbitMQ perdida ({e!r}); reconectando...')
+                time.sleep(options['reconnect_delay'])
+                self._resume()
+
+    def _run(self, job_id):
+        try:
+            job = run_upload_job(job_id)
+        except Exception as e:
+            # O job continua em processamento e é retomado quando o heartbeat vencer
+            self.stderr.write(self.style.ERROR(f'Job {job_id}: erro - {e}'))
+            return
+        if job is not None:
+            self.stdout.write(
+                f'Job {job.id}: {job.success_count} criadas, {job.error_count} com erro, de {job.total_count}'
+            )
+
+    def _resume(self):
+        for job_id in stale_upload_jobs():
+            self.stdout.write(f'Retomando job de upload {job_id}')
+            self._run(job_id)
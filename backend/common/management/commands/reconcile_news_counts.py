@@ -0,0 +1,44 @@
+"""
+Comando Django para reconciliar o contador de notícias ativas por categoria
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+
+from common.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Compara Category.active_news_count com common_news e corrige divergências'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas relatar divergências, sem corrigir'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            categories = (
+                Category.objects
+                .annotate(actual=Count('news', filter=Q(news__is_active=True)))
+                .order_by('name')
+            )
+            drifted = [category for category in categories if category.active_news_count != category.actual]
+
+            for category in drifted:
+                self.stdout.write(
+                    f'{category.name}: armazenado {category.active_news_count}, real {category.actual}'
+                )
+
+            if not drifted:
+                self.stdout.write(self.style.SUCCESS('Nenhuma divergência encontrada.'))
+                return
+
+            if options['dry_run']:
+                self.stdout.write(self.style.WARNING(f'{len(drifted)} categorias divergentes (dry-run).'))
+                return
+
+            Category.objects.filter(pk__in=[category.pk for category in drifted]).refresh_active_news_count()
+            self.stdout.write(self.style.SUCCESS(f'{len(drifted)} categorias corrigidas.'))
@@ -0,0 +1,86 @@
+"""
+Fila de jobs de upload no RabbitMQ (mesmo broker do curador)
+
+A mensagem apenas avisa os workers de que há um job a processar: o estado
+fica no banco (UploadJob / UploadJobItem). Por isso ela é confirmada (ack)
+ao ser recebida; se o worker cair no meio do job, outro worker o retoma
+pelo heartbeat vencido (common.upload_jobs.stale_upload_jobs), sem depender
+de reentrega pelo broker.
+"""
+import json
+import logging
+
+import pika
+from django.conf import settings
+from pika.exceptions import AMQPError
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_JOBS_QUEUE = 'news_upload_jobs'
+
+
+def connection_parameters():
+    return pika.ConnectionParameters(
+        host=settings.RABBITMQ_HOST,
+        port=settings.RABBITMQ_PORT,
+        credentials=pika.PlainCredentials(settings.RABBITMQ_USER, settings.RABBITMQ_PASSWORD),
+        heartbeat=600,
+        blocked_connection_timeout=300,
+        connection_attempts=1,
+        socket_timeout=5,
+    )
+
+
+def _declare(channel):
+    channel.queue_declare(queue=UPLOAD_JOBS_QUEUE, durable=True)
+
+
+def publish_upload_job(job_id):
+    """
+    Publica o job na fila de uploads. Retorna False se o broker não estiver
+    disponível: o job continua pendente e é retomado pelos workers.
+    """
+    try:
+        connection = pika.BlockingConnection(connection_parameters())
+        try:
+            channel = connection.channel()
+            _declare(channel)
+            channel.basic_publish(
+                exchange='',
+                routing_key=UPLOAD_JOBS_QUEUE,
+                body=json.dumps({'job_id': job_id}),
+                properties=pika.BasicProperties(delivery_mode=2, content_type='application/json'),
+            )
+        finally:
+            connection.close()
+    except AMQPError as e:
+        logger.warning(f"Não foi possível publicar o job de upload {job_id}: {e!r}")
+        return False
+    return True
+
+
+def consume_upload_jobs(on_job, on_idle, idle_interval):
+    """
+    Consome a fila de uploads: `on_job(job_id)` para cada mensagem e
+    `on_idle()` a cada `idle_interval` segundos sem mensagens.
+    Retorna apenas com erro de conexão (AMQPError).
+    """
+    connection = pika.BlockingConnection(connection_parameters())
+    try:
+        channel = connection.channel()
+        _declare(channel)
+        channel.basic_qos(prefetch_count=1)
+        for method, properties, body in channel.consume(UPLOAD_JOBS_QUEUE, inactivity_timeout=idle_interval):
+            if method is None:
+                on_idle()
+                continue
+            channel.basic_ack(method.delivery_tag)
+            try:
+                job_id = int(json.loads(body)['job_id'])
+            except (ValueError, KeyError, TypeError):
+                logger.error(f"Mensagem inválida na fila {UPLOAD_JOBS_QUEUE}: {body!r}")
+                continue
+            on_job(job_id)
+    finally:
+        if connection.is_open:
+            connection.close()
@@ -0,0 +1,284 @@
+"""
+Orçamento de queries SQL por endpoint e roteamento primário/réplica
+"""
+import hashlib
+import logging
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.dispatch import Signal
+
+from .db_routers import PRIMARY, choose_replica, replica_aliases, reset_reads, route_reads
+
+logger = logging.getLogger(__name__)
+
+# Enviado ao final de cada requisição medida (view_name, queries, db_time_ms, budget,
+# queries_by_alias). Backends de métricas podem se conectar a este signal; com
+# réplicas, queries_by_alias dá a parcela de queries no primário e nas réplicas.
+query_budget_measured = Signal()
+
+
+class QueryBudgetExceeded(Exception):
+    """Uma view executou mais queries do que o orçamento declarado"""
+
+
+def query_budget(max_queries):
+    """
+    Declara o número máximo de queries de uma view baseada em função.
+
+    Deve ser aplicado acima de @api_view. Use None para views em lote,
+    cujo número de queries depende do tamanho da entrada.
+    """
+    def decorator(view):
+        view.query_budget = max_queries
+        return view
+    return decorator
+
+
+def get_view_budget(view_func, method):
+    """
+    Retorna (nome da view, orçamento declarado) para a view e o método HTTP.
+
+    ViewSets declaram `query_budgets = {'list': 4, ...}` por action; views
+    de função usam o decorator @query_budget. Levanta KeyError quando não
+    há orçamento declarado.
+    """
+    view_class = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None)
+
+    if view_class is not None and actions:
+        action = actions.get(method.lower())
+        return f'{view_class.__name__}.{action}', getattr(view_class, 'query_budgets', {})[action]
+
+    name = view_class.__name__ if view_class is not None else view_func.__name__
+    if not hasattr(view_func, 'query_budget'):
+        raise KeyError(name)
+    return name, view_func.query_budget
+
+
+# Verdadeiro dentro de unbudgeted_queries()
+_unbudgeted = ContextVar('unbudgeted_queries', default=False)
+
+
+@contextmanager
+def unbudgeted_queries():
+    """
+    Queries executadas no bloco não contam para o orçamento da view: trabalho
+    em lote que normalmente roda fora da requisição (ex.: job de upload
+    processado na própria requisição com UPLOAD_JOBS_EAGER).
+    """
+    token = _unbudgeted.set(True)
+    try:
+        yield
+    finally:
+        _unbudgeted.reset(token)
+
+
+class _QueryUsage:
+    """execute_wrapper que acumula quantidade e duração das queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.by_alias = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        if _unbudgeted.get():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.by_alias[context['connection'].alias] += 1
+
+
+class QueryBudgetMiddleware:
+    """
+    Mede queries e tempo de banco por view e compara com o orçamento declarado.
+
+    QUERY_BUDGET_MODE controla a reação ao estouro do orçamento:
+    - 'raise': levanta QueryBudgetExceeded (padrão com DEBUG ativo)
+    - 'log': registra um warning (padrão em produção)
+    - 'off': desativa a medição
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    @property
+    def mode(self):
+        return getattr(settings, 'QUERY_BUDGET_MODE', 'raise' if settings.DEBUG else 'log')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        mode = self.mode
+        if mode == 'off':
+            return self.get_response(request)
+
+        usage = _QueryUsage()
+        with self._measure(usage):
+            response = self.get_response(request)
+        return self._check_budget(request, response, usage, mode)
+
+    async def __acall__(self, request):
+        mode = self.mode
+        if mode == 'off':
+            return await self.get_response(request)
+
+        # As queries do ORM assíncrono rodam na thread de sync_to_async da
+        # requisição (thread_sensitive), com conexões próprias: os wrappers
+        # são registrados e removidos nessa mesma thread
+        usage = _QueryUsage()
+        stack = await sync_to_async(self._measure)(usage)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(stack.close)()
+        return self._check_budget(request, response, usage, mode)
+
+    def _measure(self, usage):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(usage))
+        return stack
+
+    def _check_budget(self, request, response, usage, mode):
+        resolver_match = getattr(request, 'resolver_match', None)
+        if resolver_match is None:
+            return response
+        try:
+            view_name, budget = get_view_budget(resolver_match.func, request.method)
+        except KeyError:
+            # Views sem orçamento declarado (admin, schema, etc.) não são verificadas
+            return response
+
+        db_time_ms = usage.duration * 1000
+        response['Server-Timing'] = f'db;dur={db_time_ms:.1f};desc="{usage.count} queries"'
+        if replica_aliases():
+            response['Server-Timing'] += ''.join(
+                f', db-{alias};desc="{count} queries"' for alias, count in sorted(usage.by_alias.items())
+            )
+        query_budget_measured.send(
+            sender=self.__class__,
+            view_name=view_name,
+            queries=usage.count,
+            db_time_ms=db_time_ms,
+            budget=budget,
+            queries_by_alias=dict(usage.by_alias),
+        )
+
+        if budget is not None and usage.count > budget:
+            message = (
+                f'{view_name} executou {usage.count} queries '
+                f'({db_time_ms:.1f} ms), orçamento: {budget}'
+            )
+            if mode == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        return response
+
+
+class DatabaseRoutingMiddleware:
+    """
+    Escolhe o banco das leituras de cada requisição (common.db_routers).
+
+    Requisições de leitura usam uma réplica, exceto quando o cliente
+    escreveu há menos de DATABASE_PRIMARY_PIN_SECONDS: a fixação no primário
+    é guardada no cache, pela credencial (Authorization ou cookie de sessão),
+    e em um cookie, para clientes sem credencial. Sem réplicas configuradas
+    não faz nada.
+
+    Com LocMemCache a fixação por credencial vale por processo; o cookie
+    vale entre processos.
+    """
+
+    sync_capable = True
+    async_capable = True
+    pin_cookie = 'db_primary_pin'
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not replica_aliases():
+            return self.get_response(request)
+
+        pin_key = self._pin_key(request)
+        pinned = self.pin_cookie in request.COOKIES or (pin_key is not None and cache.get(pin_key))
+        token = route_reads(self._read_alias(request, pinned))
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_reads(token)
+
+        if self._wrote(request, response):
+            if pin_key is not None:
+                cache.set(pin_key, True, settings.DATABASE_PRIMARY_PIN_SECONDS)
+            self._set_pin_cookie(response)
+        return response
+
+    async def __acall__(self, request):
+        if not replica_aliases():
+            return await self.get_response(request)
+
+        pin_key = self._pin_key(request)
+        pinned = self.pin_cookie in request.COOKIES or (pin_key is not None and await cache.aget(pin_key))
+        token = route_reads(self._read_alias(request, pinned))
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_reads(token)
+
+        if self._wrote(request, response):
+            if pin_key is not None:
+                await cache.aset(pin_key, True, settings.DATABASE_PRIMARY_PIN_SECONDS)
+            self._set_pin_cookie(response)
+        return response
+
+    def _read_alias(self, request, pinned):
+        if request.method in self.safe_methods and not pinned:
+            return choose_replica()
+        return PRIMARY
+
+    def _pin_key(self, request):
+        credential = (
+            request.META.get('HTTP_AUTHORIZATION')
+            or request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        if not credential:
+            return None
+        return 'db_primary_pin:' + hashlib.sha1(credential.encode('utf-8')).hexdigest()
+
+    def _wrote(self, request, response):
+        return request.method not in self.safe_methods and response.status_code < 400
+
+    def _set_pin_cookie(self, response):
+        response.set_cookie(
+            self.pin_cookie, '1',
+            max_age=settings.DATABASE_PRIMARY_PIN_SECONDS,
+            httponly=True,
+            samesite='Lax',
+        )
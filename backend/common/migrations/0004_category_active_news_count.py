@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:41
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_active_news_count(apps, schema_editor):
+    """Preenche o contador com as notícias ativas já existentes"""
+    Category = apps.get_model('common', 'Category')
+    News = apps.get_model('common', 'News')
+
+    active_news = (
+        News.objects.filter(category=OuterRef('pk'), is_active=True)
+        .order_by()
+        .values('category')
+        .annotate(total=Count('pk'))
+        .values('total')
+    )
+    Category.objects.update(active_news_count=Coalesce(Subquery(active_news), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0003_add_main_categories'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='active_news_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Notícias ativas'),
+        ),
+        migrations.RunPython(populate_active_news_count, migrations.RunPython.noop),
+    ]
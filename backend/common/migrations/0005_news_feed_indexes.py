@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:42
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexConcurrentlyIfPostgres(AddIndexConcurrently):
+    """
+    CREATE INDEX CONCURRENTLY no PostgreSQL (sem bloquear escritas em
+    common_news); AddIndex comum nos demais bancos (ex.: SQLite nos testes).
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        return migrations.AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('common', '0004_category_active_news_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfPostgres(
+            model_name='news',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['-published_at', '-id'], name='news_active_feed_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='news',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['category', '-published_at'], name='news_active_cat_feed_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='news',
+            index=models.Index(fields=['title'], name='news_title_idx'),
+        ),
+        AddIndexConcurrentlyIfPostgres(
+            model_name='news',
+            index=models.Index(condition=models.Q(('analysis_timestamp__isnull', True)), fields=['created_at'], name='news_unanalyzed_idx'),
+        ),
+    ]
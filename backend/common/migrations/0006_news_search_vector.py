@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:43
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('portuguese', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('portuguese', coalesce({row}summary, '')), 'B') ||
+    setweight(to_tsvector('portuguese', coalesce({row}content, '')), 'C')
+"""
+
+BACKFILL_BATCH_SIZE = 10000
+
+
+def create_search_objects(apps, schema_editor):
+    """Trigger, preenchimento e índice GIN do vetor de busca (apenas PostgreSQL)"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute(f"""
+        CREATE OR REPLACE FUNCTION common_news_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql;
+    """)
+    schema_editor.execute("""
+        CREATE TRIGGER common_news_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, summary, content, search_vector ON common_news
+        FOR EACH ROW EXECUTE FUNCTION common_news_search_vector_update();
+    """)
+
+    # Preencher as notícias existentes em lotes, para não manter um lock longo na tabela
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MIN(id), 0), COALESCE(MAX(id), 0) FROM common_news")
+        min_id, max_id = cursor.fetchone()
+        for start in range(min_id, max_id + 1, BACKFILL_BATCH_SIZE):
+            cursor.execute(
+                f"UPDATE common_news SET search_vector = {SEARCH_VECTOR_SQL.format(row='')} "
+                "WHERE id >= %s AND id < %s",
+                [start, start + BACKFILL_BATCH_SIZE]
+            )
+
+    schema_editor.execute(
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS news_search_vector_idx "
+        "ON common_news USING gin (search_vector)"
+    )
+
+
+def drop_search_objects(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    schema_editor.execute("DROP INDEX CONCURRENTLY IF EXISTS news_search_vector_idx")
+    schema_editor.execute("DROP TRIGGER IF EXISTS common_news_search_vector_trigger ON common_news")
+    schema_editor.execute("DROP FUNCTION IF EXISTS common_news_search_vector_update()")
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY não pode rodar dentro de uma transação
+    atomic = False
+
+    dependencies = [
+        ('common', '0005_news_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='news',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Vetor de busca'),
+        ),
+        # O índice GIN fica fora do estado do modelo: o SQLite não o suporta
+        migrations.RunPython(create_search_objects, drop_search_objects),
+    ]
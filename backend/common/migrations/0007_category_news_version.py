@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0006_news_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='news_version',
+            field=models.PositiveBigIntegerField(default=0, editable=False, verbose_name='Versão das notícias'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0008_category_updated_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(blank=True, max_length=255, verbose_name='Arquivo')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('processing', 'Processando'), ('completed', 'Concluído'), ('failed', 'Falhou')], default='pending', max_length=12, verbose_name='Status')),
+                ('total_count', models.PositiveIntegerField(default=0, verbose_name='Total de notícias')),
+                ('success_count', models.PositiveIntegerField(default=0, verbose_name='Notícias criadas')),
+                ('error_count', models.PositiveIntegerField(default=0, verbose_name='Notícias com erro')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Tentativas')),
+                ('error', models.TextField(blank=True, verbose_name='Erro')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Criado em')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Iniciado em')),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True, verbose_name='Última atividade')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Finalizado em')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='upload_jobs', to=settings.AUTH_USER_MODEL, verbose_name='Usuário')),
+            ],
+            options={
+                'verbose_name': 'Job de upload',
+                'verbose_name_plural': 'Jobs de upload',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='UploadJobItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveIntegerField(verbose_name='Posição no arquivo')),
+                ('payload', models.JSONField(verbose_name='Item enviado')),
+                ('status', models.CharField(choices=[('pending', 'Pendente'), ('success', 'Sucesso'), ('error', 'Erro')], default='pending', max_length=10, verbose_name='Status')),
+                ('content_preview', models.CharField(blank=True, max_length=110, verbose_name='Prévia do conteúdo')),
+                ('title', models.CharField(blank=True, max_length=200, verbose_name='Título')),
+                ('message', models.TextField(blank=True, verbose_name='Mensagem')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Processado em')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='common.uploadjob', verbose_name='Job')),
+                ('news', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='common.news', verbose_name='Notícia')),
+            ],
+            options={
+                'verbose_name': 'Item de upload',
+                'verbose_name_plural': 'Itens de upload',
+                'ordering': ['job', 'index'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='uploadjob',
+            index=models.Index(fields=['status', 'heartbeat_at'], name='upload_job_status_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='uploadjobitem',
+            constraint=models.UniqueConstraint(fields=('job', 'index'), name='upload_job_item_unique_index'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('common', '0009_upload_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadjob',
+            name='refresh_llm_cache',
+            field=models.BooleanField(default=False, verbose_name='Refazer chamadas à IA'),
+        ),
+        migrations.CreateModel(
+            name='LLMCacheEntry',
+            fields=[
+                ('key', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='Chave')),
+                ('task', models.CharField(max_length=50, verbose_name='Tarefa')),
+                ('model', models.CharField(max_length=100, verbose_name='Modelo')),
+                ('prompt_version', models.CharField(max_length=20, verbose_name='Versão do prompt')),
+                ('response', models.JSONField(verbose_name='Resultado')),
+                ('hits', models.PositiveIntegerField(default=0, verbose_name='Acertos')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Criado em')),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True, verbose_name='Último acerto')),
+            ],
+            options={
+                'verbose_name': 'Resultado de IA em cache',
+                'verbose_name_plural': 'Resultados de IA em cache',
+                'indexes': [models.Index(fields=['created_at'], name='llm_cache_created_idx')],
+            },
+        ),
+    ]
@@ -1,9 +1,39 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.contrib.postgres.search import SearchVectorField
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
+from .search_index import get_search_index, search_index_enabled
+
+
+class CategoryQuerySet(models.QuerySet):
+    """QuerySet de categorias"""
+
+    def refresh_active_news_count(self):
+        """
+        Recalcula `active_news_count` a partir de common_news e marca as
+        categorias como alteradas (`news_version` e `updated_at`).
+
+        Necessário após operações que não disparam signals
+        (QuerySet.update, bulk_create, SQL bruto).
+        """
+        active_news = (
+            News.objects.filter(category=OuterRef('pk'), is_active=True)
+            .order_by()
+            .values('category')
+            .annotate(total=Count('pk'))
+            .values('total')
+        )
+        return self.update(
+            active_news_count=Coalesce(Subquery(active_news), 0),
+            news_version=F('news_version') + 1,
+            updated_at=Now()
+        )
+
 
 class Category(models.Model):
     """Categorias das notícias"""
@@ -11,6 +41,14 @@ class Category(models.Model):
     slug = models.SlugField(max_length=100, unique=True, verbose_name="Slug")
     description = models.TextField(blank=True, verbose_name="Descrição")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    # Também atualizado quando as notícias da categoria mudam (news_count faz parte da representação)
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+    # Contador denormalizado de notícias ativas, mantido pelos signals de News
+    active_news_count = models.PositiveIntegerField(default=0, editable=False, verbose_name="Notícias ativas")
+    # Incrementado a cada notícia incluída, alterada ou removida na categoria (validade do cache do feed)
+    news_version = models.PositiveBigIntegerField(default=0, editable=False, verbose_name="Versão das notícias")
+    
+    objects = CategoryQuerySet.as_manager()
     
     class Meta:
         verbose_name = "Categoria"
@@ -42,13 +80,54 @@ class News(models.Model):
     analysis_contexts = models.JSONField(null=True, blank=True, verbose_name="Contextos Identificados")
     analysis_timestamp = models.DateTimeField(null=True, blank=True, verbose_name="Timestamp da Análise")
     
+    # Busca textual (PostgreSQL): título (A), resumo (B) e conteúdo (C) com a
+    # configuração 'portuguese'. Mantido por trigger no banco, inclusive para
+    # inserções feitas fora do Django (curador). O trigger e o índice GIN
+    # (news_search_vector_idx) são criados na migração 0006, só no PostgreSQL.
+    search_vector = SearchVectorField(null=True, editable=False, verbose_name="Vetor de busca")
+    
     class Meta:
         verbose_name = "Notícia"
         verbose_name_plural = "Notícias"
         ordering = ['-published_at']
+        indexes = [
+            # Feed geral: is_active=True ordenado por -published_at (com id para desempate)
+            models.Index(
+                fields=['-published_at', '-id'],
+                condition=models.Q(is_active=True),
+                name='news_active_feed_idx',
+            ),
+            # Feed por preferências: category__in + published_at__gte
+            models.Index(
+                fields=['category', '-published_at'],
+                condition=models.Q(is_active=True),
+                name='news_active_cat_feed_idx',
+            ),
+            # Verificação de duplicatas do curador (WHERE title = %s)
+            models.Index(fields=['title'], name='news_title_idx'),
+            # Backfill de análise (analysis_timestamp IS NULL ordenado por created_at)
+            models.Index(
+                fields=['created_at'],
+                condition=models.Q(analysis_timestamp__isnull=True),
+                name='news_unanalyzed_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o estado persistido para ajustar o contador da categoria no save
+        instance._counted_state = instance._current_counted_state()
+        return instance
+    
+    def _current_counted_state(self):
+        """(category_id, is_active) atual, ou None se algum campo não foi carregado"""
+        if 'category_id' not in self.__dict__ or 'is_active' not in self.__dict__:
+            return None
+        return (self.category_id, self.is_active)
 
 
 class UserProfile(models.Model):
@@ -80,6 +159,207 @@ class UserProfile(models.Model):
         return self.user_type == 'reader'
 
 
+class UploadJob(models.Model):
+    """
+    Upload de arquivo JSON de notícias (upload_news_json), processado em
+    segundo plano pelos workers (manage.py process_upload_jobs).
+
+    `heartbeat_at` é renovado a cada notícia processada; um job em
+    processamento sem renovação por UPLOAD_JOB_LEASE_SECONDS é retomado por
+    outro worker a partir dos itens ainda pendentes.
+    """
+    STATUS_CHOICES = (
+        ('pending', 'Pendente'),
+        ('processing', 'Processando'),
+        ('completed', 'Concluído'),
+        ('failed', 'Falhou'),
+    )
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='upload_jobs', verbose_name="Usuário")
+    file_name = models.CharField(max_length=255, blank=True, verbose_name="Arquivo")
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+    total_count = models.PositiveIntegerField(default=0, verbose_name="Total de notícias")
+    success_count = models.PositiveIntegerField(default=0, verbose_name="Notícias criadas")
+    error_count = models.PositiveIntegerField(default=0, verbose_name="Notícias com erro")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Tentativas")
+    # Ignora o cache de resultados da OpenAI (common.llm_cache) e o regrava
+    refresh_llm_cache = models.BooleanField(default=False, verbose_name="Refazer chamadas à IA")
+    error = models.TextField(blank=True, verbose_name="Erro")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Criado em")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Iniciado em")
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name="Última atividade")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Finalizado em")
+
+    class Meta:
+        verbose_name = "Job de upload"
+        verbose_name_plural = "Jobs de upload"
+        ordering = ['-created_at']
+        indexes = [
+            # Jobs a retomar (pendentes ou com heartbeat vencido)
+            models.Index(fields=['status', 'heartbeat_at'], name='upload_job_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.file_name} ({self.get_status_display()})"
+
+    @property
+    def processed_count(self):
+        return self.success_count + self.error_count
+
+
+class UploadJobItem(models.Model):
+    """Notícia de um UploadJob, com o resultado do processamento"""
+    STATUS_CHOICES = (
+        ('pending', 'Pendente'),
+        ('success', 'Sucesso'),
+        ('error', 'Erro'),
+    )
+
+    job = models.ForeignKey(UploadJob, on_delete=models.CASCADE, related_name='items', verbose_name="Job")
+    index = models.PositiveIntegerField(verbose_name="Posição no arquivo")
+    payload = models.JSONField(verbose_name="Item enviado")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending', verbose_name="Status")
+    content_preview = models.CharField(max_length=110, blank=True, verbose_name="Prévia do conteúdo")
+    title = models.CharField(max_length=200, blank=True, verbose_name="Título")
+    # Preenchida na mesma transação que cria a notícia: na retomada, o item
+    # não cria uma segunda notícia
+    news = models.ForeignKey(
+        News, on_delete=models.SET_NULL, null=True, blank=True, related_name='+', verbose_name="Notícia"
+    )
+    message = models.TextField(blank=True, verbose_name="Mensagem")
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name="Processado em")
+
+    class Meta:
+        verbose_name = "Item de upload"
+        verbose_name_plural = "Itens de upload"
+        ordering = ['job', 'index']
+        constraints = [
+            models.UniqueConstraint(fields=['job', 'index'], name='upload_job_item_unique_index'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id}#{self.index} ({self.get_status_display()})"
+
+
+class LLMCacheEntry(models.Model):
+    """
+    Resultado de uma chamada à OpenAI, endereçado pelo conteúdo: a chave é o
+    hash do texto normalizado, da tarefa, do modelo e da versão do prompt
+    (common.llm_cache). Também é lido e gravado pelo curador.
+    """
+    key = models.CharField(max_length=64, primary_key=True, verbose_name="Chave")
+    task = models.CharField(max_length=50, verbose_name="Tarefa")
+    model = models.CharField(max_length=100, verbose_name="Modelo")
+    prompt_version = models.CharField(max_length=20, verbose_name="Versão do prompt")
+    response = models.JSONField(verbose_name="Resultado")
+    hits = models.PositiveIntegerField(default=0, verbose_name="Acertos")
+    created_at = models.DateTimeField(default=timezone.now, verbose_name="Criado em")
+    last_hit_at = models.DateTimeField(null=True, blank=True, verbose_name="Último acerto")
+
+    class Meta:
+        verbose_name = "Resultado de IA em cache"
+        verbose_name_plural = "Resultados de IA em cache"
+        indexes = [
+            # Expiração por LLM_CACHE_TIMEOUT
+            models.Index(fields=['created_at'], name='llm_cache_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} ({self.model}) {self.key[:12]}"
+
+
+def _touch_category(category_id, delta=0):
+    """Ajusta o contador da categoria e marca o feed dela como alterado"""
+    Category.objects.filter(pk=category_id).update(
+        active_news_count=F('active_news_count') + delta,
+        news_version=F('news_version') + 1,
+        updated_at=Now()
+    )
+
+
+# Campos de News que mudam Category.active_news_count
+COUNTED_FIELDS = frozenset({'category', 'category_id', 'is_active'})
+# Campos exibidos no feed (serializers.NEWS_LIST_VALUES) ou contados: saves que não
+# alteram nenhum deles (ex.: a análise) não tocam na categoria nem invalidam o feed
+FEED_VISIBLE_FIELDS = COUNTED_FIELDS | {
+    'title', 'summary', 'source', 'published_at', 'created_at', 'author', 'author_id'
+}
+
+
+# Signals para manter Category.active_news_count e Category.news_version
+@receiver(post_save, sender=News)
+def update_category_count_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Ajusta o contador quando a notícia é criada, recategorizada ou (des)ativada"""
+    if raw:
+        return
+    if update_fields is not None and not FEED_VISIBLE_FIELDS.intersection(update_fields):
+        return
+    
+    old_state = None if created else getattr(instance, '_counted_state', None)
+    new_state = instance._current_counted_state()
+    
+    if not created and old_state is None:
+        # Estado anterior desconhecido (campos adiados): recalcular a categoria atual
+        Category.objects.filter(pk=instance.category_id).refresh_active_news_count()
+    else:
+        old_category, old_active = old_state or (None, False)
+        new_category, new_active = new_state
+        if old_category is not None and old_category != new_category:
+            _touch_category(old_category, -1 if old_active else 0)
+            old_active = False
+        _touch_category(new_category, int(new_active) - int(old_active))
+    
+    instance._counted_state = new_state
+
+
+@receiver(post_delete, sender=News)
+def update_category_count_on_delete(sender, instance, **kwargs):
+    """Decrementa o contador quando uma notícia ativa é removida"""
+    state = getattr(instance, '_counted_state', None) or instance._current_counted_state()
+    if state:
+        _touch_category(state[0], -1 if state[1] else 0)
+
+
+# Campos de User exibidos no feed (author__* de serializers.NEWS_LIST_VALUES)
+AUTHOR_FEED_FIELDS = frozenset({'username', 'email', 'first_name', 'last_name', 'is_superuser'})
+
+
+@receiver(post_save, sender=User)
+def touch_author_categories_on_save(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Marca como alterado o feed das categorias com notícias do autor (ETag e cache do feed)"""
+    if raw or created:
+        return
+    if update_fields is not None and not AUTHOR_FEED_FIELDS.intersection(update_fields):
+        return
+    
+    Category.objects.filter(news__author=instance).update(news_version=F('news_version') + 1, updated_at=Now())
+
+
+# Signals para manter o índice BM25 embutido (apenas com NEWS_SEARCH_BACKEND = BM25SearchFilter)
+SEARCH_INDEXED_FIELDS = {'title', 'summary', 'content', 'is_active'}
+
+
+@receiver(post_save, sender=News)
+def update_search_index_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """Registra a notícia no journal do índice se algum campo indexado mudou"""
+    if raw or not search_index_enabled():
+        return
+    if update_fields is not None and not SEARCH_INDEXED_FIELDS.intersection(update_fields):
+        return
+    
+    index = get_search_index()
+    if instance.is_active:
+        index.record_upsert(instance)
+    else:
+        index.record_delete(instance.pk)
+
+
+@receiver(post_delete, sender=News)
+def update_search_index_on_delete(sender, instance, **kwargs):
+    if search_index_enabled():
+        get_search_index().record_delete(instance.pk)
+
+
 # Signal para criar automaticamente UserProfile quando um usuário é criado
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
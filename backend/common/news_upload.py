@@ -0,0 +1,221 @@
+"""
+Leitura incremental dos arquivos de upload de notícias (upload_news_json)
+
+O arquivo é lido uma única vez, em blocos, e cada notícia é validada e
+entregue assim que termina de ser lida (iter_upload_news): a memória usada
+não depende do tamanho do arquivo, só do tamanho de uma notícia
+(NEWS_UPLOAD_MAX_ITEM_CHARS). O conteúdo descomprimido e o número de
+notícias também são limitados (NEWS_UPLOAD_MAX_DECOMPRESSED_BYTES,
+NEWS_UPLOAD_MAX_ITEMS). Formatos aceitos, pela extensão:
+
+- .json: lista JSON de notícias;
+- .jsonl / .ndjson: uma notícia (objeto JSON) por linha;
+- qualquer um deles comprimido com gzip (.json.gz, .jsonl.gz, ...),
+  reconhecido também pelo conteúdo.
+
+Cada notícia é um objeto com o campo `noticia` (texto completo, mínimo de
+50 caracteres). Erros de formato levantam UploadFormatError com a mensagem
+para o usuário; como o job só é gravado ao fim da leitura (na mesma
+transação), um arquivo inválido não deixa job parcial.
+"""
+import gzip
+import io
+import json
+import zlib
+
+from django.conf import settings
+
+GZIP_MAGIC = b'\x1f\x8b'
+ARRAY_EXTENSIONS = ('.json',)
+LINES_EXTENSIONS = ('.jsonl', '.ndjson')
+UPLOAD_EXTENSIONS = tuple(
+    extension + suffix for extension in ARRAY_EXTENSIONS + LINES_EXTENSIONS for suffix in ('', '.gz')
+)
+MIN_NEWS_CHARS = 50
+READ_CHUNK_CHARS = 64 * 1024
+
+
+class UploadFormatError(ValueError):
+    """Arquivo de upload inválido; a mensagem é exibida ao usuário"""
+
+
+def is_upload_file_name(name):
+    return (name or '').lower().endswith(UPLOAD_EXTENSIONS)
+
+
+def validate_news_item(index, news_item):
+    """Valida a notícia `index` (a partir de 1) do arquivo"""
+    if not isinstance(news_item, dict):
+        raise UploadFormatError(f"Item {index}: deve ser um objeto JSON.")
+
+    # Verificar campo obrigatório 'noticia'
+    if 'noticia' not in news_item:
+        raise UploadFormatError(f"Item {index}: campo 'noticia' é obrigatório.")
+
+    noticia = news_item['noticia']
+    if not isinstance(noticia, str) or not noticia.strip():
+        raise UploadFormatError(f"Item {index}: campo 'noticia' não pode estar vazio.")
+
+    # Verificar se o conteúdo tem tamanho mínimo
+    if len(noticia.strip()) < MIN_NEWS_CHARS:
+        raise UploadFormatError(
+            f"Item {index}: conteúdo da notícia muito curto (mínimo {MIN_NEWS_CHARS} caracteres)."
+        )
+    return news_item
+
+
+class _JSONStream:
+    """Valores JSON consecutivos de um texto lido em blocos"""
+
+    def __init__(self, text, chunk_chars, max_value_chars):
+        self.text = text
+        self.chunk_chars = chunk_chars
+        self.max_value_chars = max_value_chars
+        self.decoder = json.JSONDecoder()
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        """Lê mais um bloco; False no fim do arquivo"""
+        if self.eof:
+            return False
+        chunk = self.text.read(self.chunk_chars)
+        if not chunk:
+            self.eof = True
+            return False
+        # Descarta o que já foi consumido: o buffer guarda no máximo um valor
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Próximo caractere que não é espaço (sem consumi-lo), ou '' no fim"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in ' \t\r\n':
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return ''
+
+    def consume(self, char):
+        if self.peek() != char:
+            return False
+        self.pos += 1
+        return True
+
+    def value(self, index):
+        """Decodifica o próximo valor (a notícia `index`)"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # Erro no fim do buffer (ou string aberta): valor incompleto,
+                # lê mais, até o limite de uma notícia
+                truncated = e.pos >= len(self.buffer) - 6 or e.msg.startswith('Unterminated string')
+                if not truncated:
+                    raise UploadFormatError(f"Arquivo JSON inválido (item {index}): {e.msg}.")
+                if len(self.buffer) - self.pos > self.max_value_chars:
+                    raise UploadFormatError(
+                        f"Item {index}: notícia maior que o limite de {self.max_value_chars} caracteres."
+                    )
+                if self._fill():
+                    continue
+                raise UploadFormatError(f"Arquivo JSON inválido (item {index}): {e.msg}.")
+            if end == len(self.buffer) and not self.eof and not isinstance(value, (dict, list, str)):
+                # Número ou literal no fim do buffer pode continuar no próximo bloco
+                if self._fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def _iter_array(stream):
+    if not stream.consume('['):
+        raise UploadFormatError("O arquivo JSON deve conter uma lista de notícias.")
+    index = 0
+    if not stream.consume(']'):
+        while True:
+            index += 1
+            yield validate_news_item(index, stream.value(index))
+            if stream.consume(','):
+                continue
+            if stream.consume(']'):
+                break
+            raise UploadFormatError(f"Arquivo JSON inválido (item {index}): esperado ',' ou ']'.")
+    if stream.peek():
+        raise UploadFormatError("Arquivo JSON inválido: conteúdo após o fim da lista.")
+    if index == 0:
+        raise UploadFormatError("O arquivo JSON não pode estar vazio.")
+
+
+def _iter_lines(stream):
+    index = 0
+    while stream.peek():
+        index += 1
+        yield validate_news_item(index, stream.value(index))
+    if index == 0:
+        raise UploadFormatError("O arquivo JSON não pode estar vazio.")
+
+
+def _open_text(file):
+    """Texto UTF-8 do arquivo, descomprimido se for gzip"""
+    file.seek(0)
+    compressed = file.read(2) == GZIP_MAGIC
+    file.seek(0)
+    binary = gzip.GzipFile(fileobj=file, mode='rb') if compressed else file
+    readable = _Readable(binary, settings.NEWS_UPLOAD_MAX_DECOMPRESSED_BYTES)
+    # utf-8-sig: aceita o BOM de editores do Windows
+    return io.TextIOWrapper(io.BufferedReader(readable), encoding='utf-8-sig')
+
+
+class _Readable(io.RawIOBase):
+    """
+    Adapta arquivos do Django (UploadedFile) e GzipFile ao io.BufferedReader,
+    com no máximo `max_bytes` lidos (descomprimidos)
+    """
+
+    def __init__(self, file, max_bytes):
+        self.file = file
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self.file.read(len(buffer))
+        self.bytes_read += len(data)
+        if self.bytes_read > self.max_bytes:
+            raise UploadFormatError(
+                f"Arquivo muito grande depois de descomprimido. Tamanho máximo: "
+                f"{self.max_bytes // (1024 * 1024)}MB."
+            )
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def iter_upload_news(file, file_name=None, chunk_chars=READ_CHUNK_CHARS):
+    """
+    Notícias validadas do arquivo de upload, uma a uma; levanta
+    UploadFormatError (possivelmente depois de entregar as anteriores) se o
+    arquivo for inválido
+    """
+    name = (file_name or getattr(file, 'name', '') or '').lower()
+    if name.endswith('.gz'):
+        name = name[:-3]
+    lines = name.endswith(LINES_EXTENSIONS)
+
+    stream = _JSONStream(_open_text(file), chunk_chars, settings.NEWS_UPLOAD_MAX_ITEM_CHARS)
+    max_items = settings.NEWS_UPLOAD_MAX_ITEMS
+    try:
+        for index, news_item in enumerate(_iter_lines(stream) if lines else _iter_array(stream), 1):
+            if index > max_items:
+                raise UploadFormatError(f"Arquivo com mais de {max_items} notícias.")
+            yield news_item
+    except UnicodeDecodeError:
+        raise UploadFormatError("Erro de codificação. Use UTF-8.")
+    except (OSError, EOFError, zlib.error) as e:
+        raise UploadFormatError(f"Arquivo gzip inválido: {e}")
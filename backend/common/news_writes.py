@@ -0,0 +1,180 @@
+"""
+Gravação em lote de campos de notícias já carregadas
+
+A análise de notícias e a auto-atribuição de categorias gravavam cada
+notícia com save(): um UPDATE (e os signals de News) por notícia, 100 mil
+idas ao banco em um backfill de 100 mil notícias. NewsUpdateBuffer acumula
+as instâncias alteradas e grava os campos de todas de uma vez:
+
+- bulk_update: um UPDATE ... CASE por BULK_UPDATE_BATCH_SIZE notícias;
+- no PostgreSQL, a partir de COPY_MIN_ROWS notícias: COPY das linhas para
+  uma tabela temporária e um único UPDATE ... FROM.
+
+Como QuerySet.update, essas gravações não disparam os signals de News: o
+buffer faz o que eles fariam. Campos auto_now (updated_at) recebem a hora
+da gravação, e as categorias das notícias gravadas (contador e
+news_version) são ajustadas com uma consulta por gravação, apenas se algum
+campo exibido no feed mudou (FEED_VISIBLE_FIELDS). Os campos gravados em
+lote não podem fazer parte do índice de busca (SEARCH_INDEXED_FIELDS),
+mantido pelos signals.
+
+Se a gravação em lote falhar, cada notícia é gravada com save() (e os
+signals); as que falharem ficam em `failed`, com o erro.
+"""
+import io
+import json
+import logging
+
+from django.db import connections, router, transaction
+from django.db.models import F, JSONField
+from django.db.models.functions import Now
+
+from .models import COUNTED_FIELDS, FEED_VISIBLE_FIELDS, SEARCH_INDEXED_FIELDS, Category, News
+
+logger = logging.getLogger(__name__)
+
+# Notícias por UPDATE do bulk_update (cada notícia acrescenta um CASE por campo)
+BULK_UPDATE_BATCH_SIZE = 500
+
+# A partir de quantas notícias o PostgreSQL grava com COPY + UPDATE ... FROM
+COPY_MIN_ROWS = 2000
+
+
+class NewsUpdateBuffer:
+    """
+    Notícias com `fields` alterados, gravadas em lote
+
+    Attributes:
+        written: Quantidade de notícias gravadas
+        failed: Lista de (notícia, erro) das notícias que não foram gravadas
+    """
+
+    def __init__(self, fields, flush_size=None):
+        """
+        Args:
+            fields: Campos de News a gravar
+            flush_size: Grava automaticamente ao acumular esse número de
+                notícias (None: apenas em flush())
+        """
+        if SEARCH_INDEXED_FIELDS.intersection(fields):
+            raise ValueError('Campos do índice de busca devem ser gravados com save()')
+        self.fields = list(fields)
+        self.flush_size = flush_size
+        self.pending = []
+        self.written = 0
+        self.failed = []
+
+    def add(self, news):
+        self.pending.append(news)
+        if self.flush_size and len(self.pending) >= self.flush_size:
+            self.flush()
+
+    def flush(self):
+        """Grava as notícias acumuladas"""
+        news_list, self.pending = self.pending, []
+        if not news_list:
+            return
+
+        # O que save() faria com os campos auto_now
+        auto_now_fields = [
+            field for field in (News._meta.get_field(name) for name in self.fields) if getattr(field, 'auto_now', False)
+        ]
+        for news in news_list:
+            for field in auto_now_fields:
+                field.pre_save(news, add=False)
+
+        db = router.db_for_write(News)
+        try:
+            with transaction.atomic(using=db):
+                if connections[db].vendor == 'postgresql' and len(news_list) >= COPY_MIN_ROWS:
+                    copy_update(news_list, self.fields, db)
+                else:
+                    News.objects.using(db).bulk_update(news_list, self.fields, batch_size=BULK_UPDATE_BATCH_SIZE)
+                self._touch_categories(news_list, db)
+        except Exception as e:
+            # Falha no lote: cada notícia é gravada (e falha) individualmente
+            logger.error(f"Erro na gravação em lote de {len(news_list)} notícias, gravando uma a uma: {e}")
+            self._save_each(news_list)
+            return
+
+        self.written += len(news_list)
+
+    def _touch_categories(self, news_list, db):
+        """O que os signals de News fariam: contador e versão das categorias"""
+        if not FEED_VISIBLE_FIELDS.intersection(self.fields):
+            return
+        categories = {news.category_id for news in news_list}
+        for news in news_list:
+            state = getattr(news, '_counted_state', None)
+            if state:
+                categories.add(state[0])
+            news._counted_state = news._current_counted_state()
+
+        queryset = Category.objects.using(db).filter(pk__in=categories)
+        if COUNTED_FIELDS.intersection(self.fields):
+            queryset.refresh_active_news_count()
+        else:
+            queryset.update(news_version=F('news_version') + 1, updated_at=Now())
+
+    def _save_each(self, news_list):
+        for news in news_list:
+            try:
+                with transaction.atomic(using=router.db_for_write(News)):
+                    news.save(update_fields=self.fields)
+                self.written += 1
+            except Exception as e:
+                logger.error(f"Erro ao gravar notícia {news.id}: {e}")
+                self.failed.append((news, e))
+
+
+def copy_update(news_list, fields, db):
+    """
+    Grava `fields` das notícias com COPY para uma tabela temporária e um
+    UPDATE ... FROM (PostgreSQL, dentro de uma transação)
+    """
+    connection = connections[db]
+    quote = connection.ops.quote_name
+    model_fields = [News._meta.get_field(name) for name in fields]
+    pk_column = quote(News._meta.pk.column)
+    columns = [quote(field.column) for field in model_fields]
+    table = quote(News._meta.db_table)
+
+    rows = io.StringIO()
+    for news in news_list:
+        values = [_copy_value(field, field.value_from_object(news)) for field in model_fields]
+        rows.write('\t'.join([str(news.pk), *values]) + '\n')
+    rows.seek(0)
+
+    with connection.cursor() as cursor:
+        # Mesmos tipos de coluna de common_news, sem as restrições
+        cursor.execute(
+            f"CREATE TEMP TABLE news_bulk_update AS SELECT {pk_column}, {', '.join(columns)} "
+            f"FROM {table} WITH NO DATA"
+        )
+        copy_sql = f"COPY news_bulk_update ({pk_column}, {', '.join(columns)}) FROM STDIN"
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):
+            # psycopg2
+            raw_cursor.copy_expert(copy_sql, rows)
+        else:
+            # psycopg 3
+            with raw_cursor.copy(copy_sql) as copy:
+                copy.write(rows.getvalue())
+        cursor.execute(
+            f"UPDATE {table} SET {', '.join(f'{column} = t.{column}' for column in columns)} "
+            f"FROM news_bulk_update t WHERE {table}.{pk_column} = t.{pk_column}"
+        )
+        cursor.execute("DROP TABLE news_bulk_update")
+
+
+def _copy_value(field, value):
+    """Valor no formato texto do COPY"""
+    if value is None:
+        return '\\N'
+    if isinstance(field, JSONField):
+        value = json.dumps(value, cls=field.encoder)
+    elif hasattr(value, 'isoformat'):
+        value = value.isoformat()
+    else:
+        value = str(value)
+    return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
@@ -0,0 +1,169 @@
+"""
+Paginação do feed de notícias
+"""
+import hashlib
+import json
+from base64 import b64decode, b64encode
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import InvalidPage
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class AsyncPageNumberPagination(PageNumberPagination):
+    """
+    PageNumberPagination com `apaginate_queryset`, usado pelas views
+    assíncronas de leitura (common.async_views): COUNT e página pelo ORM
+    assíncrono, mesma resposta do modo síncrono.
+    """
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count é uma cached_property: preenchida com o COUNT assíncrono
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            msg = self.invalid_page_message.format(
+                page_number=page_number, message=str(exc)
+            )
+            raise NotFound(msg)
+        self.page.object_list = [item async for item in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+
+        return list(self.page)
+
+
+class NewsFeedPagination(AsyncPageNumberPagination):
+    """
+    Paginação por número de página (padrão) com modo keyset opcional.
+
+    Com `?cursor=` (vazio na primeira página) o feed é paginado por
+    (published_at, id) decrescentes: sem OFFSET e sem COUNT(*) a cada
+    requisição. O cursor é opaco e continua válido quando novas notícias
+    são inseridas no topo do feed. O total (`count`) é aproximado: vem de
+    um cache de `count_cache_timeout` segundos por filtro.
+    """
+    cursor_query_param = 'cursor'
+    count_cache_timeout = 60
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.count = self.get_cached_count(queryset)
+        return self.set_cursor_page(list(self.get_cursor_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.cursor_query_param in request.query_params
+        if not self.cursor_mode:
+            return await super().apaginate_queryset(queryset, request, view)
+
+        self.count = await self.aget_cached_count(queryset)
+        page_queryset = self.get_cursor_page_queryset(queryset, request)
+        return self.set_cursor_page([item async for item in page_queryset])
+
+    def get_cursor_page_queryset(self, queryset, request):
+        """Itens após o cursor, mais um para saber se há próxima página"""
+        self.request = request
+        self.cursor_page_size = self.get_page_size(request)
+
+        position = self.decode_cursor(request.query_params[self.cursor_query_param])
+        queryset = queryset.order_by('-published_at', '-id')
+        if position is not None:
+            published_at, news_id = position
+            queryset = queryset.filter(
+                Q(published_at__lt=published_at) | Q(published_at=published_at, id__lt=news_id)
+            )
+        return queryset[:self.cursor_page_size + 1]
+
+    def set_cursor_page(self, results):
+        self.has_next = len(results) > self.cursor_page_size
+        self.page_results = results[:self.cursor_page_size]
+        return self.page_results
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+
+        return Response({
+            'count': self.count,
+            'next': self.get_next_cursor_link(),
+            'results': data,
+        })
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        last = self.page_results[-1]
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(last))
+
+    def encode_cursor(self, news):
+        # Instância de News ou linha de values()
+        if isinstance(news, dict):
+            published_at, news_id = news['published_at'], news['id']
+        else:
+            published_at, news_id = news.published_at, news.id
+        payload = json.dumps({'p': published_at.isoformat(), 'i': news_id})
+        return b64encode(payload.encode('utf-8')).decode('ascii')
+
+    def decode_cursor(self, encoded):
+        """Retorna (published_at, id) ou None para a primeira página"""
+        if not encoded:
+            return None
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii'), validate=True).decode('utf-8'))
+            published_at = parse_datetime(payload['p'])
+            news_id = int(payload['i'])
+        except (TypeError, ValueError, KeyError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if published_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return published_at, news_id
+
+    def get_cached_count(self, queryset):
+        """COUNT(*) do filtro atual, reaproveitado por count_cache_timeout segundos"""
+        key = self.get_count_cache_key(queryset)
+        if key is None:
+            return 0
+        count = cache.get(key)
+        if count is None:
+            count = queryset.order_by().count()
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    async def aget_cached_count(self, queryset):
+        key = self.get_count_cache_key(queryset)
+        if key is None:
+            return 0
+        count = await cache.aget(key)
+        if count is None:
+            count = await queryset.order_by().acount()
+            await cache.aset(key, count, self.count_cache_timeout)
+        return count
+
+    def get_count_cache_key(self, queryset):
+        """Chave do COUNT(*) do filtro, ou None quando o filtro é vazio"""
+        try:
+            sql = str(queryset.order_by().query)
+        except EmptyResultSet:
+            return None
+        return 'news_feed_count:' + hashlib.sha1(sql.encode('utf-8')).hexdigest()
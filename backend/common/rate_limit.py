@@ -0,0 +1,82 @@
+"""
+Limite de taxa das chamadas à API da OpenAI
+
+Um balde de tokens para requisições por minuto (LLM_REQUESTS_PER_MINUTE) e
+outro para tokens por minuto (LLM_TOKENS_PER_MINUTE), compartilhados por
+todas as threads do processo. Cada chamada reserva uma requisição e a sua
+estimativa de tokens (prompt + max_tokens, como a OpenAI contabiliza) e
+espera até que os dois baldes a cubram.
+
+Os limites valem por processo: com vários workers, divida o limite da conta
+entre eles.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+# Aproximação de caracteres por token (textos em português e inglês)
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages, max_tokens=0):
+    """Tokens contabilizados por uma chamada de chat: mensagens + max_tokens"""
+    return sum(len(message['content']) for message in messages) // CHARS_PER_TOKEN + max_tokens
+
+
+class TokenBucket:
+    """Balde de tokens com reabastecimento contínuo de `rate` por segundo, até `capacity`"""
+
+    def __init__(self, capacity, rate, now):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated = now
+
+    def reserve(self, amount, now):
+        """
+        Retira `amount` do balde e retorna os segundos até ele estar coberto.
+        O saldo pode ficar negativo: reservas seguintes esperam a dívida.
+        """
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        self.level -= amount
+        return max(0.0, -self.level / self.rate)
+
+
+class RateLimiter:
+    """Limite de requisições e de tokens por minuto (0 desativa cada um)"""
+
+    def __init__(self, requests_per_minute, tokens_per_minute, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.sleep = sleep
+        self._lock = threading.Lock()
+        now = clock()
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60, now) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60, now) if tokens_per_minute else None
+
+    def acquire(self, tokens=0):
+        """Reserva uma requisição com `tokens` tokens; retorna os segundos esperados"""
+        with self._lock:
+            now = self.clock()
+            wait = 0.0
+            if self.requests is not None:
+                wait = self.requests.reserve(1, now)
+            if self.tokens is not None:
+                wait = max(wait, self.tokens.reserve(tokens, now))
+        if wait:
+            self.sleep(wait)
+        return wait
+
+
+_llm_rate_limiter = None
+_llm_rate_limiter_lock = threading.Lock()
+
+
+def llm_rate_limiter():
+    """Limite de taxa compartilhado pelas chamadas à OpenAI do processo"""
+    global _llm_rate_limiter
+    with _llm_rate_limiter_lock:
+        if _llm_rate_limiter is None:
+            _llm_rate_limiter = RateLimiter(settings.LLM_REQUESTS_PER_MINUTE, settings.LLM_TOKENS_PER_MINUTE)
+        return _llm_rate_limiter
@@ -0,0 +1,47 @@
+"""
+Renderers da API: JSON via orjson e MessagePack (negociação por Accept)
+"""
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils import encoders
+
+# Tipos que o orjson não serializa (ou serializa em outro formato) passam pelo
+# encoder do DRF, para que a saída seja idêntica à do JSONRenderer padrão
+_drf_encoder = encoders.JSONEncoder()
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    JSONRenderer com orjson: mesma saída compacta em UTF-8, serializada em C.
+
+    Com indentação pedida (`Accept: application/json; indent=4` ou API
+    navegável) usa o JSONRenderer padrão.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(data, default=_drf_encoder.default, option=ORJSON_OPTIONS)
+        # Mesmo escape do JSONRenderer para \u2028 e \u2029 (subconjunto estrito de JavaScript)
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """Renderer MessagePack (`Accept: application/msgpack` ou `?format=msgpack`)"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_drf_encoder.default)
@@ -0,0 +1,435 @@
+"""
+Índice invertido BM25 embutido para a busca de notícias
+
+Alternativa ao full-text search do PostgreSQL (ver NEWS_SEARCH_BACKEND).
+O índice tem duas partes:
+
+- Segmento base: arquivo imutável gerado por `manage.py build_search_index`.
+  Postings em arrays compactos (uint32) lidos via mmap, de modo que os
+  workers do gunicorn compartilham as mesmas páginas do page cache.
+- Journal: arquivo append-only (JSON por linha) escrito pelos signals de
+  save/delete de News. Cada worker aplica as linhas novas sobre o segmento
+  base em memória (postings delta + tombstones) antes de cada busca.
+
+Notícias inseridas sem passar pelos signals (o curador grava com SQL
+bruto) não têm linha no journal: antes de cada busca, catch_up() indexa em
+memória as notícias ativas com id maior que o último id já lido do banco
+(o do segmento base, ou o da última chamada).
+
+Rebuilds rotacionam o journal antes de ler as notícias e trocam o arquivo
+base de forma atômica (os.replace): o journal novo guarda apenas as linhas
+escritas durante e depois do rebuild.
+"""
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import unicodedata
+from array import array
+from collections import Counter, defaultdict
+from functools import cached_property
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'NBM25v1\0'
+PREAMBLE = struct.Struct('<8sQ')
+
+# Peso de cada campo (repetição de termos, BM25F simplificado)
+FIELD_WEIGHTS = (('title', 3), ('summary', 2), ('content', 1))
+
+STOPWORDS = frozenset("""
+    a ao aos as com como da das de do dos e em entre era essa esse esta este
+    foi for ha isso isto ja mais mas na nas no nos o os ou para pela pelas pelo
+    pelos por que se sem ser seu sua suas seus so sao tem um uma umas uns
+""".split())
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Minúsculas, sem acentos, sem stopwords e termos de uma letra"""
+    if not text:
+        return []
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return [token for token in TOKEN_RE.findall(text) if len(token) > 1 and token not in STOPWORDS]
+
+
+def document_terms(title, summary, content):
+    """Frequências ponderadas por campo de uma notícia"""
+    fields = {'title': title, 'summary': summary, 'content': content}
+    frequencies = Counter()
+    for field, weight in FIELD_WEIGHTS:
+        for token in tokenize(fields[field]):
+            frequencies[token] += weight
+    return frequencies
+
+
+def write_segment(path, documents):
+    """
+    Grava o segmento base em `path` (atomicamente).
+
+    `documents` é um iterável de (news_id, title, summary, content).
+    """
+    doc_ids = array('q')
+    doc_lens = array('I')
+    postings = defaultdict(lambda: (array('I'), array('I')))
+
+    for doc_index, (news_id, title, summary, content) in enumerate(documents):
+        frequencies = document_terms(title, summary, content)
+        doc_ids.append(news_id)
+        doc_lens.append(sum(frequencies.values()))
+        for term, frequency in frequencies.items():
+            term_docs, term_tfs = postings[term]
+            term_docs.append(doc_index)
+            term_tfs.append(frequency)
+
+    post_docs = array('I')
+    post_tfs = array('I')
+    terms = {}
+    for term in sorted(postings):
+        term_docs, term_tfs = postings[term]
+        terms[term] = [len(post_docs), len(term_docs)]
+        post_docs.extend(term_docs)
+        post_tfs.extend(term_tfs)
+
+    header = json.dumps({
+        'byteorder': sys.byteorder,
+        'doc_count': len(doc_ids),
+        'total_len': sum(doc_lens),
+        'postings_count': len(post_docs),
+        'terms': terms,
+    }, separators=(',', ':')).encode('utf-8')
+    # Seções seguintes alinhadas em 8 bytes
+    header += b' ' * (-(PREAMBLE.size + len(header)) % 8)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(PREAMBLE.pack(MAGIC, len(header)))
+        f.write(header)
+        doc_ids.tofile(f)
+        doc_lens.tofile(f)
+        if len(doc_lens) % 2:
+            f.write(b'\0' * 4)
+        post_docs.tofile(f)
+        post_tfs.tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return len(doc_ids)
+
+
+class Segment:
+    """Segmento base somente leitura, mapeado em memória"""
+
+    def __init__(self, path):
+        self.terms = {}
+        self.doc_count = 0
+        self.total_len = 0
+        self._mmap = None
+        self.doc_ids = self.doc_lens = self.post_docs = self.post_tfs = ()
+
+        with open(path, 'rb') as f:
+            stat = os.fstat(f.fileno())
+            self.signature = (stat.st_ino, stat.st_mtime_ns)
+            if stat.st_size == 0:
+                return
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, header_len = PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise ValueError(f'{path} não é um índice BM25')
+        offset = PREAMBLE.size
+        header = json.loads(bytes(self._mmap[offset:offset + header_len]))
+        if header['byteorder'] != sys.byteorder:
+            raise ValueError(f'{path} foi gerado em outra arquitetura')
+        offset += header_len
+
+        self.terms = header['terms']
+        self.doc_count = header['doc_count']
+        self.total_len = header['total_len']
+        postings_count = header['postings_count']
+
+        view = memoryview(self._mmap)
+        self.doc_ids = view[offset:offset + 8 * self.doc_count].cast('q')
+        offset += 8 * self.doc_count
+        self.doc_lens = view[offset:offset + 4 * self.doc_count].cast('I')
+        offset += 4 * (self.doc_count + self.doc_count % 2)
+        self.post_docs = view[offset:offset + 4 * postings_count].cast('I')
+        offset += 4 * postings_count
+        self.post_tfs = view[offset:offset + 4 * postings_count].cast('I')
+
+    @cached_property
+    def positions(self):
+        """doc_index de cada news_id do segmento"""
+        return {news_id: doc_index for doc_index, news_id in enumerate(self.doc_ids)}
+
+    def postings(self, term):
+        """Pares (doc_index, tf) do termo"""
+        entry = self.terms.get(term)
+        if entry is None:
+            return ()
+        start, df = entry
+        return zip(self.post_docs[start:start + df], self.post_tfs[start:start + df])
+
+
+class NewsSearchIndex:
+    """
+    Índice BM25 de um processo: segmento base (mmap) + alterações do journal.
+
+    A busca é disjuntiva (qualquer termo) e ordenada por score BM25.
+    """
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.journal_path = self.path + '.journal'
+        # Journal anterior durante um rebuild (até a troca do segmento base)
+        self.rotated_journal_path = self.path + '.journal.rotated'
+        self._lock = threading.Lock()
+        self._segment = None
+        self._journal_signature = None
+        self._journal_offset = 0
+        self._reset_delta()
+
+    def _reset_delta(self):
+        self._deleted = set()
+        self._delta_docs = {}
+        self._delta_postings = defaultdict(dict)
+        self._delta_len = 0
+        # Documentos do segmento base substituídos ou removidos pelo journal
+        self._deleted_base_count = 0
+        self._deleted_base_len = 0
+        # Maior id de notícia lido do banco: o do segmento base ou o de catch_up
+        segment = self._segment
+        self._last_id = segment.doc_ids[-1] if segment and segment.doc_count else 0
+
+    # Escrita (signals e rebuild)
+
+    def record_upsert(self, news, using=None):
+        """Registra a versão atual da notícia no journal após o commit"""
+        frequencies = document_terms(news.title, news.summary, news.content)
+        entry = {'op': 'upsert', 'id': news.pk, 'tf': frequencies}
+        transaction.on_commit(lambda: self._append(entry), using=using)
+
+    def record_delete(self, news_id, using=None):
+        entry = {'op': 'delete', 'id': news_id}
+        transaction.on_commit(lambda: self._append(entry), using=using)
+
+    def _append(self, entry):
+        os.makedirs(os.path.dirname(self.journal_path) or '.', exist_ok=True)
+        line = (json.dumps(entry, separators=(',', ':')) + '\n').encode('utf-8')
+        # Uma única escrita com O_APPEND: linhas de workers diferentes não se intercalam
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+        finally:
+            os.close(fd)
+
+    def rebuild(self, documents):
+        """
+        Regrava o segmento base e descarta do journal o que ele já contém.
+
+        `documents` deve ser lido do banco durante a chamada (iterável
+        preguiçoso, como indexed_documents()): o journal é rotacionado antes,
+        e as linhas dele (escritas após o commit) já estão no banco lido.
+        """
+        try:
+            os.replace(self.journal_path, self.rotated_journal_path)
+        except FileNotFoundError:
+            pass
+        # As linhas escritas a partir daqui vão para o journal novo e são mantidas
+        os.close(os.open(self.journal_path, os.O_WRONLY | os.O_CREAT, 0o644))
+
+        count = write_segment(self.path, documents)
+
+        try:
+            os.remove(self.rotated_journal_path)
+        except FileNotFoundError:
+            pass
+        return count
+
+    # Leitura
+
+    def refresh(self):
+        """Recarrega o segmento base se ele mudou e aplica as linhas novas do journal"""
+        with self._lock:
+            self._refresh()
+
+    def _refresh(self):
+        try:
+            stat = os.stat(self.path)
+            segment_signature = (stat.st_ino, stat.st_mtime_ns)
+        except FileNotFoundError:
+            segment_signature = None
+
+        current = self._segment.signature if self._segment else None
+        if segment_signature != current:
+            self._segment = Segment(self.path) if segment_signature else None
+            self._journal_signature = None
+
+        journal_signature = (self._inode(self.rotated_journal_path), self._inode(self.journal_path))
+        if journal_signature != self._journal_signature:
+            self._reset_delta()
+            self._journal_signature = journal_signature
+            self._journal_offset = 0
+            # Rebuild em andamento: o journal rotacionado ainda não está no segmento base
+            if journal_signature[0] is not None:
+                self._replay_journal(self.rotated_journal_path, 0)
+        if journal_signature[1] is not None:
+            self._journal_offset = self._replay_journal(self.journal_path, self._journal_offset)
+
+    @staticmethod
+    def _inode(path):
+        try:
+            return os.stat(path).st_ino
+        except FileNotFoundError:
+            return None
+
+    def _replay_journal(self, path, offset):
+        """Aplica as linhas de `path` a partir de `offset`; retorna o novo offset"""
+        try:
+            with open(path, 'rb') as f:
+                f.seek(offset)
+                data = f.read()
+        except FileNotFoundError:
+            return offset
+        # Ignorar uma linha final incompleta (escrita em andamento)
+        end = data.rfind(b'\n') + 1
+        for line in data[:end].splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning('Linha inválida no journal do índice de busca: %r', line[:100])
+                continue
+            self._apply(entry)
+        return offset + end
+
+    def _apply(self, entry):
+        news_id = entry['id']
+        if news_id not in self._deleted:
+            self._deleted.add(news_id)
+            doc_index = self._segment.positions.get(news_id) if self._segment else None
+            if doc_index is not None:
+                self._deleted_base_count += 1
+                self._deleted_base_len += self._segment.doc_lens[doc_index]
+        previous = self._delta_docs.pop(news_id, None)
+        if previous is not None:
+            self._delta_len -= previous[0]
+            for term in previous[1]:
+                self._delta_postings[term].pop(news_id, None)
+
+        if entry['op'] == 'upsert':
+            frequencies = entry['tf']
+            length = sum(frequencies.values())
+            self._delta_docs[news_id] = (length, list(frequencies))
+            self._delta_len += length
+            for term, frequency in frequencies.items():
+                self._delta_postings[term][news_id] = frequency
+
+    def catch_up(self, load_documents):
+        """
+        Indexa em memória as notícias criadas sem linha no journal (SQL bruto).
+
+        `load_documents(last_id)` retorna as notícias ativas com id maior que
+        `last_id`, em ordem de id e no formato de write_segment (como
+        indexed_documents). Sem segmento base não há nada a complementar:
+        o índice ainda não foi gerado.
+        """
+        with self._lock:
+            self._refresh()
+            if self._segment is None:
+                return
+            for news_id, title, summary, content in load_documents(self._last_id):
+                self._apply({'op': 'upsert', 'id': news_id, 'tf': document_terms(title, summary, content)})
+                self._last_id = news_id
+
+    def search(self, query, limit=1000):
+        """Lista de (news_id, score) em ordem decrescente de relevância"""
+        terms = set(tokenize(query))
+        if not terms:
+            return []
+
+        # A pontuação lê o delta: sob o lock, para não concorrer com o _apply de outra thread
+        with self._lock:
+            self._refresh()
+            return self._score(terms, limit)
+
+    def _score(self, terms, limit):
+        segment = self._segment
+        # Documentos do segmento base substituídos ou removidos não entram nas estatísticas
+        base_docs = (segment.doc_count if segment else 0) - self._deleted_base_count
+        base_len = (segment.total_len if segment else 0) - self._deleted_base_len
+        doc_count = base_docs + len(self._delta_docs)
+        if not doc_count:
+            return []
+        avg_len = (base_len + self._delta_len) / doc_count
+
+        scores = defaultdict(float)
+        for term in terms:
+            base = []
+            if segment and term in segment.terms:
+                base = [
+                    (segment.doc_ids[doc_index], tf, segment.doc_lens[doc_index])
+                    for doc_index, tf in segment.postings(term)
+                    if segment.doc_ids[doc_index] not in self._deleted
+                ]
+            delta = self._delta_postings.get(term, {})
+            df = len(base) + len(delta)
+            if not df:
+                continue
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+
+            for news_id, tf, doc_len in base:
+                scores[news_id] += idf * self._term_weight(tf, doc_len, avg_len)
+            for news_id, tf in delta.items():
+                scores[news_id] += idf * self._term_weight(tf, self._delta_docs[news_id][0], avg_len)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return ranked[:limit] if limit else ranked
+
+    def _term_weight(self, tf, doc_len, avg_len):
+        return tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * doc_len / avg_len))
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_search_index(path=None):
+    """Índice do processo para `path` (padrão: settings.NEWS_SEARCH_INDEX_PATH)"""
+    path = str(path or settings.NEWS_SEARCH_INDEX_PATH)
+    with _indexes_lock:
+        index = _indexes.get(path)
+        if index is None:
+            index = _indexes[path] = NewsSearchIndex(path)
+        return index
+
+
+def search_index_enabled():
+    """True quando o feed usa o índice BM25 (settings.NEWS_SEARCH_BACKEND)"""
+    from .filters import BM25SearchFilter, get_news_search_backend
+
+    return issubclass(get_news_search_backend(), BM25SearchFilter)
+
+
+def indexed_documents(after_id=0):
+    """Notícias ativas (com id maior que `after_id`) no formato esperado por write_segment"""
+    from .models import News
+
+    return (
+        News.objects.filter(is_active=True, id__gt=after_id)
+        .order_by('id')
+        .values_list('id', 'title', 'summary', 'content')
+        .iterator(chunk_size=2000)
+    )
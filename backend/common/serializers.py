@@ -1,19 +1,18 @@
-from rest_framework import serializers
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from django.conf import settings
 from django.contrib.auth.models import User
-from .models import News, Category, UserProfile
+from .models import News, Category, UserProfile, UploadJob, UploadJobItem
 
 
 class CategorySerializer(serializers.ModelSerializer):
     """Serializer para Category"""
-    news_count = serializers.SerializerMethodField()
+    news_count = serializers.IntegerField(source='active_news_count', read_only=True)
     
     class Meta:
         model = Category
         fields = ['id', 'name', 'slug', 'description', 'created_at', 'news_count']
         read_only_fields = ['id', 'created_at', 'news_count']
-    
-    def get_news_count(self, obj):
-        return obj.news.filter(is_active=True).count()
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -102,6 +101,79 @@ class NewsListSerializer(serializers.ModelSerializer):
         read_only_fields = ['id', 'author', 'created_at']
 
 
+# Caminho rápido de NewsListSerializer para as listagens somente leitura:
+# linhas planas de values() (com os JOINs de categoria e autor) montadas
+# direto em dicionários, com os mesmos campos, ordem e formatos
+NEWS_LIST_VALUES = (
+    'id', 'title', 'summary', 'source', 'published_at', 'created_at',
+    'category_id', 'category__name', 'category__slug', 'category__description',
+    'category__created_at', 'category__active_news_count',
+    'author_id', 'author__username', 'author__email', 'author__first_name',
+    'author__last_name', 'author__is_superuser',
+)
+
+
+def _datetime_formatter():
+    """
+    Equivalente a DateTimeField().to_representation, com o fuso e o formato
+    resolvidos uma única vez (por chamada de news_list_rows, não por valor).
+    """
+    field = serializers.DateTimeField()
+    output_timezone = field.default_timezone()
+    if output_timezone is None or getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() != ISO_8601:
+        return field.to_representation
+
+    def format_datetime(value):
+        if not value:
+            return None
+        value = value.astimezone(output_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return format_datetime
+
+
+def news_list_rows(rows):
+    """Representação de NewsListSerializer(many=True) para linhas de values(*NEWS_LIST_VALUES)"""
+    format_datetime = _datetime_formatter()
+    # Categorias e autores se repetem na página: cada um é montado uma única vez
+    categories = {}
+    authors = {}
+    result = []
+    for row in rows:
+        category = categories.get(row['category_id'])
+        if category is None:
+            category = categories[row['category_id']] = {
+                'id': row['category_id'],
+                'name': row['category__name'],
+                'slug': row['category__slug'],
+                'description': row['category__description'],
+                'created_at': format_datetime(row['category__created_at']),
+                'news_count': row['category__active_news_count'],
+            }
+        author = authors.get(row['author_id'])
+        if author is None:
+            author = authors[row['author_id']] = {
+                'id': row['author_id'],
+                'username': row['author__username'],
+                'email': row['author__email'],
+                'first_name': row['author__first_name'],
+                'last_name': row['author__last_name'],
+                'is_superuser': bool(row['author__is_superuser']),
+            }
+        result.append({
+            'id': row['id'],
+            'title': row['title'],
+            'summary': row['summary'],
+            'source': row['source'],
+            'category': category,
+            'author': author,
+            'published_at': format_datetime(row['published_at']),
+            'created_at': format_datetime(row['created_at']),
+        })
+    return result
+
+
 class NewsDetailSerializer(serializers.ModelSerializer):
     """Serializer para detalhes completos da notícia"""
     category = CategorySerializer(read_only=True)
@@ -170,54 +242,53 @@ class NewsCreateUpdateSerializer(serializers.ModelSerializer):
 
 
 class NewsUploadSerializer(serializers.Serializer):
-    """Serializer para upload de arquivo JSON com notícias no novo formato simplificado"""
+    """
+    Serializer para upload de arquivo de notícias (lista JSON ou JSONL,
+    opcionalmente com gzip). O conteúdo é validado durante a leitura
+    incremental, na criação do job (common.news_upload).
+    """
     file = serializers.FileField()
+    # Refaz as chamadas à IA em vez de usar o cache (common.llm_cache)
+    refresh_llm_cache = serializers.BooleanField(required=False, default=False)
     
     def validate_file(self, value):
-        """Valida o arquivo JSON enviado no novo formato"""
-        # Verificar extensão do arquivo
-        if not value.name.endswith('.json'):
-            raise serializers.ValidationError("Apenas arquivos JSON são permitidos.")
+        """Valida extensão e tamanho do arquivo enviado"""
+        from .news_upload import is_upload_file_name
         
-        # Verificar tamanho do arquivo (máximo 10MB)
-        if value.size > 10 * 1024 * 1024:
-            raise serializers.ValidationError("Arquivo muito grande. Tamanho máximo: 10MB.")
+        # Verificar extensão do arquivo
+        if not is_upload_file_name(value.name):
+            raise serializers.ValidationError(
+                "Apenas arquivos JSON (.json) ou JSONL (.jsonl, .ndjson), opcionalmente com gzip (.gz), "
+                "são permitidos."
+            )
         
-        # Tentar fazer parse do JSON
-        try:
-            import json
-            content = value.read()
-            value.seek(0)  # Reset file pointer
-            data = json.loads(content.decode('utf-8'))
-            
-            # Verificar se é uma lista
-            if not isinstance(data, list):
-                raise serializers.ValidationError("O arquivo JSON deve conter uma lista de notícias.")
-            
-            # Verificar se não está vazio
-            if len(data) == 0:
-                raise serializers.ValidationError("O arquivo JSON não pode estar vazio.")
-            
-            # Validar estrutura básica de cada notícia no novo formato
-            for i, news_item in enumerate(data):
-                if not isinstance(news_item, dict):
-                    raise serializers.ValidationError(f"Item {i+1}: deve ser um objeto JSON.")
-                
-                # Verificar campo obrigatório 'noticia'
-                if 'noticia' not in news_item:
-                    raise serializers.ValidationError(f"Item {i+1}: campo 'noticia' é obrigatório.")
-                
-                # Verificar se o campo 'noticia' não está vazio
-                if not news_item['noticia'] or not news_item['noticia'].strip():
-                    raise serializers.ValidationError(f"Item {i+1}: campo 'noticia' não pode estar vazio.")
-                
-                # Verificar se o conteúdo tem tamanho mínimo
-                if len(news_item['noticia'].strip()) < 50:
-                    raise serializers.ValidationError(f"Item {i+1}: conteúdo da notícia muito curto (mínimo 50 caracteres).")
-            
-        except json.JSONDecodeError as e:
-            raise serializers.ValidationError(f"Arquivo JSON inválido: {str(e)}")
-        except UnicodeDecodeError:
-            raise serializers.ValidationError("Erro de codificação. Use UTF-8.")
+        # Verificar tamanho do arquivo
+        max_bytes = settings.NEWS_UPLOAD_MAX_BYTES
+        if value.size > max_bytes:
+            raise serializers.ValidationError(
+                f"Arquivo muito grande. Tamanho máximo: {max_bytes // (1024 * 1024)}MB."
+            )
         
-        return value
\ No newline at end of file
+        return value
+
+class UploadJobItemSerializer(serializers.ModelSerializer):
+    """Resultado de uma notícia do upload"""
+    news_id = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = UploadJobItem
+        fields = ['index', 'status', 'title', 'content_preview', 'message', 'news_id', 'processed_at']
+
+
+class UploadJobSerializer(serializers.ModelSerializer):
+    """Situação de um job de upload, com o resultado de cada notícia"""
+    processed_count = serializers.IntegerField(read_only=True)
+    results = UploadJobItemSerializer(source='items', many=True, read_only=True)
+
+    class Meta:
+        model = UploadJob
+        fields = [
+            'id', 'file_name', 'status', 'total_count', 'processed_count', 'success_count',
+            'error_count', 'attempts', 'refresh_llm_cache', 'error', 'created_at', 'started_at', 'finished_at',
+            'results',
+        ]
@@ -1,15 +1,173 @@
 """
 Serviços para análise de notícias
 """
+import json
 import os
-import re
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
+from django.conf import settings
 from django.utils import timezone
 
+from .batch_analysis import BatchTermEngine
+from .documents import AnalyzedDocument
+from .entities import EntityMatcher
+from .keyword_automaton import KeywordAutomaton
+from .llm_cache import llm_cache
+from .llm_gateway import get_llm_gateway
+from .rate_limit import CHARS_PER_TOKEN
+
 logger = logging.getLogger(__name__)
 
+# Versões dos prompts da OpenAI, parte da chave do cache (common.llm_cache):
+# incrementar ao alterar o prompt ou o tratamento da resposta da tarefa
+EXTRACTION_PROMPT_VERSION = 1
+CLASSIFICATION_PROMPT_VERSION = 1
+BATCH_PROMPT_VERSION = 1
+
+# Tipos de entidade gravados em News.entities (sem datas)
+ENTITY_TYPES = ('pessoa', 'organizacao', 'local', 'valor_monetario', 'porcentagem')
+
+
+# Palavras-chave de contexto (EntityExtractor.identify_context)
+CONTEXT_KEYWORDS = {
+    'economia': ['economia', 'mercado', 'bolsa', 'investimento', 'pib', 'inflação'],
+    'politica': ['governo', 'presidente', 'ministro', 'deputado', 'eleição'],
+    'tecnologia': ['tecnologia', 'internet', 'software', 'digital', 'inovação'],
+    'saude': ['saúde', 'hospital', 'médico', 'doença', 'tratamento', 'vacina'],
+    'esportes': ['futebol', 'basquete', 'olimpíadas', 'copa', 'campeonato'],
+    'educacao': ['educação', 'escola', 'universidade', 'professor', 'ensino']
+}
+
+# Palavras-chave de cada categoria (CategoryClassifier): primárias com peso 2, secundárias com peso 1
+CATEGORY_KEYWORDS = {
+    'Tecnologia': {
+        'primary': [
+            'tecnologia', 'software', 'hardware', 'internet', 'digital', 'computador',
+            'smartphone', 'aplicativo', 'app', 'inteligência artificial', 'ia', 'machine learning',
+            'blockchain', 'criptomoeda', 'bitcoin', 'startup', 'inovação', 'tech',
+            'programação', 'desenvolvimento', 'código', 'sistema', 'plataforma',
+            'google', 'apple', 'microsoft', 'facebook', 'meta', 'amazon', 'netflix'
+        ],
+        'secondary': [
+            'dados', 'nuvem', 'cloud', 'segurança', 'cyber', 'robô', 'automação',
+            'virtual', 'realidade', 'gaming', 'game', 'eletrônico', 'chip'
+        ]
+    },
+    'Economia': {
+        'primary': [
+            'economia', 'mercado', 'bolsa', 'ações', 'investimento', 'financeiro',
+            'banco', 'dinheiro', 'real', 'dólar', 'moeda', 'inflação', 'pib',
+            'juros', 'taxa', 'selic', 'ipca', 'economia', 'empresas', 'negócios',
+            'lucro', 'prejuízo', 'receita', 'faturamento', 'vendas'
+        ],
+        'secondary': [
+            'comércio', 'varejo', 'indústria', 'setor', 'crescimento', 'recessão',
+            'crise', 'recuperação', 'exportação', 'importação', 'balança'
+        ]
+    },
+    'Política': {
+        'primary': [
+            'política', 'governo', 'presidente', 'ministro', 'deputado', 'senador',
+            'congresso', 'senado', 'câmara', 'eleição', 'voto', 'partido',
+            'democracia', 'lei', 'projeto', 'reforma', 'constituição',
+            'brasília', 'planalto', 'palácio', 'supremo', 'stf'
+        ],
+        'secondary': [
+            'municipal', 'estadual', 'federal', 'prefeito', 'governador',
+            'política', 'campanha', 'candidato', 'coligação', 'aliança'
+        ]
+    },
+    'Esportes': {
+        'primary': [
+            'futebol', 'basquete', 'vôlei', 'tênis', 'natação', 'atletismo',
+            'olimpíadas', 'copa', 'mundial', 'campeonato', 'jogo', 'partida',
+            'time', 'clube', 'jogador', 'atleta', 'técnico', 'treinador',
+            'gol', 'vitória', 'derrota', 'empate', 'resultado'
+        ],
+        'secondary': [
+            'estádio', 'arena', 'ginásio', 'campo', 'quadra', 'piscina',
+            'medalha', 'troféu', 'prêmio', 'recorde', 'performance'
+        ]
+    },
+    'Saúde': {
+        'primary': [
+            'saúde', 'medicina', 'médico', 'hospital', 'clínica', 'paciente',
+            'doença', 'tratamento', 'cura', 'remédio', 'medicamento',
+            'vacina', 'vacinação', 'epidemia', 'pandemia', 'vírus',
+            'covid', 'coronavirus', 'sus', 'ministério da saúde'
+        ],
+        'secondary': [
+            'sintoma', 'diagnóstico', 'exame', 'cirurgia', 'terapia',
+            'prevenção', 'cuidado', 'bem-estar', 'qualidade de vida'
+        ]
+    },
+    'Educação': {
+        'primary': [
+            'educação', 'escola', 'universidade', 'faculdade', 'ensino',
+            'professor', 'aluno', 'estudante', 'curso', 'aula',
+            'mec', 'ministério da educação', 'enem', 'vestibular',
+            'graduação', 'pós-graduação', 'mestrado', 'doutorado'
+        ],
+        'secondary': [
+            'aprendizagem', 'conhecimento', 'pesquisa', 'ciência',
+            'bolsa', 'financiamento', 'fies', 'prouni', 'sisu'
+        ]
+    },
+    'Entretenimento': {
+        'primary': [
+            'entretenimento', 'cinema', 'filme', 'série', 'tv', 'televisão',
+            'música', 'cantor', 'banda', 'show', 'concerto', 'festival',
+            'teatro', 'peça', 'ator', 'atriz', 'artista', 'celebridade',
+            'famoso', 'netflix', 'globo', 'sbt', 'record'
+        ],
+        'secondary': [
+            'cultura', 'arte', 'livro', 'autor', 'escritor', 'literatura',
+            'exposição', 'museu', 'galeria', 'evento', 'lançamento'
+        ]
+    },
+    'Ciência': {
+        'primary': [
+            'ciência', 'pesquisa', 'estudo', 'descoberta', 'experimento',
+            'cientista', 'pesquisador', 'laboratório', 'universidade',
+            'cnpq', 'fapesp', 'capes', 'nasa', 'espaço', 'astronomia',
+            'física', 'química', 'biologia', 'matemática'
+        ],
+        'secondary': [
+            'inovação', 'tecnologia', 'desenvolvimento', 'teoria',
+            'método', 'análise', 'resultado', 'conclusão', 'hipótese'
+        ]
+    }
+}
+
+# Palavras-chave das categorias fixas (fallback do AINewsClassifier)
+FIXED_CATEGORY_KEYWORDS = {
+    'Tecnologia': ['tecnologia', 'software', 'app', 'digital', 'internet', 'ia', 'inteligência artificial', 'startup', 'inovação'],
+    'Política': ['política', 'governo', 'eleição', 'presidente', 'ministro', 'congresso', 'senado', 'deputado'],
+    'Economia': ['economia', 'mercado', 'bolsa', 'investimento', 'banco', 'dinheiro', 'inflação', 'pib', 'juros'],
+    'Esportes': ['futebol', 'esporte', 'jogador', 'time', 'campeonato', 'copa', 'olimpíadas', 'atleta'],
+    'Saúde': ['saúde', 'medicina', 'hospital', 'médico', 'doença', 'tratamento', 'vacina', 'covid'],
+    'Educação': ['educação', 'escola', 'universidade', 'ensino', 'professor', 'aluno', 'enem', 'vestibular'],
+    'Meio Ambiente': ['meio ambiente', 'sustentabilidade', 'clima', 'aquecimento global', 'poluição', 'natureza'],
+    'Cultura': ['cultura', 'arte', 'música', 'cinema', 'teatro', 'festival', 'artista', 'entretenimento'],
+    'Segurança': ['segurança', 'crime', 'violência', 'polícia', 'prisão', 'roubo', 'homicídio'],
+    'Internacional': ['internacional', 'mundo', 'país', 'exterior', 'global', 'guerra', 'diplomacia']
+}
+
+# Autômatos das palavras-chave acima (common.keyword_automaton), montados uma vez por processo
+CONTEXT_AUTOMATON = KeywordAutomaton(
+    (keyword, context, 1) for context, keywords in CONTEXT_KEYWORDS.items() for keyword in keywords
+)
+CATEGORY_AUTOMATON = KeywordAutomaton(
+    (keyword, category, weight)
+    for category, keywords in CATEGORY_KEYWORDS.items()
+    for group, weight in (('primary', 2), ('secondary', 1))
+    for keyword in keywords[group]
+)
+FIXED_CATEGORY_AUTOMATON = KeywordAutomaton(
+    (keyword, category, 1) for category, keywords in FIXED_CATEGORY_KEYWORDS.items() for keyword in keywords
+)
+
 
 class SentimentAnalyzer:
     """Analisador de sentimentos para notícias"""
@@ -34,132 +192,83 @@ class SentimentAnalyzer:
             'morte', 'doença', 'epidemia', 'pandemia', 'recessão', 'desemprego', 'inflação'
         }
     
-    def analyze_sentiment(self, text: str) -> Dict[str, any]:
-        """Analisa o sentimento de um texto"""
+    def analyze_sentiment(self, text) -> Dict[str, any]:
+        """Analisa o sentimento de um texto (str ou AnalyzedDocument)"""
         try:
-            # Normalizar texto
-            normalized_text = self._normalize_text(text)
-            words = normalized_text.split()
+            document = AnalyzedDocument.of(text)
             
             # Contar palavras por categoria
-            positive_count = sum(1 for word in words if word in self.positive_words)
-            negative_count = sum(1 for word in words if word in self.negative_words)
-            
-            total_words = len(words)
-            if total_words == 0:
-                return {'score': 0.0, 'label': 'neutro', 'confidence': 0.0}
-            
-            # Calcular score (-1 a 1)
-            score = (positive_count - negative_count) / total_words
-            
-            # Determinar label
-            if score > 0.02:
-                label = 'positivo'
-            elif score < -0.02:
-                label = 'negativo'
-            else:
-                label = 'neutro'
+            positive_count = sum(
+                count for word, count in document.counts.items() if word in self.positive_words
+            )
+            negative_count = sum(
+                count for word, count in document.counts.items() if word in self.negative_words
+            )
             
-            # Calcular confiança
-            sentiment_words = positive_count + negative_count
-            confidence = min(sentiment_words / total_words * 2, 1.0)
-            
-            return {
-                'score': round(score, 3),
-                'label': label,
-                'confidence': round(confidence, 3)
-            }
+            return self.sentiment_from_counts(positive_count, negative_count, len(document))
             
         except Exception as e:
             logger.error(f"Erro na análise de sentimento: {e}")
             return {'score': 0.0, 'label': 'neutro', 'confidence': 0.0}
     
-    def _normalize_text(self, text: str) -> str:
-        """Normaliza texto para análise"""
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+    def sentiment_from_counts(self, positive_count, negative_count, total_words) -> Dict[str, any]:
+        """Sentimento a partir das contagens de palavras (também usado na análise em lote)"""
+        if total_words == 0:
+            return {'score': 0.0, 'label': 'neutro', 'confidence': 0.0}
+        
+        # Calcular score (-1 a 1)
+        score = (positive_count - negative_count) / total_words
+        
+        # Determinar label
+        if score > 0.02:
+            label = 'positivo'
+        elif score < -0.02:
+            label = 'negativo'
+        else:
+            label = 'neutro'
+        
+        # Calcular confiança
+        sentiment_words = positive_count + negative_count
+        confidence = min(sentiment_words / total_words * 2, 1.0)
+        
+        return {
+            'score': round(score, 3),
+            'label': label,
+            'confidence': round(confidence, 3)
+        }
 
 
 class EntityExtractor:
     """Extrator de entidades nomeadas"""
     
     def __init__(self):
-        self.patterns = {
-            'pessoa': [
-                r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',
-                r'\b(?:Sr\.|Sra\.|Dr\.|Dra\.)\s[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',
-            ],
-            'organizacao': [
-                r'\b[A-Z][A-Za-z]*(?:\s[A-Z][A-Za-z]*)*\s(?:S\.A\.|Ltda\.|Inc\.|Corp\.)\b',
-                r'\b(?:Ministério|Secretaria|Prefeitura|Governo)\s[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',
-                r'\b[A-Z]{2,}\b',
-            ],
-            'local': [
-                r'\b(?:São Paulo|Rio de Janeiro|Brasília|Salvador|Fortaleza|Belo Horizonte)\b',
-                r'\b[A-Z][a-z]+(?:\s[A-Z][a-z]+)*(?:\s-\s[A-Z]{2})?\b',
-            ],
-            'valor_monetario': [
-                r'R\$\s*\d+(?:\.\d{3})*(?:,\d{2})?\b',
-                r'\b\d+(?:\.\d{3})*(?:,\d{2})?\s*(?:reais|milhões|bilhões)\b',
-            ],
-            'porcentagem': [
-                r'\b\d+(?:,\d+)?%\b',
-            ]
-        }
+        # Regras compiladas uma vez por processo (common.entities)
+        self.matcher = EntityMatcher(types=ENTITY_TYPES, limit=5)
         
-        self.context_keywords = {
-            'economia': ['economia', 'mercado', 'bolsa', 'investimento', 'pib', 'inflação'],
-            'politica': ['governo', 'presidente', 'ministro', 'deputado', 'eleição'],
-            'tecnologia': ['tecnologia', 'internet', 'software', 'digital', 'inovação'],
-            'saude': ['saúde', 'hospital', 'médico', 'doença', 'tratamento', 'vacina'],
-            'esportes': ['futebol', 'basquete', 'olimpíadas', 'copa', 'campeonato'],
-            'educacao': ['educação', 'escola', 'universidade', 'professor', 'ensino']
-        }
+        self.context_keywords = CONTEXT_KEYWORDS
     
-    def extract_entities(self, text: str) -> Dict[str, List[str]]:
-        """Extrai entidades nomeadas do texto"""
+    def extract_entities(self, text) -> Dict[str, List[str]]:
+        """Extrai entidades nomeadas do texto (as 5 mais frequentes por tipo)"""
         try:
-            entities = {}
-            
-            for entity_type, patterns in self.patterns.items():
-                found_entities = set()
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, text, re.IGNORECASE)
-                    found_entities.update(matches)
-                
-                cleaned_entities = []
-                for entity in found_entities:
-                    entity = entity.strip()
-                    if len(entity) > 2:
-                        cleaned_entities.append(entity)
-                
-                entities[entity_type] = cleaned_entities[:5]  # Limitar a 5 por tipo
-            
-            return entities
+            # Entidades dependem das maiúsculas: usa o texto original
+            return self.matcher.extract(AnalyzedDocument.of(text).text)
             
         except Exception as e:
             logger.error(f"Erro na extração de entidades: {e}")
             return {}
     
-    def identify_context(self, text: str) -> List[str]:
+    def identify_context(self, text) -> List[str]:
         """Identifica o contexto/domínio do texto"""
         try:
-            text_lower = text.lower()
-            contexts = []
-            
-            for context, keywords in self.context_keywords.items():
-                score = sum(1 for keyword in keywords if keyword in text_lower)
-                if score >= 1:  # Pelo menos 1 palavra-chave
-                    contexts.append(context)
-            
-            return contexts
+            return self.contexts_from_scores(CONTEXT_AUTOMATON.scores(AnalyzedDocument.of(text).tokens))
             
         except Exception as e:
             logger.error(f"Erro na identificação de contexto: {e}")
             return []
+    
+    def contexts_from_scores(self, scores) -> List[str]:
+        """Contextos com pelo menos 1 palavra-chave, na ordem de CONTEXT_KEYWORDS"""
+        return [context for context in self.context_keywords if scores[context] >= 1]
 
 
 class CategoryClassifier:
@@ -167,174 +276,25 @@ class CategoryClassifier:
     
     def __init__(self):
         # Palavras-chave para cada categoria
-        self.category_keywords = {
-            'Tecnologia': {
-                'primary': [
-                    'tecnologia', 'software', 'hardware', 'internet', 'digital', 'computador',
-                    'smartphone', 'aplicativo', 'app', 'inteligência artificial', 'ia', 'machine learning',
-                    'blockchain', 'criptomoeda', 'bitcoin', 'startup', 'inovação', 'tech',
-                    'programação', 'desenvolvimento', 'código', 'sistema', 'plataforma',
-                    'google', 'apple', 'microsoft', 'facebook', 'meta', 'amazon', 'netflix'
-                ],
-                'secondary': [
-                    'dados', 'nuvem', 'cloud', 'segurança', 'cyber', 'robô', 'automação',
-                    'virtual', 'realidade', 'gaming', 'game', 'eletrônico', 'chip'
-                ]
-            },
-            'Economia': {
-                'primary': [
-                    'economia', 'mercado', 'bolsa', 'ações', 'investimento', 'financeiro',
-                    'banco', 'dinheiro', 'real', 'dólar', 'moeda', 'inflação', 'pib',
-                    'juros', 'taxa', 'selic', 'ipca', 'economia', 'empresas', 'negócios',
-                    'lucro', 'prejuízo', 'receita', 'faturamento', 'vendas'
-                ],
-                'secondary': [
-                    'comércio', 'varejo', 'indústria', 'setor', 'crescimento', 'recessão',
-                    'crise', 'recuperação', 'exportação', 'importação', 'balança'
-                ]
-            },
-            'Política': {
-                'primary': [
-                    'política', 'governo', 'presidente', 'ministro', 'deputado', 'senador',
-                    'congresso', 'senado', 'câmara', 'eleição', 'voto', 'partido',
-                    'democracia', 'lei', 'projeto', 'reforma', 'constituição',
-                    'brasília', 'planalto', 'palácio', 'supremo', 'stf'
-                ],
-                'secondary': [
-                    'municipal', 'estadual', 'federal', 'prefeito', 'governador',
-                    'política', 'campanha', 'candidato', 'coligação', 'aliança'
-                ]
-            },
-            'Esportes': {
-                'primary': [
-                    'futebol', 'basquete', 'vôlei', 'tênis', 'natação', 'atletismo',
-                    'olimpíadas', 'copa', 'mundial', 'campeonato', 'jogo', 'partida',
-                    'time', 'clube', 'jogador', 'atleta', 'técnico', 'treinador',
-                    'gol', 'vitória', 'derrota', 'empate', 'resultado'
-                ],
-                'secondary': [
-                    'estádio', 'arena', 'ginásio', 'campo', 'quadra', 'piscina',
-                    'medalha', 'troféu', 'prêmio', 'recorde', 'performance'
-                ]
-            },
-            'Saúde': {
-                'primary': [
-                    'saúde', 'medicina', 'médico', 'hospital', 'clínica', 'paciente',
-                    'doença', 'tratamento', 'cura', 'remédio', 'medicamento',
-                    'vacina', 'vacinação', 'epidemia', 'pandemia', 'vírus',
-                    'covid', 'coronavirus', 'sus', 'ministério da saúde'
-                ],
-                'secondary': [
-                    'sintoma', 'diagnóstico', 'exame', 'cirurgia', 'terapia',
-                    'prevenção', 'cuidado', 'bem-estar', 'qualidade de vida'
-                ]
-            },
-            'Educação': {
-                'primary': [
-                    'educação', 'escola', 'universidade', 'faculdade', 'ensino',
-                    'professor', 'aluno', 'estudante', 'curso', 'aula',
-                    'mec', 'ministério da educação', 'enem', 'vestibular',
-                    'graduação', 'pós-graduação', 'mestrado', 'doutorado'
-                ],
-                'secondary': [
-                    'aprendizagem', 'conhecimento', 'pesquisa', 'ciência',
-                    'bolsa', 'financiamento', 'fies', 'prouni', 'sisu'
-                ]
-            },
-            'Entretenimento': {
-                'primary': [
-                    'entretenimento', 'cinema', 'filme', 'série', 'tv', 'televisão',
-                    'música', 'cantor', 'banda', 'show', 'concerto', 'festival',
-                    'teatro', 'peça', 'ator', 'atriz', 'artista', 'celebridade',
-                    'famoso', 'netflix', 'globo', 'sbt', 'record'
-                ],
-                'secondary': [
-                    'cultura', 'arte', 'livro', 'autor', 'escritor', 'literatura',
-                    'exposição', 'museu', 'galeria', 'evento', 'lançamento'
-                ]
-            },
-            'Ciência': {
-                'primary': [
-                    'ciência', 'pesquisa', 'estudo', 'descoberta', 'experimento',
-                    'cientista', 'pesquisador', 'laboratório', 'universidade',
-                    'cnpq', 'fapesp', 'capes', 'nasa', 'espaço', 'astronomia',
-                    'física', 'química', 'biologia', 'matemática'
-                ],
-                'secondary': [
-                    'inovação', 'tecnologia', 'desenvolvimento', 'teoria',
-                    'método', 'análise', 'resultado', 'conclusão', 'hipótese'
-                ]
-            }
-        }
+        self.category_keywords = CATEGORY_KEYWORDS
     
-    def classify_category(self, text: str, existing_categories=None) -> Dict[str, any]:
+    def classify_category(self, text, existing_categories=None) -> Dict[str, any]:
         """
         Classifica automaticamente a categoria de um texto
         
         Args:
-            text: Texto para classificação
+            text: Texto (str ou AnalyzedDocument) para classificação
             existing_categories: Lista de categorias existentes no sistema
             
         Returns:
             Dict com categoria sugerida e confiança
         """
         try:
-            # Normalizar texto
-            normalized_text = self._normalize_text(text)
-            words = normalized_text.split()
-            
-            # Calcular scores para cada categoria
-            category_scores = {}
-            
-            for category, keywords in self.category_keywords.items():
-                score = 0
-                
-                # Palavras-chave primárias (peso 2)
-                for keyword in keywords['primary']:
-                    if keyword in normalized_text:
-                        score += 2
-                
-                # Palavras-chave secundárias (peso 1)
-                for keyword in keywords['secondary']:
-                    if keyword in normalized_text:
-                        score += 1
-                
-                # Normalizar score pelo tamanho do texto
-                if len(words) > 0:
-                    category_scores[category] = score / len(words) * 100
-                else:
-                    category_scores[category] = 0
-            
-            # Encontrar categoria com maior score
-            if not category_scores or max(category_scores.values()) == 0:
-                return {
-                    'suggested_category': None,
-                    'confidence': 0.0,
-                    'scores': category_scores,
-                    'message': 'Nenhuma categoria identificada automaticamente'
-                }
-            
-            best_category = max(category_scores, key=category_scores.get)
-            best_score = category_scores[best_category]
-            
-            # Calcular confiança (0-1)
-            confidence = min(best_score / 10, 1.0)  # Normalizar para 0-1
-            
-            # Verificar se a categoria existe no sistema
-            category_exists = True
-            if existing_categories:
-                category_exists = any(
-                    cat.name.lower() == best_category.lower() 
-                    for cat in existing_categories
-                )
-            
-            return {
-                'suggested_category': best_category,
-                'confidence': round(confidence, 3),
-                'scores': {k: round(v, 2) for k, v in category_scores.items()},
-                'category_exists': category_exists,
-                'message': f'Categoria sugerida: {best_category} (confiança: {confidence:.1%})'
-            }
+            # Uma passada pelo texto pontua todas as categorias
+            # (primárias peso 2, secundárias peso 1)
+            words = AnalyzedDocument.of(text).tokens
+            scores = CATEGORY_AUTOMATON.scores(words)
+            return self.classification_from_scores(scores, len(words), existing_categories)
             
         except Exception as e:
             logger.error(f"Erro na classificação de categoria: {e}")
@@ -345,12 +305,54 @@ class CategoryClassifier:
                 'message': f'Erro na classificação: {str(e)}'
             }
     
-    def _normalize_text(self, text: str) -> str:
-        """Normaliza texto para classificação"""
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        return text
+    def classification_from_scores(self, scores, total_words, existing_categories=None) -> Dict[str, any]:
+        """
+        Categoria sugerida a partir das pontuações das palavras-chave (também
+        usado na análise em lote)
+        
+        Args:
+            scores: Soma dos pesos das palavras-chave presentes, por categoria
+            total_words: Quantidade de palavras do texto
+            existing_categories: Lista de categorias existentes no sistema
+        """
+        # Normalizar score pelo tamanho do texto
+        category_scores = {}
+        for category in self.category_keywords:
+            if total_words > 0:
+                category_scores[category] = scores[category] / total_words * 100
+            else:
+                category_scores[category] = 0
+        
+        # Encontrar categoria com maior score
+        if not category_scores or max(category_scores.values()) == 0:
+            return {
+                'suggested_category': None,
+                'confidence': 0.0,
+                'scores': category_scores,
+                'message': 'Nenhuma categoria identificada automaticamente'
+            }
+        
+        best_category = max(category_scores, key=category_scores.get)
+        best_score = category_scores[best_category]
+        
+        # Calcular confiança (0-1)
+        confidence = min(best_score / 10, 1.0)  # Normalizar para 0-1
+        
+        # Verificar se a categoria existe no sistema
+        category_exists = True
+        if existing_categories:
+            category_exists = any(
+                cat.name.lower() == best_category.lower() 
+                for cat in existing_categories
+            )
+        
+        return {
+            'suggested_category': best_category,
+            'confidence': round(confidence, 3),
+            'scores': {k: round(v, 2) for k, v in category_scores.items()},
+            'category_exists': category_exists,
+            'message': f'Categoria sugerida: {best_category} (confiança: {confidence:.1%})'
+        }
     
     def suggest_categories_batch(self, news_list, existing_categories=None) -> List[Dict]:
         """
@@ -363,23 +365,46 @@ class CategoryClassifier:
         Returns:
             Lista com sugestões para cada notícia
         """
-        results = []
-        
+        documents = []
         for news in news_list:
             # Extrair texto da notícia
             if hasattr(news, 'title'):
                 # Objeto News
-                full_text = f"{news.title} {getattr(news, 'summary', '')} {getattr(news, 'content', '')}"
+                document = AnalyzedDocument.from_parts(
+                    news.title, getattr(news, 'summary', ''), getattr(news, 'content', '')
+                )
                 news_id = news.id
                 news_title = news.title
             else:
                 # Dict
-                full_text = f"{news.get('title', '')} {news.get('summary', '')} {news.get('content', '')}"
+                document = AnalyzedDocument.from_parts(
+                    news.get('title', ''), news.get('summary', ''), news.get('content', '')
+                )
                 news_id = news.get('id', 'N/A')
                 news_title = news.get('title', 'Sem título')
             
+            documents.append((news_id, news_title, document))
+        
+        # Pontuações de todas as notícias calculadas em lote (common.batch_analysis)
+        engine = get_batch_engine()
+        matrix = engine.term_matrix(document.tokens for _, _, document in documents)
+        category_scores = engine.product(matrix, 'categories', binary=True)
+        
+        results = []
+        for index, (news_id, news_title, _) in enumerate(documents):
             # Classificar
-            classification = self.classify_category(full_text, existing_categories)
+            try:
+                classification = self.classification_from_scores(
+                    category_scores[index], matrix.lengths[index], existing_categories
+                )
+            except Exception as e:
+                logger.error(f"Erro na classificação de categoria: {e}")
+                classification = {
+                    'suggested_category': None,
+                    'confidence': 0.0,
+                    'scores': {},
+                    'message': f'Erro na classificação: {str(e)}'
+                }
             
             results.append({
                 'news_id': news_id,
@@ -390,6 +415,20 @@ class CategoryClassifier:
         return results
 
 
+# Campos de News preenchidos pela análise (NewsAnalysisService.apply_analysis);
+# updated_at muda o ETag/Last-Modified do detalhe (o feed não exibe a análise)
+ANALYSIS_FIELDS = [
+    'sentiment_score', 'sentiment_label', 'sentiment_confidence',
+    'entities_data', 'analysis_contexts', 'analysis_timestamp', 'updated_at'
+]
+
+# Notícias por bloco da análise em lote (NewsAnalysisService.batch_analyze_news)
+ANALYSIS_BATCH_SIZE = 500
+
+# Análises acumuladas antes de cada gravação em lote (common.news_writes)
+ANALYSIS_FLUSH_SIZE = 20000
+
+
 class NewsAnalysisService:
     """Serviço principal de análise de notícias"""
     
@@ -398,6 +437,76 @@ class NewsAnalysisService:
         self.entity_extractor = EntityExtractor()
         self.category_classifier = CategoryClassifier()
     
+    def apply_analysis(self, news_instance):
+        """
+        Preenche os campos de análise (ANALYSIS_FIELDS) da instância, sem
+        gravá-la: serve também a notícias ainda não inseridas, gravadas com a
+        análise em uma única escrita (common.upload_jobs).
+        
+        Returns:
+            Dict com a análise, como em analyze_news
+        """
+        # Texto preparado uma vez para todos os analisadores
+        document = AnalyzedDocument.from_parts(
+            news_instance.title, news_instance.summary, news_instance.content
+        )
+        
+        # Análise de sentimento
+        sentiment = self.sentiment_analyzer.analyze_sentiment(document)
+        
+        # Extração de entidades
+        entities = self.entity_extractor.extract_entities(document)
+        
+        # Identificação de contexto
+        contexts = self.entity_extractor.identify_context(document)
+        
+        return self._fill_analysis(news_instance, sentiment, entities, contexts)
+    
+    def apply_analysis_batch(self, news_list):
+        """
+        Como apply_analysis, para várias notícias: sentimento e contextos do
+        bloco calculados de uma vez, por produto de matrizes esparsas
+        (common.batch_analysis), com o mesmo resultado da análise por notícia
+        
+        Returns:
+            Lista com a análise de cada notícia, na ordem de news_list
+        """
+        documents = [
+            AnalyzedDocument.from_parts(news.title, news.summary, news.content) for news in news_list
+        ]
+        engine = get_batch_engine()
+        matrix = engine.term_matrix(document.tokens for document in documents)
+        sentiment_counts = engine.product(matrix, 'sentiment')
+        context_scores = engine.product(matrix, 'contexts', binary=True)
+        
+        results = []
+        for index, (news_instance, document) in enumerate(zip(news_list, documents)):
+            counts = sentiment_counts[index]
+            sentiment = self.sentiment_analyzer.sentiment_from_counts(
+                counts['positivo'], counts['negativo'], matrix.lengths[index]
+            )
+            entities = self.entity_extractor.extract_entities(document)
+            contexts = self.entity_extractor.contexts_from_scores(context_scores[index])
+            results.append(self._fill_analysis(news_instance, sentiment, entities, contexts))
+        return results
+    
+    def _fill_analysis(self, news_instance, sentiment, entities, contexts):
+        # Atualizar campos da instância
+        news_instance.sentiment_score = sentiment['score']
+        news_instance.sentiment_label = sentiment['label']
+        news_instance.sentiment_confidence = sentiment['confidence']
+        news_instance.entities_data = entities
+        news_instance.analysis_contexts = contexts
+        news_instance.analysis_timestamp = timezone.now()
+        
+        return {
+            'success': True,
+            'sentiment': sentiment,
+            'entities': entities,
+            'contexts': contexts,
+            'analysis_timestamp': news_instance.analysis_timestamp.isoformat()
+        }
+    
     def analyze_news(self, news_instance):
         """
         Análise completa de uma instância de notícia
@@ -409,39 +518,12 @@ class NewsAnalysisService:
             Dict com análise completa
         """
         try:
-            # Combinar textos para análise
-            full_text = f"{news_instance.title} {news_instance.summary} {news_instance.content}"
-            
-            # Análise de sentimento
-            sentiment = self.sentiment_analyzer.analyze_sentiment(full_text)
-            
-            # Extração de entidades
-            entities = self.entity_extractor.extract_entities(full_text)
-            
-            # Identificação de contexto
-            contexts = self.entity_extractor.identify_context(full_text)
-            
-            # Atualizar campos da instância
-            news_instance.sentiment_score = sentiment['score']
-            news_instance.sentiment_label = sentiment['label']
-            news_instance.sentiment_confidence = sentiment['confidence']
-            news_instance.entities_data = entities
-            news_instance.analysis_contexts = contexts
-            news_instance.analysis_timestamp = timezone.now()
+            result = self.apply_analysis(news_instance)
             
             # Salvar alterações
-            news_instance.save(update_fields=[
-                'sentiment_score', 'sentiment_label', 'sentiment_confidence',
-                'entities_data', 'analysis_contexts', 'analysis_timestamp'
-            ])
+            news_instance.save(update_fields=ANALYSIS_FIELDS)
             
-            return {
-                'success': True,
-                'sentiment': sentiment,
-                'entities': entities,
-                'contexts': contexts,
-                'analysis_timestamp': news_instance.analysis_timestamp.isoformat()
-            }
+            return result
             
         except Exception as e:
             logger.error(f"Erro na análise da notícia {news_instance.id}: {e}")
@@ -489,6 +571,42 @@ class NewsAnalysisService:
         
         results['total'] = len(news_list)
         
+        # Importar aqui para evitar import circular
+        from .news_writes import NewsUpdateBuffer
+        
+        # Análises gravadas em lote (bulk_update ou COPY), não notícia a notícia
+        writes = NewsUpdateBuffer(ANALYSIS_FIELDS, flush_size=ANALYSIS_FLUSH_SIZE)
+        for start in range(0, len(news_list), ANALYSIS_BATCH_SIZE):
+            chunk = news_list[start:start + ANALYSIS_BATCH_SIZE]
+            self._analyze_chunk(chunk, results, writes)
+        writes.flush()
+        
+        results['processed'] += writes.written
+        for news, error in writes.failed:
+            results['errors'] += 1
+            results['error_details'].append({
+                'news_id': news.id,
+                'title': news.title,
+                'error': str(error)
+            })
+        
+        return results
+    
+    def _analyze_chunk(self, news_list, results, writes):
+        """
+        Analisa um bloco de batch_analyze_news: as notícias analisadas em lote
+        vão para `writes`; as demais contam em `results`
+        """
+        try:
+            self.apply_analysis_batch(news_list)
+        except Exception as e:
+            # Falha no bloco: cada notícia é analisada (e falha) individualmente
+            logger.error(f"Erro na análise em lote, analisando notícia a notícia: {e}")
+        else:
+            for news in news_list:
+                writes.add(news)
+            return
+        
         for news in news_list:
             try:
                 analysis_result = self.analyze_news(news)
@@ -509,8 +627,6 @@ class NewsAnalysisService:
                     'error': str(e)
                 })
                 logger.error(f"Erro ao analisar notícia {news.id}: {e}")
-        
-        return results
     
     def classify_news_category(self, news_instance):
         """
@@ -530,11 +646,13 @@ class NewsAnalysisService:
             existing_categories = Category.objects.all()
             
             # Combinar título, resumo e conteúdo para análise
-            full_text = f"{news_instance.title} {news_instance.summary or ''} {news_instance.content or ''}"
+            document = AnalyzedDocument.from_parts(
+                news_instance.title, news_instance.summary, news_instance.content
+            )
             
             # Classificar
             classification = self.category_classifier.classify_category(
-                full_text, 
+                document, 
                 existing_categories
             )
             
@@ -621,18 +739,9 @@ class AINewsClassifier:
             'Educação', 'Meio Ambiente', 'Cultura', 'Segurança', 'Internacional'
         ]
         
-        # Configuração do OpenAI
-        import os
-        from openai import OpenAI
-        
-        api_key = os.getenv('OPENAI_API_KEY')
-        if api_key:
-            self.client = OpenAI(
-                api_key=api_key,
-                timeout=120.0  # Timeout de 30 segundos para evitar travamentos
-            )
-        else:
-            self.client = None
+        # Cliente OpenAI compartilhado do processo (common.llm_gateway)
+        self.gateway = get_llm_gateway()
+        if self.gateway is None:
             logger.warning("OpenAI API key não encontrada. Usando classificação por palavras-chave.")
     
     def classify_news_content(self, title: str, content: str, summary: str = "") -> dict:
@@ -648,7 +757,7 @@ class AINewsClassifier:
             Dict com categoria sugerida e confiança
         """
         try:
-            if self.client:
+            if self.gateway:
                 return self._classify_with_openai(title, content, summary)
             else:
                 return self._classify_with_keywords(title, content, summary)
@@ -665,6 +774,11 @@ class AINewsClassifier:
                 full_text += f"Resumo: {summary}\n"
             full_text += f"Conteúdo: {content[:1000]}"  # Limitar para não exceder tokens
             
+            model = self.gateway.task_options('classification')[0]
+            cached = llm_cache.get('classification', model, CLASSIFICATION_PROMPT_VERSION, full_text)
+            if cached is not None:
+                return {**cached, 'method': 'openai'}
+            
             # Prompt para classificação
             prompt = f"""
 Analise o seguinte texto de notícia e classifique-o em UMA das seguintes categorias:
@@ -689,8 +803,8 @@ Formato: Categoria,Confiança
 Exemplo: Tecnologia,0.95
 """
 
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
+            response = self.gateway.complete(
+                'classification',
                 messages=[
                     {"role": "system", "content": "Você é um especialista em classificação de notícias. Seja preciso e objetivo."},
                     {"role": "user", "content": prompt}
@@ -719,6 +833,10 @@ Exemplo: Tecnologia,0.95
                 category = self._find_similar_category(category)
                 confidence = max(0.3, confidence - 0.2)  # Reduzir confiança
             
+            llm_cache.set(
+                'classification', model, CLASSIFICATION_PROMPT_VERSION, full_text,
+                {'category': category, 'confidence': confidence}
+            )
             return {
                 'category': category,
                 'confidence': confidence,
@@ -731,27 +849,12 @@ Exemplo: Tecnologia,0.95
     
     def _classify_with_keywords(self, title: str, content: str, summary: str = "") -> dict:
         """Classificação usando palavras-chave como fallback"""
-        full_text = f"{title} {summary} {content}".lower()
-        
-        # Palavras-chave para cada categoria
-        keywords = {
-            'Tecnologia': ['tecnologia', 'software', 'app', 'digital', 'internet', 'ia', 'inteligência artificial', 'startup', 'inovação'],
-            'Política': ['política', 'governo', 'eleição', 'presidente', 'ministro', 'congresso', 'senado', 'deputado'],
-            'Economia': ['economia', 'mercado', 'bolsa', 'investimento', 'banco', 'dinheiro', 'inflação', 'pib', 'juros'],
-            'Esportes': ['futebol', 'esporte', 'jogador', 'time', 'campeonato', 'copa', 'olimpíadas', 'atleta'],
-            'Saúde': ['saúde', 'medicina', 'hospital', 'médico', 'doença', 'tratamento', 'vacina', 'covid'],
-            'Educação': ['educação', 'escola', 'universidade', 'ensino', 'professor', 'aluno', 'enem', 'vestibular'],
-            'Meio Ambiente': ['meio ambiente', 'sustentabilidade', 'clima', 'aquecimento global', 'poluição', 'natureza'],
-            'Cultura': ['cultura', 'arte', 'música', 'cinema', 'teatro', 'festival', 'artista', 'entretenimento'],
-            'Segurança': ['segurança', 'crime', 'violência', 'polícia', 'prisão', 'roubo', 'homicídio'],
-            'Internacional': ['internacional', 'mundo', 'país', 'exterior', 'global', 'guerra', 'diplomacia']
-        }
+        found = FIXED_CATEGORY_AUTOMATON.scores(AnalyzedDocument.from_parts(title, summary, content).tokens)
         
         scores = {}
-        for category, words in keywords.items():
-            score = sum(1 for word in words if word in full_text)
-            if score > 0:
-                scores[category] = score / len(words)  # Normalizar
+        for category, words in FIXED_CATEGORY_KEYWORDS.items():
+            if found[category] > 0:
+                scores[category] = found[category] / len(words)  # Normalizar
         
         if scores:
             best_category = max(scores, key=scores.get)
@@ -806,8 +909,39 @@ def analyze_single_news(news_instance):
     Returns:
         Dict com análise completa
     """
-    service = NewsAnalysisService()
-    return service.analyze_news(news_instance)
+    return get_analysis_service().analyze_news(news_instance)
+
+
+_analysis_service = None
+
+
+def get_analysis_service():
+    """NewsAnalysisService do processo (os analisadores não guardam estado entre notícias)"""
+    global _analysis_service
+    if _analysis_service is None:
+        _analysis_service = NewsAnalysisService()
+    return _analysis_service
+
+
+_batch_engine = None
+
+
+def get_batch_engine():
+    """
+    BatchTermEngine (common.batch_analysis) dos léxicos da análise: palavras
+    de sentimento, palavras-chave de contexto e de categoria; montado uma vez
+    por processo
+    """
+    global _batch_engine
+    if _batch_engine is None:
+        sentiment = SentimentAnalyzer()
+        _batch_engine = BatchTermEngine({
+            'sentiment': [(word, 'positivo', 1) for word in sentiment.positive_words]
+            + [(word, 'negativo', 1) for word in sentiment.negative_words],
+            'contexts': CONTEXT_AUTOMATON.keywords,
+            'categories': CATEGORY_AUTOMATON.keywords,
+        })
+    return _batch_engine
 
 
 # Função utilitária para classificação automática
@@ -839,19 +973,20 @@ def extract_news_info_from_content(news_content: str) -> dict:
         Dict com informações extraídas ou erro
     """
     try:
-        # Configuração do OpenAI
-        import os
-        from openai import OpenAI
-        
-        api_key = os.getenv('OPENAI_API_KEY')
-        if not api_key:
+        # Cliente OpenAI compartilhado do processo (common.llm_gateway)
+        gateway = get_llm_gateway()
+        if gateway is None:
             # Fallback: extrair informações básicas sem IA
             return _extract_info_fallback(news_content)
         
-        client = OpenAI(
-            api_key=api_key,
-            timeout=30.0  # Timeout de 30 segundos para evitar travamentos
-        )
+        model = gateway.task_options('extraction')[0]
+        cached = llm_cache.get('extraction', model, EXTRACTION_PROMPT_VERSION, news_content)
+        if cached is not None:
+            return {
+                'success': True,
+                'data': cached,
+                'method': 'openai'
+            }
         
         # Limitar o conteúdo para não exceder tokens
         content_preview = news_content[:2000] if len(news_content) > 2000 else news_content
@@ -880,8 +1015,8 @@ Exemplo de resposta:
 }}
 """
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
+        response = gateway.complete(
+            'extraction',
             messages=[
                 {"role": "system", "content": "Você é um especialista em extração de informações de notícias. Responda sempre em JSON válido."},
                 {"role": "user", "content": prompt}
@@ -906,7 +1041,8 @@ Exemplo de resposta:
             
             if not extracted_data.get('source'):
                 extracted_data['source'] = 'Fonte não identificada'
-                
+            
+            llm_cache.set('extraction', model, EXTRACTION_PROMPT_VERSION, news_content, extracted_data)
             return {
                 'success': True,
                 'data': extracted_data,
@@ -984,4 +1120,194 @@ def _create_summary_fallback(content: str) -> str:
     else:
         summary = content[:200] + '...' if len(content) > 200 else content
     
-    return summary.strip()
\ No newline at end of file
+    return summary.strip()
+
+# Extração e classificação em lote: várias notícias por chamada à OpenAI
+
+# Recorte de cada notícia no prompt (o mesmo da extração individual)
+BATCH_ARTICLE_CHARS = 2000
+# Tokens de resposta reservados por notícia (título, resumo, fonte, categoria e confiança)
+BATCH_OUTPUT_TOKENS_PER_ARTICLE = 200
+
+BATCH_SYSTEM_PROMPT = (
+    "Você é um especialista em extração de informações e classificação de notícias. "
+    "Responda sempre em JSON válido."
+)
+
+BATCH_INSTRUCTIONS = """
+Para cada notícia abaixo, identificada por "id", extraia as informações e classifique-a em UMA das categorias:
+{categories}
+
+Campos de cada notícia:
+- id: o id da notícia
+- title: um título claro e conciso
+- summary: um resumo de 1-2 frases
+- source: a fonte da notícia (string vazia se não mencionada)
+- category: o nome exato de uma das categorias acima
+- confidence: número de 0 a 1 com a confiança na classificação
+
+Responda APENAS com um objeto JSON no formato:
+{{"noticias": [{{"id": 0, "title": "...", "summary": "...", "source": "...", "category": "Tecnologia", "confidence": 0.95}}]}}
+com um elemento por notícia.
+
+Notícias:
+"""
+
+
+def _batch_article(article_id, news_content):
+    return json.dumps({'id': article_id, 'texto': news_content[:BATCH_ARTICLE_CHARS]}, ensure_ascii=False)
+
+
+def batch_news_contents(contents, batch_size=None, max_tokens=None):
+    """
+    Divide as notícias em lotes para extract_and_classify_news_batch: até
+    `batch_size` (LLM_BATCH_SIZE) notícias por lote, sem que o prompt
+    estimado mais a resposta reservada passem de `max_tokens`
+    (LLM_BATCH_MAX_TOKENS). Retorna listas de posições em `contents`.
+    """
+    batch_size = max(1, batch_size or settings.LLM_BATCH_SIZE)
+    max_tokens = max_tokens or settings.LLM_BATCH_MAX_TOKENS
+    base_tokens = (len(BATCH_SYSTEM_PROMPT) + len(BATCH_INSTRUCTIONS) + 200) // CHARS_PER_TOKEN
+
+    batches, current, current_tokens = [], [], base_tokens
+    for position, news_content in enumerate(contents):
+        article_tokens = (
+            len(_batch_article(len(current), news_content)) // CHARS_PER_TOKEN + BATCH_OUTPUT_TOKENS_PER_ARTICLE
+        )
+        if current and (len(current) >= batch_size or current_tokens + article_tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], base_tokens
+        current.append(position)
+        current_tokens += article_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _extract_and_classify_single(news_content, classifier):
+    """Caminho individual: extração e classificação em chamadas separadas"""
+    extraction = extract_news_info_from_content(news_content)
+    if not extraction['success']:
+        return extraction
+    data = extraction['data']
+    classification = classifier.classify_news_content(
+        data.get('title', ''), data.get('content', news_content), data.get('summary', '')
+    )
+    return {'success': True, 'data': data, 'classification': classification, 'method': extraction['method']}
+
+
+def _parse_batch_entry(entry, news_content, classifier):
+    """Valida um elemento da resposta em lote; None se ele não puder ser usado"""
+    if not isinstance(entry, dict):
+        return None
+    title, summary, source, category = (entry.get(key) for key in ('title', 'summary', 'source', 'category'))
+    if not isinstance(title, str) or not title.strip() or not isinstance(category, str):
+        return None
+    if not isinstance(summary or '', str) or not isinstance(source or '', str):
+        return None
+
+    try:
+        confidence = min(1.0, max(0.0, float(entry.get('confidence'))))
+    except (TypeError, ValueError):
+        confidence = 0.5
+    category = category.strip()
+    if category not in classifier.fixed_categories:
+        # Como na classificação individual
+        category = classifier._find_similar_category(category)
+        confidence = max(0.3, confidence - 0.2)
+
+    return {
+        'success': True,
+        'data': {
+            'title': title.strip(),
+            # A resposta em lote não repete o texto: o conteúdo é o original
+            'content': news_content,
+            'summary': (summary or '').strip(),
+            'source': (source or '').strip() or 'Fonte não identificada',
+        },
+        'classification': {'category': category, 'confidence': confidence, 'method': 'openai'},
+        'method': 'openai_batch',
+    }
+
+
+def _extract_and_classify_with_openai(gateway, classifier, contents):
+    """
+    Uma chamada para o lote; None nas posições cuja resposta não pôde ser
+    usada. Notícias com resultado no cache (tarefa 'extract_classify') ficam
+    fora da chamada, e as respostas válidas são gravadas no cache.
+    """
+    model = gateway.task_options('batch_extraction')[0]
+    results = [None] * len(contents)
+    misses = []
+    for position, content in enumerate(contents):
+        cached = llm_cache.get('extract_classify', model, BATCH_PROMPT_VERSION, content)
+        results[position] = _parse_batch_entry(cached, content, classifier) if cached is not None else None
+        if results[position] is None:
+            misses.append(position)
+    if not misses:
+        return results
+
+    entries = _request_batch(gateway, classifier, [contents[position] for position in misses])
+    for article_id, position in enumerate(misses):
+        entry = entries.get(article_id)
+        results[position] = _parse_batch_entry(entry, contents[position], classifier)
+        if results[position] is not None:
+            cached = {key: entry.get(key) for key in ('title', 'summary', 'source', 'category', 'confidence')}
+            llm_cache.set('extract_classify', model, BATCH_PROMPT_VERSION, contents[position], cached)
+    return results
+
+
+def _request_batch(gateway, classifier, contents):
+    """Chamada em lote à OpenAI; elementos da resposta por id ({} em caso de erro)"""
+    articles = '\n'.join(_batch_article(article_id, content) for article_id, content in enumerate(contents))
+    prompt = BATCH_INSTRUCTIONS.format(categories=', '.join(classifier.fixed_categories)) + articles
+
+    entries = {}
+    try:
+        response = gateway.complete(
+            'batch_extraction',
+            messages=[
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=BATCH_OUTPUT_TOKENS_PER_ARTICLE * len(contents),
+            temperature=0.1,
+            response_format={"type": "json_object"}
+        )
+        result = json.loads(response.choices[0].message.content)
+        for entry in result.get('noticias', []) if isinstance(result, dict) else []:
+            if isinstance(entry, dict) and isinstance(entry.get('id'), int):
+                entries[entry['id']] = entry
+    except Exception as e:
+        logger.error(f"Erro na extração em lote com OpenAI ({len(contents)} notícias): {e}")
+    return entries
+
+
+def extract_and_classify_news_batch(contents):
+    """
+    Extrai informações estruturadas e classifica várias notícias em uma
+    única chamada à OpenAI (um lote de batch_news_contents).
+
+    Cada elemento da resposta é validado; apenas as notícias sem resposta
+    válida são refeitas individualmente (extract_news_info_from_content e
+    classificação). Sem chave da OpenAI, usa os fallbacks locais.
+
+    Args:
+        contents: Conteúdos brutos das notícias
+
+    Returns:
+        Lista, na ordem de `contents`, de dicts com success, data (como em
+        extract_news_info_from_content) e classification (como em
+        classify_news_automatically), ou success False e error
+    """
+    classifier = AINewsClassifier()
+    if classifier.gateway is None:
+        return [_extract_and_classify_single(content, classifier) for content in contents]
+
+    results = _extract_and_classify_with_openai(classifier.gateway, classifier, contents)
+    failed = [position for position, result in enumerate(results) if result is None]
+    if failed:
+        logger.warning(f"Extração em lote: {len(failed)} de {len(contents)} notícias refeitas individualmente")
+    for position in failed:
+        results[position] = _extract_and_classify_single(contents[position], classifier)
+    return results
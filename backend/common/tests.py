@@ -1,3 +1,1920 @@
-from django.test import TestCase
+import gzip
+import json
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from types import SimpleNamespace
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import msgpack
+import openai
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, include, path, reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import urls as common_urls
+from .async_views import urlpatterns as async_urlpatterns
+from .batch_analysis import BatchTermEngine
+from .db_routers import PrimaryReplicaRouter
+from .documents import AnalyzedDocument
+from .feed_cache import feed_cache
+from .keyword_automaton import KeywordAutomaton, tokenize
+from .llm_cache import cache_key, llm_cache, llm_cache_bypass
+from .llm_gateway import LLMGateway, llm_call_measured
+from .management.commands.analyze_news import pk_ranges
+from .middleware import DatabaseRoutingMiddleware, get_view_budget, query_budget_measured
+from .models import News, Category, LLMCacheEntry, UploadJob, UploadJobItem
+from .news_writes import NewsUpdateBuffer, copy_update
+from .news_upload import UploadFormatError, iter_upload_news
+from .renderers import ORJSONRenderer
+from .search_index import NewsSearchIndex, get_search_index, indexed_documents
+from .serializers import NewsListSerializer
+from .rate_limit import RateLimiter, estimate_tokens
+from .services import (
+    AINewsClassifier, CategoryClassifier, EntityExtractor, NewsAnalysisService, SentimentAnalyzer,
+    batch_news_contents, extract_and_classify_news_batch, extract_news_info_from_content, get_batch_engine,
+)
+from .upload_jobs import (
+    create_upload_job, extract_upload_item, run_upload_job, stale_upload_jobs, write_upload_items
+)
+
+
+def create_news(count, author=None, category=None, **extra):
+    """Cria `count` notícias distribuídas entre categorias e autores distintos"""
+    categories = list(Category.objects.all())
+    news_list = []
+    for i in range(count):
+        news_author = author or User.objects.create_user(username=f'autor_{News.objects.count()}_{i}')
+        news_category = category or categories[i % len(categories)]
+        news_list.append(News.objects.create(
+            title=f'Notícia {i}',
+            content=f'Conteúdo da notícia {i}',
+            summary=f'Resumo {i}',
+            source='Fonte',
+            category=news_category,
+            author=news_author,
+            **extra
+        ))
+    return news_list
+
+
+class NewsFeedQueryCountTests(TestCase):
+    """Garante que o feed de notícias executa um número fixo de queries"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def _count_queries(self, url, user=None):
+        if user is not None:
+            self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def test_list_query_count_does_not_grow_with_page(self):
+        create_news(2)
+        small, _ = self._count_queries('/api/news/')
+        create_news(8)
+        full, response = self._count_queries('/api/news/')
+
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(small, full)
+        # Validadores HTTP (common_category), COUNT e página
+        self.assertLessEqual(full, 3)
+
+    def test_list_reports_active_news_count_per_category(self):
+        category = Category.objects.get(name='Economia')
+        create_news(3, category=category)
+        create_news(1, category=category, is_active=False)
+
+        _, response = self._count_queries('/api/news/')
+
+        for item in response.data['results']:
+            self.assertEqual(item['category']['news_count'], 3)
+
+    def test_retrieve_query_count(self):
+        news = create_news(1)[0]
+        queries, response = self._count_queries(f'/api/news/{news.id}/')
+
+        self.assertEqual(response.data['category']['news_count'], 1)
+        # Validadores HTTP e a notícia com autor e categoria
+        self.assertLessEqual(queries, 2)
+
+    def test_my_preferences_query_count_does_not_grow_with_page(self):
+        reader = User.objects.create_user(username='leitor')
+        reader.profile.preferred_categories.set(Category.objects.all())
+
+        create_news(2)
+        small, _ = self._count_queries('/api/news/my_preferences/', user=reader)
+        create_news(8)
+        full, response = self._count_queries('/api/news/my_preferences/', user=reader)
+
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(small, full)
+
+
+def iter_common_routes(patterns=None):
+    """Percorre as rotas de common/urls.py servidas por views de common.views"""
+    for pattern in common_urls.urlpatterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            yield from iter_common_routes(pattern.url_patterns)
+        elif (pattern.callback.__module__ == 'common.views'
+              and 'format' not in pattern.pattern.regex.groupindex):
+            yield pattern
+
+
+def route_methods(callback):
+    """Métodos HTTP atendidos por uma rota"""
+    actions = getattr(callback, 'actions', None)
+    if actions:
+        return [method for method in actions if method != 'head']
+    return [method for method in ('get', 'post', 'put', 'patch', 'delete') if hasattr(callback.cls, method)]
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class RouteQueryBudgetTests(TestCase):
+    """Executa todas as rotas de common/urls.py contra um banco populado"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin_budget')
+        cls.admin.profile.user_type = 'admin'
+        cls.admin.profile.save()
+        cls.reader = User.objects.create_user(username='leitor_budget')
+        cls.reader.profile.preferred_categories.set(Category.objects.all()[:3])
+        cls.news = create_news(20, author=cls.admin)[0]
+        cls.upload_job = UploadJob.objects.create(user=cls.admin, file_name='noticias.json', total_count=1)
+        UploadJobItem.objects.create(job=cls.upload_job, index=1, payload={'noticia': 'Texto'})
+
+    def _route_kwargs(self, pattern):
+        ids = {
+            'news': self.news.id,
+            'category': self.news.category_id,
+            'userprofile': self.reader.profile.id,
+            'upload_job_status': self.upload_job.id,
+        }
+        kwargs = {}
+        for name in pattern.pattern.regex.groupindex:
+            if name == 'news_id':
+                kwargs[name] = self.news.id
+            else:
+                kwargs[name] = ids[pattern.name.split('-')[0]]
+        return kwargs
+
+    def test_every_route_declares_a_budget(self):
+        for pattern in iter_common_routes():
+            for method in route_methods(pattern.callback):
+                with self.subTest(route=pattern.name, method=method):
+                    try:
+                        get_view_budget(pattern.callback, method)
+                    except KeyError:
+                        self.fail(f'{pattern.name} ({method.upper()}) não declara orçamento de queries')
+
+    def test_read_routes_stay_within_budget(self):
+        for user in (None, self.reader, self.admin):
+            if user is None:
+                self.client.logout()
+            else:
+                self.client.force_login(user)
+
+            for pattern in iter_common_routes():
+                if 'get' not in route_methods(pattern.callback):
+                    continue
+                url = reverse(pattern.name, kwargs=self._route_kwargs(pattern))
+                with self.subTest(route=pattern.name, user=getattr(user, 'username', 'anonimo')):
+                    response = self.client.get(url)
+                    self.assertLess(response.status_code, 500)
+
+
+class CategoryActiveNewsCountTests(TestCase):
+    """Contador denormalizado Category.active_news_count"""
+
+    def setUp(self):
+        self.economia = Category.objects.get(name='Economia')
+        self.cultura = Category.objects.get(name='Cultura')
+
+    def assertCounts(self, economia, cultura):
+        self.economia.refresh_from_db()
+        self.cultura.refresh_from_db()
+        self.assertEqual(self.economia.active_news_count, economia)
+        self.assertEqual(self.cultura.active_news_count, cultura)
+
+    def test_create_counts_only_active_news(self):
+        create_news(2, category=self.economia)
+        create_news(1, category=self.economia, is_active=False)
+        self.assertCounts(2, 0)
+
+    def test_toggle_recategorize_and_delete(self):
+        news = create_news(1, category=self.economia)[0]
+
+        news = News.objects.get(pk=news.pk)
+        news.is_active = False
+        news.save()
+        self.assertCounts(0, 0)
+
+        news.is_active = True
+        news.category = self.cultura
+        news.save()
+        self.assertCounts(0, 1)
+
+        news.delete()
+        self.assertCounts(0, 0)
+
+    def test_analysis_save_does_not_change_count(self):
+        news = create_news(1, category=self.economia)[0]
+        news.sentiment_label = 'neutro'
+        news.save(update_fields=['sentiment_label'])
+        self.assertCounts(1, 0)
+
+    def test_analysis_save_does_not_touch_the_category(self):
+        news = create_news(1, category=self.economia)[0]
+        self.economia.refresh_from_db()
+        updated_at = news.updated_at
+
+        with CaptureQueriesContext(connection) as queries:
+            NewsAnalysisService().analyze_news(news)
+
+        # Campos fora do feed: sem UPDATE na categoria e sem invalidar o feed
+        self.assertFalse([query for query in queries.captured_queries if 'common_category' in query['sql']])
+        version = self.economia.news_version
+        self.economia.refresh_from_db()
+        self.assertEqual(self.economia.news_version, version)
+        # O detalhe da notícia (ETag/Last-Modified) muda
+        self.assertGreater(News.objects.get(pk=news.pk).updated_at, updated_at)
+
+    def test_reconcile_command_repairs_drift(self):
+        create_news(3, category=self.economia)
+        News.objects.filter(category=self.economia).update(category=self.cultura)
+        self.assertCounts(3, 0)
+
+        out = StringIO()
+        call_command('reconcile_news_counts', '--dry-run', stdout=out)
+        self.assertIn('2 categorias divergentes', out.getvalue())
+        self.assertCounts(3, 0)
+
+        call_command('reconcile_news_counts', stdout=StringIO())
+        self.assertCounts(0, 3)
+
+
+FEED_INDEXES = {'news_active_feed_idx', 'news_active_cat_feed_idx'}
+
+
+def plan_index_scans(queryset):
+    """Nomes dos índices usados (Index/Index Only/Bitmap Index Scan) no plano do PostgreSQL"""
+    plan = json.loads(queryset.explain(format='json'))[0]['Plan']
+    indexes, nodes = set(), [plan]
+    while nodes:
+        node = nodes.pop()
+        if 'Index Name' in node:
+            indexes.add(node['Index Name'])
+        nodes.extend(node.get('Plans', []))
+    return indexes
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN de índices requer PostgreSQL')
+class NewsIndexExplainTests(TestCase):
+    """
+    Verifica que as consultas do feed e do backfill usam os índices de common_news.
+
+    A tabela é populada com NEWS_EXPLAIN_ROWS linhas (padrão: 1.000.000).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        rows = int(os.getenv('NEWS_EXPLAIN_ROWS', '1000000'))
+        author = User.objects.create_user(username='autor_explain')
+        cls.category_ids = list(Category.objects.values_list('id', flat=True))
+
+        with connection.cursor() as cursor:
+            # 5% inativas, 1% ainda não analisadas, uma notícia por minuto
+            cursor.execute(
+                """
+                INSERT INTO common_news (
+                    title, content, summary, source, category_id, author_id,
+                    published_at, created_at, updated_at, is_active, analysis_timestamp
+                )
+                SELECT
+                    'Notícia ' || i, 'Conteúdo da notícia ' || i, '', 'Fonte',
+                    (%s::bigint[])[1 + i %% %s], %s,
+                    NOW() - i * INTERVAL '1 minute', NOW() - i * INTERVAL '1 minute', NOW(),
+                    i %% 20 <> 0,
+                    CASE WHEN i %% 100 = 0 THEN NULL ELSE NOW() END
+                FROM generate_series(1, %s) AS i
+                """,
+                [cls.category_ids, len(cls.category_ids), author.id, rows]
+            )
+            cursor.execute('ANALYZE common_news')
+
+    def test_feed_uses_partial_index(self):
+        queryset = News.objects.filter(is_active=True).order_by('-published_at')[:10]
+        self.assertTrue(plan_index_scans(queryset) & FEED_INDEXES)
+
+    def test_preference_and_period_feed_use_partial_index(self):
+        queryset = News.objects.filter(
+            is_active=True,
+            category__in=self.category_ids[:2],
+            published_at__gte=timezone.now() - timedelta(days=7),
+        ).order_by('-published_at')[:10]
+        self.assertTrue(plan_index_scans(queryset) & FEED_INDEXES)
+
+    def test_analysis_backfill_uses_partial_index(self):
+        queryset = News.objects.filter(analysis_timestamp__isnull=True).order_by('created_at')[:100]
+        self.assertIn('news_unanalyzed_idx', plan_index_scans(queryset))
+
+    def test_duplicate_title_check_uses_index(self):
+        queryset = News.objects.filter(title='Notícia 500')
+        self.assertIn('news_title_idx', plan_index_scans(queryset))
+
+
+class NewsCursorPaginationTests(TestCase):
+    """Modo keyset (?cursor=) do feed de notícias"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='autor_cursor')
+        self.news = create_news(25, author=self.author)
+        # Metade das notícias com o mesmo published_at, para exercitar o desempate por id
+        News.objects.filter(pk__in=[news.pk for news in self.news[:12]]).update(published_at=self.news[0].published_at)
+
+    def _walk(self, url, on_page=None):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(item['id'] for item in response.data['results'])
+            if on_page:
+                on_page()
+            url = response.data['next']
+        return ids
+
+    def test_cursor_walks_whole_feed_in_order(self):
+        ids = self._walk('/api/news/?cursor=')
+        expected = list(
+            News.objects.filter(is_active=True).order_by('-published_at', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(ids, expected)
+
+    def test_cursor_is_stable_while_news_are_inserted(self):
+        expected = list(
+            News.objects.filter(is_active=True).order_by('-published_at', '-id').values_list('id', flat=True)
+        )
+        ids = self._walk('/api/news/?cursor=', on_page=lambda: create_news(1, author=self.author))
+        self.assertEqual(ids, expected)
+
+    def test_count_is_cached(self):
+        first = self.client.get('/api/news/?cursor=')
+        create_news(2, author=self.author)
+        second = self.client.get('/api/news/?cursor=')
+
+        self.assertEqual(first.data['count'], 25)
+        self.assertEqual(second.data['count'], 25)
+
+    def test_count_is_cached_with_period(self):
+        now = timezone.now().replace(second=10)
+        with mock.patch('common.views.timezone.now', side_effect=[now, now + timedelta(seconds=30)]):
+            with CaptureQueriesContext(connection) as queries:
+                first = self.client.get('/api/news/?cursor=&period=week')
+                second = self.client.get('/api/news/?cursor=&period=week')
+
+        counts = [query['sql'] for query in queries.captured_queries if 'COUNT(' in query['sql'].upper()]
+        self.assertEqual(len(counts), 1)
+        self.assertEqual(first.data['count'], 25)
+        self.assertEqual(second.data['count'], 25)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/news/?cursor=nao-e-um-cursor')
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_mode_is_unchanged(self):
+        response = self.client.get('/api/news/?page=2')
+        self.assertEqual(response.data['count'], 25)
+        self.assertIn('previous', response.data)
+
+
+class NewsSearchTests(TestCase):
+    """Busca textual do feed (?search=)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        author = User.objects.create_user(username='autor_busca')
+        self.in_content, self.in_title, self.other = create_news(3, author=author)
+        News.objects.filter(pk=self.in_content.pk).update(content='O banco central anunciou a taxa de juros')
+        News.objects.filter(pk=self.in_title.pk).update(title='Juros sobem novamente')
+
+    def _search(self, term):
+        response = self.client.get('/api/news/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_search_matches_title_and_content(self):
+        ids = self._search('juros')
+        self.assertCountEqual(ids, [self.in_content.pk, self.in_title.pk])
+
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search requer PostgreSQL')
+    def test_fulltext_search_ranks_title_first_and_stems(self):
+        # 'juro' casa 'juros' pelo stemmer português; o título tem peso maior que o conteúdo
+        self.assertEqual(self._search('juro'), [self.in_title.pk, self.in_content.pk])
+
+
+class BM25SearchIndexTests(TestCase):
+    """Índice BM25 embutido como backend de busca do feed"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.path = os.path.join(self.directory, 'news.bm25')
+        settings_override = override_settings(
+            NEWS_SEARCH_BACKEND='common.filters.BM25SearchFilter',
+            NEWS_SEARCH_INDEX_PATH=self.path,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.author = User.objects.create_user(username='autor_bm25')
+        self.in_content, self.in_title, self.other = create_news(3, author=self.author)
+        News.objects.filter(pk=self.in_content.pk).update(content='O banco central anunciou a taxa de juros')
+        News.objects.filter(pk=self.in_title.pk).update(title='Juros sobem novamente')
+        call_command('build_search_index', stdout=StringIO())
+
+    def _search(self, term):
+        response = self.client.get('/api/news/', {'search': term})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def _create(self, title):
+        with self.captureOnCommitCallbacks(execute=True):
+            news = create_news(1, author=self.author)[0]
+            news.title = title
+            news.save()
+        return news
+
+    def test_ranks_by_bm25_with_title_weight(self):
+        self.assertEqual(self._search('juros'), [self.in_title.pk, self.in_content.pk])
+
+    def test_ignores_accents_and_case(self):
+        self.assertEqual(self._search('JÚROS'), [self.in_title.pk, self.in_content.pk])
+
+    def test_save_and_delete_update_index_without_rebuild(self):
+        created = self._create('Juros e inflação')
+        self.assertIn(created.pk, self._search('inflação'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title.is_active = False
+            self.in_title.save()
+            self.in_content.delete()
+        self.assertEqual(self._search('juros'), [created.pk])
+
+    def test_news_inserted_without_signals_are_found(self):
+        # Como o curador: INSERT sem signals, sem linha no journal
+        inserted = News.objects.bulk_create([
+            News(title='Juros e inflação', content='Texto', source='Curador',
+                 category=self.in_title.category, author=self.author)
+        ])[0]
+
+        self.assertIn(inserted.pk, self._search('inflação'))
+
+    def test_workers_share_segment_and_journal(self):
+        worker = NewsSearchIndex(self.path)
+        created = self._create('Eleição municipal')
+
+        self.assertEqual([news_id for news_id, _ in worker.search('eleicao')], [created.pk])
+        self.assertEqual(worker.search('eleicao'), get_search_index().search('eleicao'))
+
+    def test_rebuild_compacts_journal(self):
+        self._create('Eleição municipal')
+        before = get_search_index().search('eleicao juros')
+
+        get_search_index().rebuild(indexed_documents())
+
+        self.assertEqual(os.path.getsize(self.path + '.journal'), 0)
+        self.assertEqual(get_search_index().search('eleicao juros'), before)
+
+    def test_journal_statistics_match_rebuilt_segment(self):
+        self._create('Juros e inflação')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.in_title.title = 'Juros sobem de novo e juros caem'
+            self.in_title.save()
+            self.other.delete()
+
+        # Documentos do segmento base atualizados ou removidos não contam duas vezes
+        rebuilt = NewsSearchIndex(os.path.join(self.directory, 'rebuilt.bm25'))
+        rebuilt.rebuild(indexed_documents())
+        for query in ('juros', 'inflação noticia'):
+            expected = rebuilt.search(query)
+            actual = get_search_index().search(query)
+            self.assertEqual([news_id for news_id, _ in actual], [news_id for news_id, _ in expected])
+            for (_, score), (_, expected_score) in zip(actual, expected):
+                self.assertAlmostEqual(score, expected_score)
+
+    def test_rebuild_keeps_lines_written_during_rebuild(self):
+        index = get_search_index()
+
+        def documents():
+            # Notícia salva por outro processo enquanto o segmento é gerado
+            yield from indexed_documents()
+            index._append({'op': 'upsert', 'id': 999999, 'tf': {'eleicao': 3}})
+
+        index.rebuild(documents())
+
+        self.assertEqual([news_id for news_id, _ in index.search('eleicao')], [999999])
+        self.assertFalse(os.path.exists(index.rotated_journal_path))
+
+
+class NewsFeedCacheTests(TestCase):
+    """Cache do feed de leitores por conjunto de categorias preferidas"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.economia = Category.objects.get(name='Economia')
+        self.esportes = Category.objects.get(name='Esportes')
+        self.author = User.objects.create_user(username='autor_cache')
+        create_news(3, author=self.author, category=self.economia)
+        create_news(2, author=self.author, category=self.esportes)
+
+        self.readers = []
+        for username in ('leitor_a', 'leitor_b'):
+            reader = User.objects.create_user(username=username)
+            reader.profile.preferred_categories.set([self.economia])
+            self.readers.append(reader)
+
+    def _get(self, reader, url='/api/news/'):
+        self.client.force_authenticate(reader)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response, len(ctx.captured_queries)
+
+    def test_readers_with_same_preferences_share_feed(self):
+        first, miss_queries = self._get(self.readers[0])
+        second, hit_queries = self._get(self.readers[1])
+
+        self.assertEqual(first['X-Feed-Cache'], 'miss')
+        self.assertEqual(second['X-Feed-Cache'], 'hit')
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second.data['count'], 3)
+        self.assertLess(hit_queries, miss_queries)
+
+    def test_news_in_preferred_category_invalidates(self):
+        self._get(self.readers[0])
+        create_news(1, author=self.author, category=self.economia)
+
+        response, _ = self._get(self.readers[1])
+
+        self.assertEqual(response['X-Feed-Cache'], 'miss')
+        self.assertEqual(response.data['count'], 4)
+
+    def test_news_in_other_category_keeps_entry(self):
+        self._get(self.readers[0])
+        create_news(1, author=self.author, category=self.esportes)
+
+        response, _ = self._get(self.readers[1])
+        self.assertEqual(response['X-Feed-Cache'], 'hit')
+
+    def test_author_change_invalidates(self):
+        self._get(self.readers[0])
+        self.author.username = 'autor_renomeado'
+        self.author.save()
+
+        response, _ = self._get(self.readers[1])
+
+        self.assertEqual(response['X-Feed-Cache'], 'miss')
+        self.assertEqual(response.data['results'][0]['author']['username'], 'autor_renomeado')
+
+    def test_serves_stale_entry_while_another_request_refreshes(self):
+        first, _ = self._get(self.readers[0], '/api/news/my_preferences/')
+        create_news(1, author=self.author, category=self.economia)
+
+        # Outra requisição detém o lock de renderização
+        key = feed_cache.make_key('my_preferences', [self.economia.pk], first.wsgi_request)
+        cache.add(f'{key}:lock', True)
+        stale, _ = self._get(self.readers[1], '/api/news/my_preferences/')
+        cache.delete(f'{key}:lock')
+        fresh, _ = self._get(self.readers[1], '/api/news/my_preferences/')
+
+        self.assertEqual(stale['X-Feed-Cache'], 'stale')
+        self.assertEqual(stale.data['count'], 3)
+        self.assertEqual(fresh['X-Feed-Cache'], 'miss')
+        self.assertEqual(fresh.data['count'], 4)
+
+    def test_admin_feed_is_not_cached(self):
+        admin = User.objects.create_user(username='admin_cache', is_superuser=True)
+        response, _ = self._get(admin)
+        self.assertNotIn('X-Feed-Cache', response)
+
+
+class ConditionalResponseTests(TestCase):
+    """ETag / Last-Modified e 304 nas leituras de notícias e categorias"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.author = User.objects.create_user(username='autor_etag')
+        self.news = create_news(3, author=self.author)
+
+    def _revalidate(self, url):
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('Last-Modified', first)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        return first, second, len(ctx.captured_queries)
+
+    def test_unchanged_resources_return_304_without_serializing(self):
+        urls = [
+            '/api/news/',
+            f'/api/news/{self.news[0].id}/',
+            '/api/categories/',
+            f'/api/categories/{self.news[0].category_id}/',
+            '/api/preferences/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                first, second, queries = self._revalidate(url)
+                self.assertTrue(first['ETag'].startswith('"'))
+                self.assertEqual(second.status_code, 304)
+                self.assertEqual(second['ETag'], first['ETag'])
+                self.assertLessEqual(queries, 1)
+
+    def test_news_change_invalidates_feed_and_category_etags(self):
+        feed = self.client.get('/api/news/')
+        categories = self.client.get('/api/categories/')
+        detail = self.client.get(f'/api/news/{self.news[0].id}/')
+
+        self.news[0].title = 'Título revisado'
+        self.news[0].save()
+
+        for url, response in [('/api/news/', feed), ('/api/categories/', categories),
+                              (f'/api/news/{self.news[0].id}/', detail)]:
+            with self.subTest(url=url):
+                again = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(again.status_code, 200)
+                self.assertNotEqual(again['ETag'], response['ETag'])
+
+    def test_author_change_invalidates_feed_etag(self):
+        feed = self.client.get('/api/news/')
+
+        self.author.last_login = timezone.now()
+        self.author.save(update_fields=['last_login'])
+        unchanged = self.client.get('/api/news/', HTTP_IF_NONE_MATCH=feed['ETag'])
+
+        self.author.first_name = 'Renomeado'
+        self.author.save()
+        renamed = self.client.get('/api/news/', HTTP_IF_NONE_MATCH=feed['ETag'])
+
+        self.assertEqual(unchanged.status_code, 304)
+        self.assertEqual(renamed.status_code, 200)
+        self.assertEqual(renamed.data['results'][0]['author']['first_name'], 'Renomeado')
+
+    def test_etag_depends_on_query_and_preferences(self):
+        anonymous = self.client.get('/api/news/')
+        second_page = self.client.get('/api/news/', {'page_size': 1})
+
+        reader = User.objects.create_user(username='leitor_etag')
+        reader.profile.preferred_categories.set([self.news[0].category])
+        self.client.force_authenticate(reader)
+        preferred = self.client.get('/api/news/', HTTP_IF_NONE_MATCH=anonymous['ETag'])
+
+        self.assertNotEqual(second_page['ETag'], anonymous['ETag'])
+        self.assertEqual(preferred.status_code, 200)
+        self.assertNotEqual(preferred['ETag'], anonymous['ETag'])
+
+    def test_period_feed_has_no_etag(self):
+        response = self.client.get('/api/news/', {'period': 'day'})
+        self.assertNotIn('ETag', response)
+
+
+class FastListRenderingTests(TestCase):
+    """Caminho rápido (values() + orjson) com a mesma saída dos serializers"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        author = User.objects.create_user(username='autor_rapido', first_name='Ana', email='ana@example.com')
+        create_news(4, author=author)
+        create_news(3)
+        News.objects.filter(pk=News.objects.first().pk).update(summary='Linha\u2028separada, aspas "duplas"')
+
+    def test_list_matches_news_list_serializer_bytes(self):
+        response = self.client.get('/api/news/')
+        expected = NewsListSerializer(
+            News.objects.filter(is_active=True).order_by('-published_at')[:10], many=True
+        ).data
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(
+            json.loads(response.content)['results'], json.loads(JSONRenderer().render(expected))
+        )
+        self.assertEqual(ORJSONRenderer().render(response.data['results']), JSONRenderer().render(expected))
+
+    def test_my_preferences_matches_news_list_serializer(self):
+        reader = User.objects.create_user(username='leitor_rapido')
+        category = Category.objects.get(name='Economia')
+        reader.profile.preferred_categories.set([category])
+        self.client.force_authenticate(reader)
+
+        response = self.client.get('/api/news/my_preferences/')
+        expected = NewsListSerializer(
+            News.objects.filter(is_active=True, category=category).order_by('-published_at'), many=True
+        ).data
+        self.assertEqual(ORJSONRenderer().render(response.data['results']), JSONRenderer().render(expected))
+
+    def test_orjson_renderer_matches_json_renderer(self):
+        data = {
+            'quando': timezone.now(),
+            'valor': Decimal('10.50'),
+            'mensagem': gettext_lazy('Não encontrado'),
+            'texto': 'a\u2029b',
+            1: [True, None, 1.5],
+        }
+        self.assertEqual(ORJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_msgpack_content_negotiation(self):
+        json_response = self.client.get('/api/news/')
+        response = self.client.get('/api/news/', HTTP_ACCEPT='application/msgpack')
+
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(json_response.content))
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+
+
+# URLconf de AsyncReadViewTests: common.urls com ASYNC_READ_VIEWS ativo
+urlpatterns = [
+    path('api/', include(async_urlpatterns + common_urls.urlpatterns)),
+]
+
+
+@override_settings(ROOT_URLCONF='common.tests', QUERY_BUDGET_MODE='raise')
+class AsyncReadViewTests(TestCase):
+    """Views assíncronas (common.async_views) com as mesmas respostas das síncronas"""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='autor_async')
+        self.news = create_news(12, author=self.author)
+        self.reader = User.objects.create_user(username='leitor_async')
+        self.reader.profile.preferred_categories.set([self.news[0].category])
+
+    def _get(self, url, user=None, **headers):
+        """GET pela view assíncrona e pela síncrona da mesma rota"""
+        if user is not None:
+            headers['Authorization'] = self._bearer(user)
+        cache.clear()
+        response = async_to_sync(self.async_client.get)(url, headers=headers)
+        cache.clear()
+        with override_settings(ROOT_URLCONF='app.urls'):
+            return response, self.client.get(url, headers=headers)
+
+    def _bearer(self, user):
+        return f'Bearer {RefreshToken.for_user(user).access_token}'
+
+    def test_reads_match_sync_views(self):
+        category_id = self.news[0].category_id
+        urls = [
+            '/api/news/',
+            '/api/news/?page=2',
+            '/api/news/?cursor=',
+            f'/api/news/?category={category_id}&ordering=title',
+            f'/api/news/{self.news[0].id}/',
+            '/api/categories/',
+            f'/api/categories/{category_id}/',
+            '/api/preferences/',
+        ]
+        for url in urls:
+            for user in (None, self.reader):
+                with self.subTest(url=url, user=user):
+                    response, expected = self._get(url, user)
+                    self.assertEqual(response.status_code, expected.status_code)
+                    self.assertEqual(response.content, expected.content)
+                    self.assertEqual(response.get('ETag'), expected.get('ETag'))
+                    self.assertIn('Server-Timing', response)
+
+    def test_my_preferences(self):
+        response, expected = self._get('/api/news/my_preferences/', self.reader)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response['X-Feed-Cache'], 'miss')
+
+        anonymous, _ = self._get('/api/news/my_preferences/')
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous['WWW-Authenticate'], 'Bearer realm="api"')
+
+        self.reader.profile.delete()
+        missing, _ = self._get('/api/news/my_preferences/', self.reader)
+        self.assertEqual(missing.status_code, 404)
+        self.assertEqual(missing.json(), {'error': 'Perfil do usuário não encontrado'})
+
+    def test_errors_match_sync_views(self):
+        for url, status_code in [('/api/news/999999/', 404), ('/api/news/?category=999999', 400),
+                                 ('/api/categories/999999/', 404)]:
+            with self.subTest(url=url):
+                response, expected = self._get(url)
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual(response.content, expected.content)
+
+        invalid_token, _ = self._get('/api/news/', Authorization='Bearer invalido')
+        self.assertEqual(invalid_token.status_code, 401)
+
+    def test_revalidation_and_msgpack(self):
+        first, _ = self._get('/api/news/')
+        revalidated = async_to_sync(self.async_client.get)('/api/news/', headers={'If-None-Match': first['ETag']})
+        self.assertEqual(revalidated.status_code, 304)
+
+        response, expected = self._get('/api/news/', Accept='application/msgpack')
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json.loads(first.content))
+        self.assertEqual(response['ETag'], expected['ETag'])
+
+    def test_cached_feed_is_shared_with_sync_views(self):
+        headers = {'Authorization': self._bearer(self.reader)}
+        async_to_sync(self.async_client.get)('/api/news/', headers=headers)
+        with override_settings(ROOT_URLCONF='app.urls'):
+            self.assertEqual(self.client.get('/api/news/', headers=headers)['X-Feed-Cache'], 'hit')
+
+    def test_writes_use_sync_views(self):
+        response = async_to_sync(self.async_client.post)('/api/news/', {}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+        admin = User.objects.create_user(username='admin_async', is_superuser=True)
+        response = async_to_sync(self.async_client.patch)(
+            f'/api/categories/{self.news[0].category_id}/', {'description': 'Revisada'},
+            content_type='application/json', headers={'Authorization': self._bearer(admin)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Category.objects.get(pk=self.news[0].category_id).description, 'Revisada')
+
+
+@override_settings(DATABASE_REPLICAS=['replica_1'], DATABASE_PRIMARY_PIN_SECONDS=5)
+class DatabaseRoutingTests(TestCase):
+    """Leituras na réplica, escritas no primário e fixação após escritas"""
+
+    def setUp(self):
+        cache.clear()
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+
+    def _route(self, request, write=False, status=200):
+        """Bancos de leitura vistos pela view antes e depois de uma eventual escrita"""
+        seen = {}
+
+        def view(request):
+            seen['read'] = self.router.db_for_read(News)
+            if write:
+                seen['write'] = self.router.db_for_write(News)
+                seen['read_after_write'] = self.router.db_for_read(News)
+            return HttpResponse(status=status)
+
+        response = DatabaseRoutingMiddleware(view)(request)
+        return seen, response
+
+    def test_reads_use_replica_and_writes_use_primary(self):
+        seen, _ = self._route(self.factory.get('/api/news/'))
+        self.assertEqual(seen['read'], 'replica_1')
+
+        seen, _ = self._route(self.factory.post('/api/news/'), write=True)
+        self.assertEqual(seen, {'read': 'default', 'write': 'default', 'read_after_write': 'default'})
+
+        # Fora de requisições (comandos, shell): banco padrão
+        self.assertIsNone(self.router.db_for_read(News))
+        self.assertFalse(self.router.allow_migrate('replica_1', 'common'))
+        self.assertIsNone(self.router.allow_migrate('default', 'common'))
+
+    def test_write_during_read_request_switches_to_primary(self):
+        seen, _ = self._route(self.factory.get('/api/news/'), write=True)
+        self.assertEqual(seen['read'], 'replica_1')
+        self.assertEqual(seen['read_after_write'], 'default')
+
+    def test_successful_write_pins_client_to_primary(self):
+        token = {'HTTP_AUTHORIZATION': 'Bearer token-do-leitor'}
+        _, response = self._route(self.factory.patch('/api/profiles/me/', **token))
+        self.assertIn(DatabaseRoutingMiddleware.pin_cookie, response.cookies)
+
+        seen, _ = self._route(self.factory.get('/api/news/', **token))
+        self.assertEqual(seen['read'], 'default')
+        seen, _ = self._route(self.factory.get('/api/news/', HTTP_AUTHORIZATION='Bearer outro'))
+        self.assertEqual(seen['read'], 'replica_1')
+
+        cookie_client = self.factory.get('/api/news/')
+        cookie_client.COOKIES[DatabaseRoutingMiddleware.pin_cookie] = '1'
+        seen, _ = self._route(cookie_client)
+        self.assertEqual(seen['read'], 'default')
+
+        cache.clear()
+        seen, _ = self._route(self.factory.get('/api/news/', **token))
+        self.assertEqual(seen['read'], 'replica_1')
+
+    def test_failed_write_does_not_pin(self):
+        token = {'HTTP_AUTHORIZATION': 'Bearer token-do-leitor'}
+        _, response = self._route(self.factory.post('/api/news/', **token), status=400)
+        self.assertNotIn(DatabaseRoutingMiddleware.pin_cookie, response.cookies)
+
+        seen, _ = self._route(self.factory.get('/api/news/', **token))
+        self.assertEqual(seen['read'], 'replica_1')
+
+    def test_async_requests_are_routed(self):
+        seen = {}
+
+        async def view(request):
+            seen['read'] = self.router.db_for_read(News)
+            return HttpResponse()
+
+        async_to_sync(DatabaseRoutingMiddleware(view))(self.factory.get('/api/news/'))
+        self.assertEqual(seen['read'], 'replica_1')
+        self.assertIsNone(self.router.db_for_read(News))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_query_share_is_reported_per_database(self):
+        measured = []
+
+        def receiver(sender, **kwargs):
+            measured.append(kwargs)
+
+        query_budget_measured.connect(receiver)
+        try:
+            self.client.get('/api/news/')
+        finally:
+            query_budget_measured.disconnect(receiver)
+
+        self.assertEqual(measured[0]['queries_by_alias'], {'default': measured[0]['queries']})
+
+
+UPLOAD_TEXTS = [
+    f'Notícia {i} do upload: o governo anunciou hoje novas medidas para a economia do país.'
+    for i in range(3)
+]
+
+
+# Sem OPENAI_API_KEY: extração e classificação sem IA
+@mock.patch.dict(os.environ, {'OPENAI_API_KEY': ''})
+@override_settings(UPLOAD_JOBS_EAGER=True, QUERY_BUDGET_MODE='raise')
+class UploadJobTests(TestCase):
+    """Upload de notícias processado como job (common.upload_jobs)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin_upload')
+        cls.admin.profile.user_type = 'admin'
+        cls.admin.profile.save()
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _upload(self, texts):
+        file = SimpleUploadedFile(
+            'noticias.json', json.dumps([{'noticia': text} for text in texts]).encode('utf-8'),
+            content_type='application/json'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/api/news/upload-json/', {'file': file})
+
+    def test_upload_is_accepted_as_job_and_processed(self):
+        with override_settings(UPLOAD_JOBS_EAGER=False), \
+                mock.patch('common.upload_jobs.publish_upload_job', return_value=True) as publish:
+            response = self._upload(UPLOAD_TEXTS)
+
+        self.assertEqual(response.status_code, 202)
+        job = UploadJob.objects.get(pk=response.json()['job_id'])
+        publish.assert_called_once_with(job.id)
+        self.assertEqual((job.status, job.total_count), ('pending', 3))
+        self.assertEqual(News.objects.count(), 0)
+
+        status_url = response.json()['status_url']
+        self.assertEqual(self.client.get(status_url).json()['status'], 'pending')
+
+        run_upload_job(job.id)
+        data = self.client.get(status_url).json()
+        self.assertEqual(data['status'], 'completed')
+        self.assertEqual((data['processed_count'], data['success_count'], data['error_count']), (3, 3, 0))
+        self.assertEqual([item['index'] for item in data['results']], [1, 2, 3])
+        self.assertEqual(
+            {item['news_id'] for item in data['results']}, set(News.objects.values_list('id', flat=True))
+        )
+
+        # Job concluído não é reprocessado
+        self.assertIsNone(run_upload_job(job.id))
+        self.assertEqual(News.objects.count(), 3)
+
+    def test_eager_upload_records_item_errors(self):
+        # Como em produção (autocommit), o job roda dentro da requisição, fora do orçamento dela
+        with mock.patch('common.upload_jobs.transaction.on_commit', side_effect=lambda func: func()):
+            response = self._upload(UPLOAD_TEXTS[:1])
+        job = UploadJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual((job.status, job.success_count), ('completed', 1))
+
+        job = create_upload_job(self.admin, 'vazio.json', [{'noticia': '   '}])
+        run_upload_job(job.id)
+        item = job.items.get()
+        self.assertEqual((item.status, item.message), ('error', 'Conteúdo da notícia está vazio'))
+
+    def test_interrupted_job_resumes_from_pending_items(self):
+        with override_settings(UPLOAD_JOBS_EAGER=False), \
+                mock.patch('common.upload_jobs.publish_upload_job', return_value=False):
+            job_id = self._upload(UPLOAD_TEXTS).json()['job_id']
+
+        # Worker caiu após concluir o item 1; o item 2 tem a notícia criada
+        # sem resultado (gravação notícia a notícia de versões anteriores)
+        with mock.patch('common.upload_jobs.write_upload_items', side_effect=KeyboardInterrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                run_upload_job(job_id)
+        job = UploadJob.objects.select_related('user').get(pk=job_id)
+        first, second, _ = job.items.all()
+        write_upload_items(job, [first])
+        extraction = extract_upload_item(second)
+        news = News.objects.create(
+            title=extraction['title'], content=extraction['content'], source=extraction['source'],
+            category=Category.objects.get(name=extraction['category']), author=job.user
+        )
+        UploadJobItem.objects.filter(pk=second.pk).update(news=news, message='Notícia criada com sucesso')
+        self.assertEqual(News.objects.count(), 2)
+
+        # Heartbeat recente: o job continua com o worker original
+        self.assertEqual(stale_upload_jobs(), [])
+        self.assertIsNone(run_upload_job(job_id))
+
+        UploadJob.objects.filter(pk=job_id).update(heartbeat_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(stale_upload_jobs(), [job_id])
+        call_command('process_upload_jobs', '--once', stdout=StringIO())
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts, job.success_count, job.error_count), ('completed', 2, 3, 0))
+        self.assertEqual(News.objects.count(), 3)
+        self.assertEqual(
+            list(job.items.values_list('news_id', flat=True)),
+            list(News.objects.order_by('id').values_list('id', flat=True))
+        )
+
+    @override_settings(UPLOAD_JOB_CONCURRENCY=3, LLM_BATCH_SIZE=1)
+    def test_ai_steps_run_concurrently_and_results_keep_file_order(self):
+        from . import services
+        extract = services.extract_news_info_from_content
+        lock = threading.Lock()
+        running, peak = 0, 0
+
+        def slow_extract(content):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            # Itens do começo do arquivo terminam por último
+            time.sleep(0.05 * (10 - int(content.split()[1])))
+            with lock:
+                running -= 1
+            return extract(content)
+
+        texts = [f'Notícia {i} do upload: o governo anunciou hoje novas medidas para a economia.' for i in range(6)]
+        with mock.patch.object(services, 'extract_news_info_from_content', slow_extract):
+            job = run_upload_job(create_upload_job(self.admin, 'noticias.json', [{'noticia': t} for t in texts]).id)
+
+        self.assertEqual(peak, 3)
+        self.assertEqual(job.success_count, 6)
+        items = list(job.items.select_related('news'))
+        self.assertEqual([item.news.title for item in items], [extract(t)['data']['title'] for t in texts])
+        news_ids = [item.news_id for item in items]
+        self.assertEqual(news_ids, sorted(news_ids))
+
+    @override_settings(UPLOAD_JOB_WRITE_CHUNK=2)
+    def test_news_are_written_once_with_analysis_in_chunks(self):
+        job = create_upload_job(self.admin, 'noticias.json', [{'noticia': text} for text in UPLOAD_TEXTS])
+        category = Category.objects.get(name=extract_upload_item(job.items.first())['category'])
+        count_before = category.active_news_count
+        with CaptureQueriesContext(connection) as queries:
+            job = run_upload_job(job.id)
+
+        statements = [query['sql'] for query in queries.captured_queries]
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "common_news"')]), 2)
+        self.assertFalse([sql for sql in statements if sql.startswith('UPDATE "common_news"')])
+        self.assertEqual(len([sql for sql in statements if 'FROM "common_category"' in sql]), 1)
+
+        self.assertEqual((job.status, job.success_count), ('completed', 3))
+        self.assertFalse(News.objects.filter(analysis_timestamp__isnull=True).exists())
+        category.refresh_from_db()
+        self.assertEqual(category.active_news_count, count_before + 3)
+        item = job.items.first()
+        self.assertRegex(item.message, r'^Notícia criada com sucesso \(IA: .+, confiança: [\d.]+\) \| Análise: \w+$')
+        self.assertEqual(item.title, item.news.title)
+
+    def test_item_messages_report_analysis_and_category_errors(self):
+        job = create_upload_job(self.admin, 'noticias.json', [{'noticia': text} for text in UPLOAD_TEXTS[:2]])
+        items = list(job.items.all())
+        extractions = [extract_upload_item(item) for item in items]
+        extractions[1] = dict(extractions[1], category='Inexistente')
+
+        with mock.patch.object(NewsAnalysisService, 'apply_analysis', side_effect=RuntimeError('sem léxico')):
+            write_upload_items(job, items, extractions)
+
+        first, second = job.items.all()
+        self.assertEqual(first.status, 'success')
+        self.assertTrue(first.message.endswith(' | Análise: falhou - sem léxico'))
+        self.assertEqual(
+            (second.status, second.message), ('error', "Erro ao processar: Categoria 'Inexistente' não encontrada.")
+        )
+
+    def test_failed_chunk_is_written_item_by_item(self):
+        bulk_create = News.objects.bulk_create
+
+        def failing_bulk_create(objs, *args, **kwargs):
+            if any(news.title.startswith('Notícia 1 ') for news in objs):
+                raise IntegrityError('valor inválido')
+            return bulk_create(objs, *args, **kwargs)
+
+        job = create_upload_job(
+            self.admin, 'noticias.json', [{'noticia': text} for text in UPLOAD_TEXTS] + [{'noticia': ''}]
+        )
+        with mock.patch.object(News.objects, 'bulk_create', side_effect=failing_bulk_create):
+            job = run_upload_job(job.id)
+
+        self.assertEqual((job.status, job.success_count, job.error_count), ('completed', 2, 2))
+        self.assertEqual(
+            list(job.items.values_list('status', 'message')[1:]),
+            [('error', 'Erro ao processar: valor inválido'), ('success', mock.ANY),
+             ('error', 'Conteúdo da notícia está vazio')]
+        )
+        self.assertEqual(News.objects.count(), 2)
+        self.assertFalse(job.items.filter(status='error', news__isnull=False).exists())
+
+    def test_exhausted_job_is_marked_failed(self):
+        job = create_upload_job(self.admin, 'noticias.json', [{'noticia': UPLOAD_TEXTS[0]}])
+        UploadJob.objects.filter(pk=job.pk).update(
+            status='processing', attempts=3, heartbeat_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(stale_upload_jobs(), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'failed')
+
+    def test_status_is_visible_to_owner_and_admins_only(self):
+        job = create_upload_job(self.admin, 'noticias.json', [{'noticia': UPLOAD_TEXTS[0]}])
+        url = reverse('upload_job_status', args=[job.id])
+
+        self.client.force_login(User.objects.create_user(username='leitor_upload'))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        other_admin = User.objects.create_user(username='outro_admin', is_superuser=True)
+        self.client.force_login(other_admin)
+        self.assertEqual(self.client.get(url).json()['results'][0]['status'], 'pending')
+
+    def test_jsonl_gzip_upload_is_streamed_into_job(self):
+        body = gzip.compress(''.join(json.dumps({'noticia': text}) + '\n' for text in UPLOAD_TEXTS).encode('utf-8'))
+        file = SimpleUploadedFile('noticias.jsonl.gz', body, content_type='application/gzip')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/news/upload-json/', {'file': file})
+
+        self.assertEqual(response.status_code, 202)
+        job = UploadJob.objects.get(pk=response.json()['job_id'])
+        self.assertEqual((job.status, job.total_count, job.success_count), ('completed', 3, 3))
+
+    def test_invalid_item_rejects_upload_without_job(self):
+        response = self._upload(UPLOAD_TEXTS[:2] + ['curta'])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.json()['details']['file'],
+            ['Item 3: conteúdo da notícia muito curto (mínimo 50 caracteres).']
+        )
+        self.assertFalse(UploadJob.objects.exists())
+        self.assertFalse(UploadJobItem.objects.exists())
+
+    def test_readers_cannot_upload(self):
+        self.client.force_login(User.objects.create_user(username='leitor_upload'))
+        response = self._upload(UPLOAD_TEXTS[:1])
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(UploadJob.objects.exists())
+
+
+class RateLimiterTests(TestCase):
+    """Baldes de requisições e tokens por minuto (common.rate_limit)"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.slept = []
+
+    def _limiter(self, requests_per_minute, tokens_per_minute):
+        def sleep(seconds):
+            self.slept.append(seconds)
+            self.now += seconds
+        return RateLimiter(requests_per_minute, tokens_per_minute, clock=lambda: self.now, sleep=sleep)
+
+    def test_requests_per_minute(self):
+        limiter = self._limiter(60, 0)
+        for _ in range(60):
+            self.assertEqual(limiter.acquire(), 0)
+        self.assertAlmostEqual(limiter.acquire(), 1.0)
+        self.now += 10
+        self.assertEqual(limiter.acquire(), 0)
+
+    def test_tokens_per_minute(self):
+        limiter = self._limiter(0, 1200)
+        self.assertEqual(limiter.acquire(1000), 0)
+        # Faltam 200 tokens, repostos a 20 por segundo
+        self.assertAlmostEqual(limiter.acquire(400), 10.0)
+        self.assertEqual(self.slept, [10.0])
+
+    def test_concurrent_callers_queue_behind_each_other(self):
+        limiter = self._limiter(0, 600)
+        waits = [limiter.acquire(600) for _ in range(3)]
+        self.assertEqual(waits[0], 0)
+        self.assertAlmostEqual(waits[1], 60.0)
+        # Reservada quando o relógio já tinha avançado 60 s
+        self.assertAlmostEqual(waits[2], 60.0)
+
+    def test_estimate_tokens_counts_prompt_and_completion(self):
+        messages = [{'role': 'system', 'content': 'a' * 40}, {'role': 'user', 'content': 'b' * 360}]
+        self.assertEqual(estimate_tokens(messages, max_tokens=50), 150)
+
+
+class FakeOpenAI:
+    """Cliente da OpenAI com respostas roteiradas pelo prompt de sistema"""
+
+    def __init__(self, batch_reply, **kwargs):
+        self.batch_reply = batch_reply
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        system = kwargs['messages'][0]['content']
+        self.calls.append(system)
+        if 'classificação de notícias' in system and 'extração' in system:
+            content = self.batch_reply(kwargs)
+        elif 'extração' in system:
+            content = json.dumps({'title': 'Título individual', 'content': 'Texto', 'summary': 'Resumo', 'source': ''})
+        else:
+            content = 'Economia,0.9'
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+@mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'sk-teste'})
+@override_settings(LLM_REQUESTS_PER_MINUTE=0, LLM_TOKENS_PER_MINUTE=0, LLM_CACHE_TIMEOUT=0)
+class BatchExtractionTests(TestCase):
+    """Extração e classificação de várias notícias por chamada (extract_and_classify_news_batch)"""
+
+    contents = [f'Texto da notícia {i} sobre o mercado financeiro e a bolsa de valores.' for i in range(3)]
+
+    def _run(self, batch_reply):
+        client = FakeOpenAI(batch_reply)
+        with mock.patch('common.llm_gateway._gateway', None), \
+                mock.patch('common.llm_gateway.OpenAI', return_value=client):
+            return extract_and_classify_news_batch(self.contents), client.calls
+
+    def test_one_call_for_the_whole_batch(self):
+        def reply(kwargs):
+            self.assertEqual(kwargs['response_format'], {'type': 'json_object'})
+            return json.dumps({'noticias': [
+                {'id': i, 'title': f'Título {i}', 'summary': 'Resumo', 'source': 'Agência',
+                 'category': 'Economia', 'confidence': 0.9}
+                for i in reversed(range(3))
+            ]})
+
+        results, calls = self._run(reply)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual([r['data']['title'] for r in results], ['Título 0', 'Título 1', 'Título 2'])
+        self.assertEqual([r['data']['content'] for r in results], self.contents)
+        self.assertEqual(results[0]['classification'], {'category': 'Economia', 'confidence': 0.9, 'method': 'openai'})
+
+    def test_invalid_entries_fall_back_to_single_calls(self):
+        def reply(kwargs):
+            return json.dumps({'noticias': [
+                {'id': 0, 'title': 'Título 0', 'summary': 'Resumo', 'source': '', 'category': 'Economia',
+                 'confidence': 'alta'},
+                {'id': 1, 'title': '', 'category': 'Economia'},
+            ]})
+
+        results, calls = self._run(reply)
+        # Lote + extração e classificação individuais das notícias 1 e 2
+        self.assertEqual(len(calls), 5)
+        self.assertEqual(results[0]['method'], 'openai_batch')
+        self.assertEqual(results[0]['classification']['confidence'], 0.5)
+        self.assertEqual(results[0]['data']['source'], 'Fonte não identificada')
+        self.assertEqual([r['data']['title'] for r in results[1:]], ['Título individual'] * 2)
+        self.assertEqual(results[1]['classification']['method'], 'openai')
+
+    def test_unparseable_response_falls_back_for_every_item(self):
+        results, calls = self._run(lambda kwargs: 'não é JSON')
+        self.assertEqual(len(calls), 7)
+        self.assertTrue(all(r['success'] for r in results))
+
+    @override_settings(LLM_BATCH_SIZE=4, LLM_BATCH_MAX_TOKENS=2000)
+    def test_batches_respect_size_and_token_budget(self):
+        self.assertEqual(batch_news_contents(['curta'] * 6), [[0, 1, 2, 3], [4, 5]])
+        self.assertEqual(batch_news_contents(['x' * 1800] * 3 + ['curta']), [[0, 1], [2, 3]])
+        # Uma notícia acima do limite forma um lote sozinha
+        self.assertEqual(batch_news_contents(['x' * 2000, 'curta'], max_tokens=500), [[0], [1]])
+
+
+class LLMGatewayTests(TestCase):
+    """Retentativas e métricas do gateway da OpenAI (common.llm_gateway)"""
+
+    def setUp(self):
+        self.slept = []
+        self.replies = []
+        self.gateway = LLMGateway(
+            'sk-teste', tasks={'classification': {'model': 'modelo-rapido', 'timeout': 5}},
+            default_model='modelo-padrao', max_retries=2, sleep=self.slept.append,
+        )
+        self.gateway.client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=self.create)))
+        self.requests = []
+
+    def create(self, **kwargs):
+        self.requests.append(kwargs)
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=reply))],
+            usage=SimpleNamespace(prompt_tokens=120, completion_tokens=8),
+        )
+
+    def test_task_model_and_timeout(self):
+        self.replies = ['Economia,0.9', 'ok']
+        self.gateway.complete('classification', [{'role': 'user', 'content': 'texto'}], max_tokens=50)
+        self.gateway.complete('extraction', [{'role': 'user', 'content': 'texto'}])
+        self.assertEqual(
+            [(r['model'], r['timeout']) for r in self.requests], [('modelo-rapido', 5), ('modelo-padrao', 30)]
+        )
+        self.assertEqual(self.requests[0]['max_tokens'], 50)
+
+    def test_transient_errors_are_retried_with_backoff(self):
+        measured = []
+
+        def receiver(sender, **kwargs):
+            measured.append(kwargs)
+
+        self.replies = [openai.APITimeoutError(request=None), openai.APIConnectionError(request=None), 'ok']
+        llm_call_measured.connect(receiver)
+        try:
+            response = self.gateway.complete('classification', [{'role': 'user', 'content': 'texto'}])
+        finally:
+            llm_call_measured.disconnect(receiver)
+
+        self.assertEqual(response.choices[0].message.content, 'ok')
+        self.assertEqual(len(self.slept), 2)
+        self.assertTrue(0 <= self.slept[0] <= 1.0 and 0 <= self.slept[1] <= 2.0)
+        self.assertEqual(measured[0]['attempts'], 3)
+        self.assertEqual((measured[0]['prompt_tokens'], measured[0]['completion_tokens']), (120, 8))
+        usage = self.gateway.usage['classification']
+        self.assertEqual((usage['calls'], usage['retries'], usage['prompt_tokens']), (1, 2, 120))
+
+    def test_gives_up_after_max_retries_and_does_not_retry_other_errors(self):
+        self.replies = [openai.APITimeoutError(request=None)] * 3
+        with self.assertRaises(openai.APITimeoutError):
+            self.gateway.complete('classification', [{'role': 'user', 'content': 'texto'}])
+        self.assertEqual(len(self.requests), 3)
+
+        self.replies = [ValueError('resposta inválida')]
+        with self.assertRaises(ValueError):
+            self.gateway.complete('classification', [{'role': 'user', 'content': 'texto'}])
+        self.assertEqual(len(self.requests), 4)
+        self.assertEqual(self.gateway.usage['classification']['errors'], 2)
+
+
+def batch_reply(kwargs):
+    """Resposta válida da FakeOpenAI para todas as notícias do lote"""
+    articles = kwargs['messages'][1]['content'].split('Notícias:\n', 1)[1].splitlines()
+    return json.dumps({'noticias': [
+        {'id': json.loads(article)['id'], 'title': f'Título {json.loads(article)["id"]}', 'summary': 'Resumo',
+         'source': 'Agência', 'category': 'Economia', 'confidence': 0.9}
+        for article in articles
+    ]})
+
+
+@mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'sk-teste'})
+@override_settings(LLM_REQUESTS_PER_MINUTE=0, LLM_TOKENS_PER_MINUTE=0, LLM_CACHE_TIMEOUT=3600)
+class LLMCacheTests(TestCase):
+    """Cache dos resultados da OpenAI (common.llm_cache)"""
+
+    contents = [f'Texto da notícia {i} sobre o mercado financeiro e a bolsa de valores.' for i in range(3)]
+
+    def setUp(self):
+        self.client = FakeOpenAI(batch_reply)
+        patches = [mock.patch('common.llm_gateway._gateway', None),
+                   mock.patch('common.llm_gateway.OpenAI', return_value=self.client)]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_key_ignores_formatting_but_not_task_model_or_prompt_version(self):
+        key = cache_key('extraction', 'modelo', 1, 'Governo anuncia\n  medidas ')
+        self.assertEqual(key, cache_key('extraction', 'modelo', 1, ' Governo  anuncia medidas'))
+        # "é" composto (NFD) e pré-composto (NFC)
+        self.assertEqual(cache_key('extraction', 'modelo', 1, 'e\u0301'), cache_key('extraction', 'modelo', 1, 'é'))
+        self.assertNotEqual(key, cache_key('classification', 'modelo', 1, 'Governo anuncia medidas'))
+        self.assertNotEqual(key, cache_key('extraction', 'outro', 1, 'Governo anuncia medidas'))
+        self.assertNotEqual(key, cache_key('extraction', 'modelo', 2, 'Governo anuncia medidas'))
+
+    def test_repeated_batch_is_served_from_cache(self):
+        first = extract_and_classify_news_batch(self.contents)
+        before = llm_cache.totals()
+        second = extract_and_classify_news_batch(self.contents[::-1])
+
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual([r['data']['title'] for r in second], [r['data']['title'] for r in first][::-1])
+        self.assertEqual([r['data']['content'] for r in second], self.contents[::-1])
+        self.assertEqual((llm_cache.totals() - before)['hit'], 3)
+        self.assertEqual(set(LLMCacheEntry.objects.values_list('hits', flat=True)), {1})
+
+    def test_single_extraction_is_cached(self):
+        extract_news_info_from_content('Texto bruto da notícia')
+        result = extract_news_info_from_content('Texto  bruto da notícia\n')
+        self.assertEqual(len(self.client.calls), 1)
+        self.assertEqual(result['data']['title'], 'Título individual')
+
+    def test_bypass_refreshes_entries(self):
+        extract_and_classify_news_batch(self.contents[:1])
+        LLMCacheEntry.objects.update(response={'title': 'Antigo', 'category': 'Economia'}, hits=5)
+        with llm_cache_bypass():
+            result = extract_and_classify_news_batch(self.contents[:1])[0]
+
+        self.assertEqual(len(self.client.calls), 2)
+        self.assertEqual(result['data']['title'], 'Título 0')
+        entry = LLMCacheEntry.objects.get()
+        self.assertEqual((entry.response['title'], entry.hits), ('Título 0', 0))
+
+    def test_expired_and_least_used_entries_are_evicted(self):
+        extract_and_classify_news_batch(self.contents)
+        keys = [cache_key('extract_classify', 'gpt-3.5-turbo', 1, content) for content in self.contents]
+        LLMCacheEntry.objects.filter(key=keys[0]).update(created_at=timezone.now() - timedelta(hours=2))
+        LLMCacheEntry.objects.filter(key=keys[1]).update(last_hit_at=timezone.now() + timedelta(minutes=1))
+
+        # Expirada: não é usada
+        extract_and_classify_news_batch(self.contents[:1])
+        self.assertEqual(len(self.client.calls), 2)
+
+        LLMCacheEntry.objects.filter(key=keys[0]).update(created_at=timezone.now() - timedelta(hours=2))
+        with override_settings(LLM_CACHE_MAX_ENTRIES=1):
+            self.assertEqual(llm_cache.prune(), 2)
+        self.assertEqual(list(LLMCacheEntry.objects.values_list('key', flat=True)), [keys[1]])
+
+
+@mock.patch.dict(os.environ, {'OPENAI_API_KEY': 'sk-teste'})
+@override_settings(
+    LLM_REQUESTS_PER_MINUTE=0, LLM_TOKENS_PER_MINUTE=0, LLM_CACHE_TIMEOUT=3600, UPLOAD_JOB_CONCURRENCY=1,
+    UPLOAD_JOBS_EAGER=True
+)
+class UploadJobLLMCacheTests(TransactionTestCase):
+    """
+    Cache da IA nos jobs de upload. A etapa de IA consulta o cache nas
+    threads do pool, que só enxergam dados já commitados (TransactionTestCase).
+    """
+
+    def setUp(self):
+        self.client = FakeOpenAI(batch_reply)
+        patches = [mock.patch('common.llm_gateway._gateway', None),
+                   mock.patch('common.llm_gateway.OpenAI', return_value=self.client)]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.admin = User.objects.create_user(username='admin_cache', is_superuser=True)
+        Category.objects.get_or_create(name='Economia', defaults={'slug': 'economia'})
+
+    def test_repeated_upload_uses_cache_unless_refresh_is_requested(self):
+        payload = [{'noticia': content} for content in LLMCacheTests.contents[:2]]
+
+        # Com UPLOAD_JOBS_EAGER o job roda no commit da criação (autocommit)
+        create_upload_job(self.admin, 'noticias.json', payload)
+        create_upload_job(self.admin, 'noticias.json', payload)
+        self.assertEqual(len(self.client.calls), 1)
+
+        job = create_upload_job(self.admin, 'noticias.json', payload, refresh_llm_cache=True)
+        self.assertEqual(len(self.client.calls), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.success_count), ('completed', 2))
+
+
+class NewsUploadParsingTests(TestCase):
+    """Leitura incremental dos arquivos de upload (common.news_upload)"""
+
+    items = [
+        {'noticia': f'Notícia {i}: "aspas", barra \\ e acentuação — o governo anunciou medidas.', 'n': i * 1.5}
+        for i in range(5)
+    ]
+
+    def _parse(self, body, name='noticias.json', chunk_chars=7):
+        file = SimpleUploadedFile(name, body if isinstance(body, bytes) else body.encode('utf-8'))
+        return list(iter_upload_news(file, chunk_chars=chunk_chars))
+
+    def _error(self, body, name='noticias.json'):
+        with self.assertRaises(UploadFormatError) as context:
+            self._parse(body, name)
+        return str(context.exception)
+
+    def test_formats_are_parsed_across_read_boundaries(self):
+        array = json.dumps(self.items, ensure_ascii=False, indent=2)
+        lines = '\n'.join(json.dumps(item) for item in self.items) + '\n'
+        self.assertEqual(self._parse(array), self.items)
+        self.assertEqual(self._parse('\ufeff' + array), self.items)
+        self.assertEqual(self._parse(lines, 'noticias.jsonl'), self.items)
+        self.assertEqual(self._parse(gzip.compress(lines.encode('utf-8')), 'noticias.ndjson.gz'), self.items)
+        # gzip reconhecido pelo conteúdo
+        self.assertEqual(self._parse(gzip.compress(array.encode('utf-8')), 'noticias.json'), self.items)
+
+    def test_items_are_yielded_before_the_end_of_the_file(self):
+        body = json.dumps(self.items[:2])[:-1] + ', {"noticia": '
+        file = SimpleUploadedFile('noticias.json', body.encode('utf-8'))
+        news = iter_upload_news(file, chunk_chars=16)
+        self.assertEqual([next(news), next(news)], self.items[:2])
+        with self.assertRaisesMessage(UploadFormatError, 'Arquivo JSON inválido (item 3)'):
+            next(news)
+
+    def test_invalid_files_are_reported(self):
+        text = self.items[0]['noticia']
+        self.assertEqual(self._error('{"noticia": "x"}'), 'O arquivo JSON deve conter uma lista de notícias.')
+        self.assertEqual(self._error(' [ ] '), 'O arquivo JSON não pode estar vazio.')
+        self.assertEqual(self._error('\n\n', 'noticias.jsonl'), 'O arquivo JSON não pode estar vazio.')
+        self.assertEqual(self._error(json.dumps([{'noticia': text}, 'x'])), 'Item 2: deve ser um objeto JSON.')
+        self.assertEqual(self._error(json.dumps([{'texto': text}])), "Item 1: campo 'noticia' é obrigatório.")
+        self.assertEqual(self._error(json.dumps([{'noticia': text}]) + '[]'),
+                         'Arquivo JSON inválido: conteúdo após o fim da lista.')
+        self.assertTrue(self._error(f'[{json.dumps({"noticia": text})} {{}}]').startswith('Arquivo JSON inválido (item 1)'))
+        self.assertEqual(self._error('[{"noticia": "\xe9"}]'.encode('latin-1')), 'Erro de codificação. Use UTF-8.')
+        self.assertTrue(self._error(b'\x1f\x8b' + b'0' * 20).startswith('Arquivo gzip inválido'))
+
+    @override_settings(NEWS_UPLOAD_MAX_ITEM_CHARS=100)
+    def test_item_size_is_bounded(self):
+        self.assertEqual(
+            self._error(json.dumps([{'noticia': 'x' * 500}])),
+            'Item 1: notícia maior que o limite de 100 caracteres.'
+        )
+
+    @override_settings(NEWS_UPLOAD_MAX_DECOMPRESSED_BYTES=1024 * 1024)
+    def test_decompressed_size_is_bounded(self):
+        # ~2 MB de notícias em um .gz de poucos KB
+        body = '\n'.join(json.dumps(self.items[0]) for _ in range(25000)).encode('utf-8')
+        compressed = gzip.compress(body)
+        self.assertLess(len(compressed), 64 * 1024)
+        self.assertEqual(
+            self._error(compressed, 'noticias.jsonl.gz'),
+            'Arquivo muito grande depois de descomprimido. Tamanho máximo: 1MB.'
+        )
+
+    @override_settings(NEWS_UPLOAD_MAX_ITEMS=3)
+    def test_item_count_is_bounded(self):
+        self.assertEqual(self._parse(json.dumps(self.items[:3])), self.items[:3])
+        self.assertEqual(self._error(json.dumps(self.items)), 'Arquivo com mais de 3 notícias.')
+
+
+class KeywordAutomatonTests(TestCase):
+    def test_all_keywords_are_found_in_one_pass(self):
+        automaton = KeywordAutomaton([
+            ('bolsa', 'economia', 2),
+            ('bolsa de valores', 'economia', 1),
+            ('valores', 'etica', 1),
+            ('bolsa', 'educacao', 1),
+        ])
+        scores = automaton.scores(tokenize('A Bolsa de Valores subiu; a bolsa fechou em alta.'))
+        # Cada palavra-chave conta uma vez por texto, inclusive as sobrepostas
+        self.assertEqual(scores, {'economia': 3, 'etica': 1, 'educacao': 1})
+        self.assertEqual(automaton.scores(tokenize('bolsa de estudos')), {'economia': 2, 'educacao': 1})
+
+    def test_keywords_respect_word_boundaries(self):
+        automaton = KeywordAutomaton([('ia', 'tecnologia', 1), ('bem-estar', 'saude', 1)])
+        self.assertEqual(automaton.scores(tokenize('Um dia de sol na praia')), {})
+        self.assertEqual(automaton.scores(tokenize('A IA e o bem estar')), {'tecnologia': 1, 'saude': 1})
+
+    def test_classifiers_use_whole_words(self):
+        text = 'O dia na praia teve happy hour e muita alegria.'
+        self.assertEqual(CategoryClassifier().classify_category(text)['suggested_category'], None)
+        self.assertEqual(AINewsClassifier()._classify_with_keywords(text, '')['method'], 'default')
+
+        text = 'O Ministério da Saúde ampliou a vacinação; o governo anunciou a vacina no hospital.'
+        result = CategoryClassifier().classify_category(text)
+        self.assertEqual(result['suggested_category'], 'Saúde')
+        # ministério da saúde, saúde, vacinação, vacina, hospital (peso 2); governo conta para Política
+        self.assertEqual(result['scores']['Saúde'], round(10 / len(tokenize(text)) * 100, 2))
+        self.assertEqual(EntityExtractor().identify_context(text), ['politica', 'saude'])
+        self.assertEqual(AINewsClassifier()._classify_with_keywords(text, '')['category'], 'Saúde')
+
+
+class EntityExtractionTests(TestCase):
+    text = (
+        'Presidente Lula visita Brasília O Ministério da Saúde e a Petrobras S.A. anunciaram '
+        'em Campinas - SP que o IBGE e o presidente Lula vão investir R$ 1.500,00 (12,5%). '
+        'A Dra. Ana Souza, do Hospital das Clínicas, disse que a Petrobras e o Banco Central '
+        'acompanham. Segundo ela, Maria Silva e o ministro Fernando Haddad chegam hoje.'
+    )
+
+    def test_entities_are_classified_by_gazetteers_and_rules(self):
+        entities = EntityExtractor().extract_entities(self.text)
+        self.assertEqual(entities, {
+            'pessoa': ['Lula', 'Ana Souza', 'Maria Silva', 'Fernando Haddad'],
+            'organizacao': ['Ministério da Saúde', 'Petrobras S.A.', 'IBGE', 'Hospital das Clínicas', 'Petrobras'],
+            'local': ['Brasília', 'Campinas - SP'],
+            'valor_monetario': ['R$ 1.500,00'],
+            'porcentagem': ['12,5%'],
+        })
+
+    def test_sentence_start_words_are_not_entities(self):
+        text = 'Hoje o mercado abriu em alta. Segundo analistas, Ontem houve queda. Depois Veio a chuva.'
+        self.assertEqual(
+            EntityExtractor().extract_entities(text),
+            {'pessoa': [], 'organizacao': [], 'local': [], 'valor_monetario': [], 'porcentagem': []}
+        )
+
+    def test_entities_are_ranked_by_frequency(self):
+        text = 'Ana Souza falou. Carlos Lima falou. Carlos Lima voltou. A Petrobras e a Vale; a Vale.'
+        entities = EntityExtractor().extract_entities(text * 2)
+        self.assertEqual(entities['pessoa'], ['Carlos Lima', 'Ana Souza'])
+        self.assertEqual(entities['organizacao'], ['Vale', 'Petrobras'])
+        self.assertEqual(EntityExtractor().extract_entities(text), EntityExtractor().extract_entities(text))
+
+    def test_suffix_and_state_code_attach_to_the_last_part_of_the_name(self):
+        text = 'A Petrobras S.A. ampliou a produção. Em Campinas - SP, Brasília O Banco Central S.A. comentou.'
+        entities = EntityExtractor().extract_entities(text)
+        self.assertEqual(entities['organizacao'], ['Petrobras S.A.', 'Banco Central S.A.'])
+        self.assertEqual(entities['local'], ['Campinas - SP', 'Brasília'])
+
+
+class AnalyzedDocumentTests(TestCase):
+    def test_document_holds_tokens_offsets_and_counts(self):
+        document = AnalyzedDocument.from_parts('Crise na Bolsa', None, 'A bolsa caiu: crise, crise!')
+        self.assertEqual(document.tokens, ['crise', 'na', 'bolsa', 'a', 'bolsa', 'caiu', 'crise', 'crise'])
+        self.assertEqual(
+            [document.normalized[start:end] for start, end in document.offsets], document.tokens
+        )
+        self.assertEqual(document.counts['crise'], 3)
+        self.assertIs(AnalyzedDocument.of(document), document)
+
+    def test_analyzers_accept_text_or_document(self):
+        text = 'O governo anunciou crescimento e lucro, mas a crise e a inflação preocupam o mercado.'
+        document = AnalyzedDocument(text)
+        self.assertEqual(SentimentAnalyzer().analyze_sentiment(text), SentimentAnalyzer().analyze_sentiment(document))
+        self.assertEqual(SentimentAnalyzer().analyze_sentiment(text)['label'], 'neutro')
+        self.assertEqual(EntityExtractor().identify_context(document), ['economia', 'politica'])
+        self.assertEqual(
+            CategoryClassifier().classify_category(text), CategoryClassifier().classify_category(document)
+        )
+
+    def test_news_analysis_prepares_the_text_once(self):
+        author = User.objects.create_user(username='analise')
+        news = News.objects.create(
+            title='Crise no mercado', summary='Resumo', content='O presidente Lula comentou a queda da bolsa.',
+            source='Fonte', category=Category.objects.first(), author=author,
+        )
+        with mock.patch('common.documents.WORD_RE') as word_re:
+            word_re.findall.side_effect = lambda text: re.findall(r'\w+', text)
+            result = NewsAnalysisService().analyze_news(news)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(word_re.findall.call_count, 1)
+        self.assertEqual(result['sentiment']['label'], 'negativo')
+        self.assertEqual(result['entities']['pessoa'], ['Lula'])
+        self.assertEqual(result['contexts'], ['economia', 'politica'])
+
+
+class BatchAnalysisTests(TestCase):
+    vocabulary = [
+        'governo', 'crise', 'crise', 'lucro', 'mercado', 'bolsa', 'ministério', 'da', 'saúde', 'vacina',
+        'inteligência', 'artificial', 'ia', 'dia', 'bem', 'estar', 'queda', 'sucesso', 'escola', 'futebol',
+        'qualidade', 'de', 'vida', 'pós', 'graduação', 'economia', 'notícia', 'hoje', 'cidade', 'política',
+    ]
+
+    def _texts(self, count):
+        rng = random.Random(7)
+        texts = [' '.join(rng.choice(self.vocabulary) for _ in range(rng.randrange(0, 60))) for _ in range(count)]
+        return texts + ['', 'Ministério da Saúde; bem-estar e INTELIGÊNCIA artificial!', 'dia a dia']
+
+    def test_matrix_product_matches_scalar_analysis(self):
+        texts = self._texts(300)
+        engine = get_batch_engine()
+        documents = [AnalyzedDocument(text) for text in texts]
+        matrix = engine.term_matrix(document.tokens for document in documents)
+        sentiment = engine.product(matrix, 'sentiment')
+        contexts = engine.product(matrix, 'contexts', binary=True)
+        categories = engine.product(matrix, 'categories', binary=True)
+
+        analyzer, extractor, classifier = SentimentAnalyzer(), EntityExtractor(), CategoryClassifier()
+        for index, document in enumerate(documents):
+            self.assertEqual(
+                analyzer.sentiment_from_counts(
+                    sentiment[index]['positivo'], sentiment[index]['negativo'], matrix.lengths[index]
+                ),
+                analyzer.analyze_sentiment(document)
+            )
+            self.assertEqual(extractor.contexts_from_scores(contexts[index]), extractor.identify_context(document))
+            self.assertEqual(
+                classifier.classification_from_scores(categories[index], matrix.lengths[index]),
+                classifier.classify_category(document)
+            )
+
+    def test_repeated_terms_add_their_weights(self):
+        engine = BatchTermEngine({'lexicon': [('bolsa', 'economia', 2), ('bolsa', 'economia', 2),
+                                              ('bolsa de estudos', 'educacao', 1), ('bolsa', 'educacao', 1)]})
+        matrix = engine.term_matrix([['bolsa', 'de', 'estudos', 'bolsa'], ['bolsa', 'estudos'], []])
+        self.assertEqual(list(matrix.lengths), [4, 2, 0])
+        self.assertEqual(
+            engine.product(matrix, 'lexicon', binary=True),
+            [{'economia': 4, 'educacao': 2}, {'economia': 4, 'educacao': 1}, {}]
+        )
+        self.assertEqual(engine.product(matrix, 'lexicon')[0], {'economia': 8, 'educacao': 3})
+
+    def test_batch_analysis_writes_the_same_analysis_as_single_news(self):
+        author = User.objects.create_user(username='lote')
+        category = Category.objects.first()
+        news_list = [
+            News.objects.create(
+                title=f'Notícia {index}', summary='Resumo', content=text, source='Fonte',
+                category=category, author=author,
+            )
+            for index, text in enumerate(self._texts(20) + ['O presidente Lula e a Petrobras em Brasília.'])
+        ]
+        service = NewsAnalysisService()
+        with mock.patch('common.services.ANALYSIS_BATCH_SIZE', 8):
+            results = service.batch_analyze_news(News.objects.filter(pk__in=[news.pk for news in news_list]))
+        self.assertEqual((results['total'], results['processed'], results['errors']), (len(news_list), len(news_list), 0))
+
+        fields = ['sentiment_score', 'sentiment_label', 'sentiment_confidence', 'entities_data', 'analysis_contexts']
+        for news in news_list:
+            batched = News.objects.get(pk=news.pk)
+            service.apply_analysis(news)
+            self.assertEqual([getattr(batched, field) for field in fields], [getattr(news, field) for field in fields])
+
+    def test_category_suggestions_match_single_classification(self):
+        texts = self._texts(30)
+        suggestions = CategoryClassifier().suggest_categories_batch(
+            [{'id': index, 'title': '', 'summary': '', 'content': text} for index, text in enumerate(texts)]
+        )
+        self.assertEqual(
+            [suggestion['classification'] for suggestion in suggestions],
+            [CategoryClassifier().classify_category(f'  {text}') for text in texts]
+        )
+
+
+class AnalyzeNewsCommandTests(TestCase):
+    def test_pk_ranges_split_sparse_keys_by_count(self):
+        self.assertEqual(pk_ranges([2, 3, 7, 8, 20, 41, 42], 3), [(2, 7), (8, 41), (42, 42)])
+        self.assertEqual(pk_ranges([5], 100), [(5, 5)])
+        self.assertEqual(pk_ranges([], 100), [])
+
+    def test_analyzes_every_pending_news_across_batches(self):
+        news_list = create_news(7)
+        News.objects.filter(pk=news_list[3].pk).update(analysis_timestamp=timezone.now())
+
+        out = StringIO()
+        call_command('analyze_news', '--batch-size', '2', stdout=out)
+
+        # A seleção (sem análise) encolhe a cada lote gravado: as faixas de pk
+        # calculadas no início não pulam notícias
+        self.assertFalse(News.objects.filter(analysis_timestamp__isnull=True).exists())
+        self.assertIn('Lote 3/3: 6 analisadas, 0 erros', out.getvalue())
+        self.assertIn('Vazão:', out.getvalue())
+
+    def test_throughput_reports_the_processes_actually_used(self):
+        create_news(3)
+
+        out = StringIO()
+        call_command('analyze_news', '--workers', '4', '--batch-size', '10', stdout=out)
+
+        # Uma única faixa: analisada no próprio processo, não por 4 workers
+        self.assertIn('com 1 worker(s)', out.getvalue())
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Workers em processos separados requerem um banco compartilhado')
+class AnalyzeNewsWorkersTests(TransactionTestCase):
+    """Os workers têm conexões próprias e só enxergam dados já commitados"""
+
+    def setUp(self):
+        self.category, _ = Category.objects.get_or_create(name='Economia', defaults={'slug': 'economia'})
+
+    def test_workers_aggregate_counts(self):
+        create_news(9, category=self.category)
+
+        out = StringIO()
+        call_command('analyze_news', '--workers', '2', '--batch-size', '4', stdout=out)
+
+        self.assertFalse(News.objects.filter(analysis_timestamp__isnull=True).exists())
+        self.assertIn('Sucessos: 9', out.getvalue())
+        self.assertIn('com 2 worker(s)', out.getvalue())
+
+
+class NewsUpdateBufferTests(TestCase):
+    """Gravação em lote de campos de notícias (common.news_writes)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username='admin_writes')
+        cls.admin.profile.user_type = 'admin'
+        cls.admin.profile.save()
+        cls.economia = Category.objects.get(name='Economia')
+        cls.cultura = Category.objects.get(name='Cultura')
+
+    def _news_updates(self, queries):
+        return [query for query in queries if query['sql'].startswith('UPDATE "common_news"')]
+
+    def test_batch_analysis_writes_with_one_update(self):
+        news_list = create_news(30, category=self.economia)
+        self.economia.refresh_from_db()
+        updated_at = max(news.updated_at for news in news_list)
+
+        with CaptureQueriesContext(connection) as queries:
+            results = NewsAnalysisService().batch_analyze_news(news_list)
+
+        self.assertEqual((results['processed'], results['errors']), (30, 0))
+        self.assertEqual(len(self._news_updates(queries.captured_queries)), 1)
+        self.assertFalse(News.objects.filter(analysis_timestamp__isnull=True).exists())
+
+        # Como no save() de cada notícia: updated_at muda, a categoria (fora do feed) não
+        self.assertFalse(News.objects.filter(updated_at__lte=updated_at).exists())
+        self.assertFalse([query for query in queries.captured_queries if 'common_category' in query['sql']])
+        version = self.economia.news_version
+        self.economia.refresh_from_db()
+        self.assertEqual((self.economia.news_version, self.economia.active_news_count), (version, 30))
+
+    def test_failed_rows_are_attributed_individually(self):
+        news_list = create_news(4, category=self.economia)
+        for news in news_list:
+            news.sentiment_label = 'neutro'
+        # Não serializável em JSON: o lote falha e só esta notícia falha na gravação individual
+        news_list[2].entities_data = {'pessoa': {object()}}
+
+        writes = NewsUpdateBuffer(['sentiment_label', 'entities_data'])
+        for news in news_list:
+            writes.add(news)
+        writes.flush()
+
+        self.assertEqual(writes.written, 3)
+        self.assertEqual([news.pk for news, error in writes.failed], [news_list[2].pk])
+        self.assertEqual(
+            list(News.objects.filter(sentiment_label='neutro').order_by('pk').values_list('pk', flat=True)),
+            [news.pk for index, news in enumerate(news_list) if index != 2]
+        )
+
+    def test_category_writes_refresh_counts(self):
+        news_list = [News.objects.get(pk=news.pk) for news in create_news(3, category=self.economia)]
+        writes = NewsUpdateBuffer(['category'])
+        for news in news_list[:2]:
+            news.category = self.cultura
+            writes.add(news)
+        writes.flush()
+
+        self.economia.refresh_from_db()
+        self.cultura.refresh_from_db()
+        self.assertEqual((self.economia.active_news_count, self.cultura.active_news_count), (1, 2))
+
+    def test_search_indexed_fields_are_rejected(self):
+        with self.assertRaises(ValueError):
+            NewsUpdateBuffer(['title'])
+
+    def test_classify_endpoint_assigns_categories_in_bulk(self):
+        news_list = create_news(5, category=self.cultura)
+        News.objects.filter(pk__in=[news.pk for news in news_list]).update(
+            content='Economia: mercado, inflação, bolsa, investimento e banco central em alta.'
+        )
+        self.client.force_login(self.admin)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                reverse('classify_news_categories'),
+                {'news_ids': [news.pk for news in news_list], 'auto_assign': True, 'confidence_threshold': 0},
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['auto_assigned_count'], 5)
+        self.assertEqual(len(self._news_updates(queries.captured_queries)), 1)
+        self.assertEqual(News.objects.filter(category=self.economia).count(), 5)
+
+    def test_analyze_endpoint_reports_batch_results(self):
+        news_list = create_news(3, category=self.economia)
+        self.client.force_login(self.admin)
+
+        response = self.client.post(
+            reverse('analyze_news'), {'news_ids': [news.pk for news in news_list]}, content_type='application/json'
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.json()['success_count'], response.json()['error_count']), (3, 0))
+        self.assertFalse(News.objects.filter(analysis_timestamp__isnull=True).exists())
+
+    @skipUnless(connection.vendor == 'postgresql', 'COPY requer PostgreSQL')
+    def test_copy_update_matches_bulk_update(self):
+        news_list = create_news(3, category=self.economia)
+        for news in news_list:
+            news.entities_data = {'pessoa': ['Ana\tSouza', 'C:\\dados'], 'local': ['Linha\nnova']}
+            news.sentiment_score = 0.25
+            news.analysis_timestamp = timezone.now()
+        copy_update(news_list, ['entities_data', 'sentiment_score', 'analysis_timestamp'], 'default')
+
+        for news in news_list:
+            stored = News.objects.get(pk=news.pk)
+            self.assertEqual(
+                (stored.entities_data, stored.sentiment_score, stored.analysis_timestamp),
+                (news.entities_data, news.sentiment_score, news.analysis_timestamp)
+            )
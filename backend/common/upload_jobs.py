@@ -0,0 +1,380 @@
+"""
+Processamento em segundo plano dos uploads de notícias (upload_news_json)
+
+A view grava o arquivo como um UploadJob com um UploadJobItem por notícia e
+responde imediatamente; após o commit, o job é publicado na fila do
+RabbitMQ (common.messaging) e processado por manage.py process_upload_jobs.
+
+Cada item passa por extração (IA), classificação, criação da notícia e
+análise de sentimento, como antes na própria requisição; a extração e a
+classificação de vários itens correm em paralelo (run_upload_job). A
+análise é calculada antes da gravação, e cada lote de
+UPLOAD_JOB_WRITE_CHUNK itens é gravado em uma transação (notícias com a
+análise em um bulk_create, resultados dos itens e contadores do job), então
+um job interrompido é retomado do ponto em que parou:
+
+- um worker reivindica o job (claim_upload_job) e renova `heartbeat_at` a
+  cada lote gravado;
+- um job em processamento sem heartbeat por UPLOAD_JOB_LEASE_SECONDS, ou
+  pendente há mais de UPLOAD_JOB_PENDING_GRACE_SECONDS (publicação perdida),
+  é retomado pelos workers (stale_upload_jobs);
+- a notícia é vinculada ao item na mesma transação em que é criada; itens
+  que já têm a notícia (gravados notícia a notícia por versões anteriores)
+  apenas concluem a análise.
+
+Os resultados da IA vêm do cache (common.llm_cache) quando o mesmo texto
+já foi processado; jobs com `refresh_llm_cache` refazem as chamadas e
+regravam o cache.
+
+Com UPLOAD_JOBS_EAGER o job é processado na própria requisição, após o
+commit (desenvolvimento sem RabbitMQ e testes).
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import F, Q
+from django.db.models.functions import Coalesce, Now
+from django.utils import timezone
+
+from .llm_cache import llm_cache, llm_cache_bypass
+from .messaging import publish_upload_job
+from .middleware import unbudgeted_queries
+from .models import Category, News, UploadJob, UploadJobItem
+from .search_index import get_search_index, search_index_enabled
+from .services import (
+    ANALYSIS_FIELDS, batch_news_contents, extract_and_classify_news_batch, get_analysis_service
+)
+
+logger = logging.getLogger(__name__)
+
+# Itens do upload gravados por bulk_create na criação do job
+UPLOAD_JOB_ITEMS_CHUNK = 1000
+
+
+def _content_preview(news_item):
+    content = news_item.get('noticia') or 'Conteúdo não disponível'
+    return content.strip()[:100] + '...'
+
+
+def create_upload_job(user, file_name, news_data, refresh_llm_cache=False):
+    """
+    Grava o upload como job pendente e o enfileira após o commit.
+    `news_data` pode ser um iterador (common.news_upload.iter_upload_news):
+    os itens são gravados em lotes de UPLOAD_JOB_ITEMS_CHUNK enquanto são
+    lidos, e um erro na leitura desfaz o job inteiro.
+    """
+    with transaction.atomic():
+        job = UploadJob.objects.create(
+            user=user, file_name=file_name or '', total_count=0, refresh_llm_cache=refresh_llm_cache
+        )
+        items = (
+            UploadJobItem(job=job, index=index, payload=news_item, content_preview=_content_preview(news_item))
+            for index, news_item in enumerate(news_data, 1)
+        )
+        # Consultas proporcionais ao tamanho do arquivo, fora do orçamento da view
+        with unbudgeted_queries():
+            while chunk := list(islice(items, UPLOAD_JOB_ITEMS_CHUNK)):
+                UploadJobItem.objects.bulk_create(chunk)
+                job.total_count += len(chunk)
+        UploadJob.objects.filter(pk=job.pk).update(total_count=job.total_count)
+        transaction.on_commit(partial(enqueue_upload_job, job.id))
+    logger.info(f"Job de upload {job.id}: {job.total_count} notícias de '{file_name}' ({user.username})")
+    return job
+
+
+def enqueue_upload_job(job_id):
+    if settings.UPLOAD_JOBS_EAGER:
+        with unbudgeted_queries():
+            run_upload_job(job_id)
+    elif not publish_upload_job(job_id):
+        logger.warning(f"Job de upload {job_id} ficará pendente até ser retomado por um worker")
+
+
+def claim_upload_job(job_id):
+    """
+    Reivindica o job para este worker: pendente, ou em processamento com
+    heartbeat vencido. Retorna False se ele já terminou ou está com outro worker.
+    """
+    stale = timezone.now() - timedelta(seconds=settings.UPLOAD_JOB_LEASE_SECONDS)
+    return UploadJob.objects.filter(pk=job_id, attempts__lt=settings.UPLOAD_JOB_MAX_ATTEMPTS).filter(
+        Q(status='pending') | Q(status='processing', heartbeat_at__lt=stale)
+    ).update(
+        status='processing',
+        attempts=F('attempts') + 1,
+        started_at=Coalesce('started_at', Now()),
+        heartbeat_at=Now(),
+    ) == 1
+
+
+def stale_upload_jobs():
+    """
+    Jobs a retomar: em processamento com heartbeat vencido, ou pendentes
+    cuja publicação na fila pode ter se perdido. Jobs que já esgotaram
+    UPLOAD_JOB_MAX_ATTEMPTS são marcados como falhos.
+    """
+    now = timezone.now()
+    stale = Q(status='processing', heartbeat_at__lt=now - timedelta(seconds=settings.UPLOAD_JOB_LEASE_SECONDS)) | Q(
+        status='pending', created_at__lt=now - timedelta(seconds=settings.UPLOAD_JOB_PENDING_GRACE_SECONDS)
+    )
+    UploadJob.objects.filter(stale, attempts__gte=settings.UPLOAD_JOB_MAX_ATTEMPTS).update(
+        status='failed',
+        error='Processamento interrompido repetidamente; tentativas esgotadas',
+        finished_at=Now(),
+    )
+    return list(UploadJob.objects.filter(stale).order_by('created_at').values_list('id', flat=True))
+
+
+def _run_in_pool(context, func, *args):
+    """
+    Executa `func` em uma thread do pool no contexto do job (ContextVars,
+    como llm_cache_bypass) e fecha as conexões com o banco que ela abriu
+    (consultas ao cache da IA).
+    """
+    try:
+        return context.run(func, *args)
+    finally:
+        connections.close_all()
+
+
+def run_upload_job(job_id):
+    """
+    Processa os itens pendentes do job. Retorna o job atualizado, ou None se
+    ele não pôde ser reivindicado.
+
+    A etapa de IA (extração e classificação) é feita em lotes de
+    LLM_BATCH_SIZE notícias por chamada, com até UPLOAD_JOB_CONCURRENCY
+    lotes em paralelo, em threads e sob o limite de taxa da OpenAI; a
+    gravação (notícia, análise e resultado) segue na ordem do arquivo,
+    nesta thread, em lotes de UPLOAD_JOB_WRITE_CHUNK itens
+    (write_upload_items).
+    """
+    if not claim_upload_job(job_id):
+        logger.info(f"Job de upload {job_id} já concluído ou em processamento por outro worker")
+        return None
+
+    job = UploadJob.objects.select_related('user').get(pk=job_id)
+    logger.info(
+        f"Job de upload {job.id}: processando '{job.file_name}' "
+        f"({job.processed_count}/{job.total_count} já processadas, tentativa {job.attempts})"
+    )
+    items = list(job.items.filter(status='pending').select_related('news'))
+    cache_before = llm_cache.totals()
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, settings.UPLOAD_JOB_CONCURRENCY), thread_name_prefix=f'upload-job-{job.id}'
+    )
+    try:
+        with llm_cache_bypass(job.refresh_llm_cache):
+            _process_items(job, items, executor)
+    except Exception as e:
+        # Erro fora de um item (ex.: banco indisponível): o job fica em
+        # processamento e é retomado quando o heartbeat vencer
+        logger.exception(f"Job de upload {job.id}: interrompido")
+        UploadJob.objects.filter(pk=job.id).update(error=str(e))
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    UploadJob.objects.filter(pk=job.id).update(status='completed', error='', finished_at=Now())
+    job.refresh_from_db()
+    cache = llm_cache.totals() - cache_before
+    logger.info(
+        f"Job de upload {job.id} concluído: {job.success_count} criadas, "
+        f"{job.error_count} com erro, de {job.total_count} "
+        f"(cache da IA: {cache['hit']} acertos, {cache['miss']} faltas)"
+    )
+    return job
+
+
+def _process_items(job, items, executor):
+    # Itens retomados com a notícia já criada não passam pela IA
+    to_extract = [item for item in items if item.news is None]
+    extractions = {}
+    for batch in batch_news_contents([(item.payload.get('noticia') or '').strip() for item in to_extract]):
+        batch_items = [to_extract[position] for position in batch]
+        future = executor.submit(_run_in_pool, contextvars.copy_context(), extract_upload_items, batch_items)
+        extractions.update((item.pk, (future, offset)) for offset, item in enumerate(batch_items))
+
+    categories = {category.name: category for category in Category.objects.all()}
+    chunk_size = max(1, settings.UPLOAD_JOB_WRITE_CHUNK)
+    for start in range(0, len(items), chunk_size):
+        chunk = items[start:start + chunk_size]
+        chunk_extractions = []
+        for item in chunk:
+            extraction = None
+            if item.pk in extractions:
+                future, offset = extractions[item.pk]
+                extraction = future.result()[offset]
+            chunk_extractions.append(extraction)
+        write_upload_items(job, chunk, chunk_extractions, categories)
+
+
+def extract_upload_items(items):
+    """
+    Etapa de IA de um lote de itens: extrai título, conteúdo, resumo e fonte
+    e classifica as notícias, em uma chamada à OpenAI por lote
+    (extract_and_classify_news_batch). Roda em paralelo, fora da thread do
+    job: além do cache da IA, não acessa o banco. Retorna, na ordem de `items`, os dados extraídos
+    ou {'error': mensagem}.
+    """
+    contents = [(item.payload.get('noticia') or '').strip() for item in items]
+    extractions = [{'error': 'Conteúdo da notícia está vazio'} if not content else None for content in contents]
+    pending = [position for position, content in enumerate(contents) if content]
+    try:
+        results = extract_and_classify_news_batch([contents[position] for position in pending])
+    except Exception as e:
+        results = [{'success': False, 'error': f'Erro ao processar: {str(e)}'}] * len(pending)
+
+    for position, result in zip(pending, results):
+        if not result['success']:
+            extractions[position] = {'error': f'Erro na extração de informações: {result["error"]}'}
+            continue
+        data, classification = result['data'], result['classification']
+        extractions[position] = {
+            'title': data.get('title', 'Título não identificado').strip(),
+            'content': data.get('content', contents[position]).strip(),
+            'summary': data.get('summary', '').strip(),
+            'source': data.get('source', 'Fonte não identificada').strip(),
+            'category': classification['category'],
+            'confidence': classification['confidence'],
+        }
+    return extractions
+
+
+def extract_upload_item(item):
+    """extract_upload_items para um único item"""
+    return extract_upload_items([item])[0]
+
+
+def _prepare_item(item, job, extraction, categories):
+    """
+    Define o resultado do item antes da gravação: status, mensagem e a
+    notícia (nova, ainda não inserida, ou a já vinculada ao item) com a
+    análise preenchida
+    """
+    if item.news is None:
+        if extraction is None:
+            extraction = extract_upload_item(item)
+        if 'error' in extraction:
+            logger.error(f"Notícia {item.index}/{job.total_count}: {extraction['error']}")
+            item.status, item.message = 'error', extraction['error']
+            return
+
+        category = categories.get(extraction['category'])
+        if category is None:
+            raise ValueError(f"Categoria '{extraction['category']}' não encontrada.")
+        item.news = News(
+            title=extraction['title'],
+            content=extraction['content'],
+            summary=extraction['summary'][:500],  # Limitar resumo
+            source=extraction['source'],
+            category=category,
+            author=job.user,
+            published_at=timezone.now(),
+            is_active=True
+        )
+        item.title = item.news.title[:200]
+        item.message = f'Notícia criada com sucesso (IA: {category.name}, confiança: {extraction["confidence"]:.2f})'
+
+    try:
+        analysis = get_analysis_service().apply_analysis(item.news)
+        analysis_info = f" | Análise: {analysis['sentiment']['label']}"
+    except Exception as analysis_error:
+        logger.error(f"Notícia {item.index}/{job.total_count}: falha na análise - {analysis_error}")
+        analysis_info = f" | Análise: falhou - {analysis_error}"
+    item.status, item.message = 'success', f'{item.message}{analysis_info}'
+
+
+def _fail_item(item, job, error):
+    logger.error(f"Notícia {item.index}/{job.total_count}: erro - {error}")
+    item.status, item.message = 'error', f'Erro ao processar: {str(error)}'
+    if item.news is not None and item.news.pk is None:
+        item.news, item.title = None, ''
+
+
+def _save_items(job, items):
+    """
+    Grava os itens preparados em uma transação: notícias novas (bulk_create,
+    já com a análise), análise das notícias já existentes, resultados dos
+    itens e contadores do job
+    """
+    new_news = [item.news for item in items if item.news is not None and item.news.pk is None]
+    analyzed_news = [item.news for item in items if item.news is not None and item.news.pk is not None]
+    processed_at = timezone.now()
+    for item in items:
+        item.processed_at = processed_at
+    success_count = sum(item.status == 'success' for item in items)
+
+    try:
+        with transaction.atomic():
+            News.objects.bulk_create(new_news)
+            if analyzed_news:
+                News.objects.bulk_update(analyzed_news, ANALYSIS_FIELDS)
+            UploadJobItem.objects.bulk_update(items, ['status', 'message', 'news', 'title', 'processed_at'])
+            UploadJob.objects.filter(pk=job.pk).update(
+                success_count=F('success_count') + success_count,
+                error_count=F('error_count') + len(items) - success_count,
+                heartbeat_at=Now()
+            )
+
+            # bulk_create não dispara os signals de News: contador e versão
+            # das categorias e journal do índice de busca
+            category_ids = {news.category_id for news in new_news}
+            if category_ids:
+                Category.objects.filter(pk__in=category_ids).refresh_active_news_count()
+            if new_news and search_index_enabled():
+                index = get_search_index()
+                for news in new_news:
+                    index.record_upsert(news)
+    except Exception:
+        # As chaves atribuídas pelo bulk_create foram desfeitas com a transação
+        for news in new_news:
+            news.pk = None
+            news._state.adding = True
+        raise
+
+    for item in items:
+        if item.status == 'success':
+            logger.info(f"Notícia {item.index}/{job.total_count}: concluída - ID: {item.news.id}")
+
+
+def write_upload_items(job, items, extractions=None, categories=None):
+    """
+    Grava um lote de itens do job, na ordem do arquivo. `extractions` são os
+    retornos de extract_upload_items (calculados aqui se omitidos) e
+    `categories` o mapa nome -> Category do job.
+
+    Se a gravação do lote falhar, os itens são gravados um a um, e o erro de
+    um item fica registrado só nele, como no processamento item a item.
+    """
+    if categories is None:
+        categories = {category.name: category for category in Category.objects.all()}
+    for item, extraction in zip(items, extractions or [None] * len(items)):
+        try:
+            _prepare_item(item, job, extraction, categories)
+        except Exception as e:
+            _fail_item(item, job, e)
+
+    _save_prepared(job, items)
+
+
+def _save_prepared(job, items):
+    try:
+        _save_items(job, items)
+    except Exception as e:
+        if len(items) > 1:
+            logger.warning(f"Job de upload {job.id}: falha ao gravar o lote ({e}); gravando item a item")
+            for item in items:
+                _save_prepared(job, [item])
+            return
+        item = items[0]
+        if item.status == 'error':
+            # Nem o erro pôde ser gravado (ex.: banco indisponível): falha do job
+            raise
+        _fail_item(item, job, e)
+        _save_items(job, [item])
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from . import views
@@ -21,6 +22,7 @@ urlpatterns = [
     path('news/classify-categories/', views.classify_news_categories, name='classify_news_categories'),
     path('news/analyze/', views.analyze_news, name='analyze_news'),
     path('news/upload-json/', views.upload_news_json, name='upload_news_json'),
+    path('news/upload-jobs/<int:job_id>/', views.upload_job_status, name='upload_job_status'),
     
     # Rotas de autenticação
     path('users/register/', views.register_user, name='register_user'),
@@ -35,4 +37,9 @@ urlpatterns = [
     
     # Incluir rotas do router (deve vir por último)
     path('', include(router.urls)),
-]
\ No newline at end of file
+]
+if settings.ASYNC_READ_VIEWS:
+    # Leituras de notícias, categorias e preferências pelas views assíncronas
+    # (mesmas rotas; os demais métodos continuam nos ViewSets)
+    from .async_views import urlpatterns as async_urlpatterns
+    urlpatterns = async_urlpatterns + urlpatterns
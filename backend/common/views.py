@@ -10,14 +10,24 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import extend_schema, extend_schema_view, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
+from django.conf import settings
+from django.urls import reverse
 from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from datetime import timedelta
-from .models import News, Category, UserProfile
+from functools import partial
+from .models import News, Category, UserProfile, UploadJob
 from .serializers import (
     NewsListSerializer, NewsDetailSerializer, NewsCreateUpdateSerializer,
-    CategorySerializer, UserProfileSerializer
+    CategorySerializer, UserProfileSerializer, UploadJobSerializer, NEWS_LIST_VALUES, news_list_rows
 )
 from .permissions import IsAdminOrReadOnly, IsOwnerOrReadOnly, IsAdminOrPublicReadOnly, IsSuperuserOrPublicReadOnly
+from .middleware import query_budget
+from .pagination import NewsFeedPagination
+from .filters import get_news_search_backend
+from .feed_cache import feed_cache, get_feed_profile, get_scope_state
+from . import conditional
 
 
 @extend_schema(
@@ -37,8 +47,10 @@ from .permissions import IsAdminOrReadOnly, IsOwnerOrReadOnly, IsAdminOrPublicRe
         }
     }
 )
+@query_budget(4)
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@condition(etag_func=conditional.category_list_etag, last_modified_func=conditional.category_list_last_modified)
 def list_categories_for_preferences(request):
     """
     Lista todas as categorias disponíveis para seleção de preferências.
@@ -88,6 +100,7 @@ def list_categories_for_preferences(request):
         }
     }
 )
+@query_budget(8)
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def register_user(request):
@@ -186,6 +199,7 @@ def register_user(request):
         }
     }
 )
+@query_budget(8)
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def login_user(request):
@@ -253,6 +267,7 @@ def login_user(request):
         }
     }
 )
+@query_budget(4)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def logout_user(request):
@@ -314,6 +329,14 @@ def logout_user(request):
         tags=['Categories']
     ),
 )
+@method_decorator(
+    condition(etag_func=conditional.category_list_etag, last_modified_func=conditional.category_list_last_modified),
+    name='list'
+)
+@method_decorator(
+    condition(etag_func=conditional.category_detail_etag, last_modified_func=conditional.category_detail_last_modified),
+    name='retrieve'
+)
 class CategoryViewSet(viewsets.ModelViewSet):
     """
     ViewSet para gerenciar categorias de notícias.
@@ -328,6 +351,14 @@ class CategoryViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'description']
     ordering_fields = ['name', 'created_at']
     ordering = ['name']
+    query_budgets = {
+        'list': 5,
+        'retrieve': 4,
+        'create': 5,
+        'update': 6,
+        'partial_update': 6,
+        'destroy': 8,
+    }
 
 
 @extend_schema_view(
@@ -363,7 +394,7 @@ class CategoryViewSet(viewsets.ModelViewSet):
             ),
             OpenApiParameter(
                 name='search',
-                description='Buscar no título, conteúdo ou resumo',
+                description='Buscar no título, conteúdo ou resumo (ordenado por relevância)',
                 required=False,
                 type=OpenApiTypes.STR
             ),
@@ -373,6 +404,13 @@ class CategoryViewSet(viewsets.ModelViewSet):
                 required=False,
                 type=OpenApiTypes.STR
             ),
+            OpenApiParameter(
+                name='cursor',
+                description='Paginação por cursor (vazio na primeira página; use o link "next" nas seguintes). '
+                            'Ignora "page" e "ordering"; "count" é aproximado',
+                required=False,
+                type=OpenApiTypes.STR
+            ),
         ]
     ),
     create=extend_schema(
@@ -401,6 +439,10 @@ class CategoryViewSet(viewsets.ModelViewSet):
         tags=['News']
     ),
 )
+@method_decorator(
+    condition(etag_func=conditional.news_detail_etag, last_modified_func=conditional.news_detail_last_modified),
+    name='retrieve'
+)
 class NewsViewSet(viewsets.ModelViewSet):
     """
     ViewSet para gerenciar notícias.
@@ -411,12 +453,28 @@ class NewsViewSet(viewsets.ModelViewSet):
     """
     queryset = News.objects.filter(is_active=True)
     permission_classes = [IsAdminOrPublicReadOnly]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = NewsFeedPagination
     filterset_fields = ['category', 'source', 'author']
     search_fields = ['title', 'content', 'summary']
     ordering_fields = ['published_at', 'created_at', 'title']
     ordering = ['-published_at']
+    query_budgets = {
+        'list': 6,
+        'retrieve': 5,
+        'my_preferences': 7,
+        'admin_stats': 7,
+        'create': 6,
+        'update': 8,
+        'partial_update': 8,
+        'destroy': 7,
+    }
     
+    @property
+    def filter_backends(self):
+        # A busca (settings.NEWS_SEARCH_BACKEND) vem depois do OrderingFilter
+        # para ordenar por relevância
+        return [DjangoFilterBackend, filters.OrderingFilter, get_news_search_backend()]
+
     def get_serializer_class(self):
         """
         Retorna o serializer apropriado baseado na ação
@@ -432,12 +490,20 @@ class NewsViewSet(viewsets.ModelViewSet):
         """
         Filtra notícias baseado no tipo de usuário, preferências e período
         """
-        queryset = News.objects.filter(is_active=True)
+        # Autor e categoria via JOIN, para que o número de queries não cresça
+        # com o tamanho da página; o vetor de busca não é usado pelos serializers
+        queryset = (
+            News.objects.filter(is_active=True)
+            .select_related('author', 'category')
+            .defer('search_vector')
+        )
         
         # Aplicar filtro de período se especificado
         period = self.request.query_params.get('period')
         if period:
-            now = timezone.now()
+            # Truncado ao minuto: o SQL (e a chave do COUNT em cache da
+            # paginação por cursor) não muda a cada requisição
+            now = timezone.now().replace(second=0, microsecond=0)
             if period == 'day':
                 # Últimas 24 horas
                 start_date = now - timedelta(days=1)
@@ -454,35 +520,47 @@ class NewsViewSet(viewsets.ModelViewSet):
             if start_date:
                 queryset = queryset.filter(published_at__gte=start_date)
         
-        # Se o usuário está autenticado
-        if self.request.user.is_authenticated:
-            try:
-                profile = self.request.user.profile
-                
-                # Administradores veem todas as notícias sem filtro de preferências
-                if profile.is_admin:
-                    queryset = queryset.order_by('-published_at')
-                else:
-                    # Usuários comuns seguem o filtro de preferências
-                    # Se o usuário tem preferências e não está filtrando por categoria específica,
-                    # mostra APENAS notícias das categorias preferidas
-                    preferred_categories = profile.preferred_categories.all()
-                    category_filter = self.request.query_params.get('category')
-                    
-                    if preferred_categories.exists() and not category_filter:
-                        # Filtra apenas notícias das categorias preferidas
-                        queryset = queryset.filter(category__in=preferred_categories)
-                    
-                    # Ordenação por data de publicação
-                    queryset = queryset.order_by('-published_at')
-                    
-            except UserProfile.DoesNotExist:
-                queryset = queryset.order_by('-published_at')
-        else:
-            # Usuário não autenticado vê todas as notícias
-            queryset = queryset.order_by('-published_at')
+        feed_profile = self.get_feed_profile()
+        if feed_profile is not None and not feed_profile.is_admin:
+            # Usuários comuns seguem o filtro de preferências
+            # Se o usuário tem preferências e não está filtrando por categoria específica,
+            # mostra APENAS notícias das categorias preferidas
+            category_filter = self.request.query_params.get('category')
+            if feed_profile.category_ids and not category_filter:
+                queryset = queryset.filter(category__in=feed_profile.category_ids)
         
-        return queryset
+        # Administradores e usuários não autenticados veem todas as notícias
+        return queryset.order_by('-published_at')
+    
+    def get_feed_profile(self):
+        return get_feed_profile(self.request)
+    
+    def cached_feed_response(self, name, category_ids, render):
+        """
+        Resposta de `render()` via cache do feed (common.feed_cache), compartilhada
+        entre os leitores com as mesmas `category_ids`.
+        """
+        key = feed_cache.make_key(name, category_ids, self.request)
+        stamp = get_scope_state(self.request, category_ids).version
+        data, cache_status = feed_cache.get_or_render(key, stamp, lambda: render().data)
+        response = Response(data)
+        response['X-Feed-Cache'] = cache_status
+        return response
+    
+    @method_decorator(condition(
+        etag_func=conditional.news_list_etag, last_modified_func=conditional.news_list_last_modified
+    ))
+    def list(self, request, *args, **kwargs):
+        def render():
+            return self.list_rows_response(self.filter_queryset(self.get_queryset()))
+        
+        feed_profile = self.get_feed_profile()
+        # Apenas o feed de leitores depende das preferências; os demais são baratos de montar
+        if feed_profile is None or feed_profile.is_admin or not settings.NEWS_FEED_CACHE_TIMEOUT:
+            return render()
+        
+        category_ids = [] if request.query_params.get('category') else feed_profile.category_ids
+        return self.cached_feed_response('list', category_ids, render)
     
     @extend_schema(
         summary="Minhas preferências de notícias",
@@ -498,28 +576,35 @@ class NewsViewSet(viewsets.ModelViewSet):
         Filtra as notícias pelas categorias marcadas como preferidas no perfil do usuário.
         Se o usuário não tiver preferências definidas, retorna todas as notícias.
         """
-        try:
-            profile = request.user.profile
-            preferred_categories = profile.preferred_categories.all()
-            
-            if preferred_categories.exists():
-                queryset = self.get_queryset().filter(category__in=preferred_categories)
-            else:
-                queryset = self.get_queryset()
-            
-            page = self.paginate_queryset(queryset)
-            if page is not None:
-                serializer = NewsListSerializer(page, many=True)
-                return self.get_paginated_response(serializer.data)
-            
-            serializer = NewsListSerializer(queryset, many=True)
-            return Response(serializer.data)
-            
-        except UserProfile.DoesNotExist:
+        feed_profile = self.get_feed_profile()
+        if feed_profile is None:
             return Response(
                 {'error': 'Perfil do usuário não encontrado'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+        
+        render = partial(self._preferences_feed_response, feed_profile.category_ids)
+        if feed_profile.is_admin or not settings.NEWS_FEED_CACHE_TIMEOUT:
+            return render()
+        return self.cached_feed_response('my_preferences', feed_profile.category_ids, render)
+    
+    def _preferences_feed_response(self, category_ids):
+        queryset = self.get_queryset()
+        if category_ids:
+            queryset = queryset.filter(category__in=category_ids)
+        return self.list_rows_response(queryset)
+    
+    def list_rows_response(self, queryset):
+        """
+        Página no formato de NewsListSerializer pelo caminho rápido:
+        linhas de values() montadas por news_list_rows, sem instanciar modelos
+        nem serializers.
+        """
+        rows = queryset.values(*NEWS_LIST_VALUES)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(news_list_rows(page))
+        return Response(news_list_rows(rows))
 
     @extend_schema(
         summary="Estatísticas administrativas",
@@ -615,6 +700,21 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
+    query_budgets = {
+        'list': 6,
+        'retrieve': 6,
+        'me': 8,
+        'preferences': 8,
+        'create': 6,
+        'update': 10,
+        'partial_update': 10,
+        'destroy': 8,
+    }
+    
+    @staticmethod
+    def _profiles_queryset():
+        """Perfis com usuário e categorias preferidas pré-carregados"""
+        return UserProfile.objects.select_related('user').prefetch_related('preferred_categories')
     
     def get_queryset(self):
         """
@@ -624,11 +724,11 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             try:
                 profile = self.request.user.profile
                 if profile.is_admin:
-                    return UserProfile.objects.all()
+                    return self._profiles_queryset()
             except UserProfile.DoesNotExist:
                 pass
         
-        return UserProfile.objects.filter(user=self.request.user)
+        return self._profiles_queryset().filter(user=self.request.user)
     
     @extend_schema(
         methods=['GET'],
@@ -660,6 +760,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             profile = UserProfile.objects.create(user=request.user)
         
         if request.method == 'GET':
+            profile = self._profiles_queryset().get(pk=profile.pk)
             serializer = UserProfileSerializer(profile)
             return Response(serializer.data)
         
@@ -802,6 +903,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
         }
     }
 )
+@query_budget(7)
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def admin_stats(request):
@@ -842,7 +944,10 @@ def admin_stats(request):
 @extend_schema(
     methods=['POST'],
     summary="Upload de arquivo JSON com notícias",
-    description="Endpoint para upload de arquivo JSON contendo múltiplas notícias para processamento automático",
+    description=(
+        "Endpoint para upload de arquivo JSON contendo múltiplas notícias. O arquivo é aceito como um job "
+        "processado em segundo plano; acompanhe o andamento em status_url"
+    ),
     tags=['News'],
     request={
         'multipart/form-data': {
@@ -851,29 +956,27 @@ def admin_stats(request):
                 'file': {
                     'type': 'string',
                     'format': 'binary',
-                    'description': 'Arquivo JSON com lista de notícias'
+                    'description': (
+                        'Lista JSON (.json) ou uma notícia por linha (.jsonl, .ndjson), opcionalmente com gzip (.gz)'
+                    )
+                },
+                'refresh_llm_cache': {
+                    'type': 'boolean',
+                    'description': 'Refaz as chamadas à IA, ignorando resultados em cache'
                 }
             }
         }
     },
     responses={
-        200: {
+        202: {
             'type': 'object',
             'properties': {
                 'message': {'type': 'string'},
+                'job_id': {'type': 'integer'},
+                'status': {'type': 'string'},
+                'status_url': {'type': 'string'},
                 'processed_count': {'type': 'integer'},
-                'total_count': {'type': 'integer'},
-                'results': {
-                    'type': 'array',
-                    'items': {
-                        'type': 'object',
-                        'properties': {
-                            'title': {'type': 'string'},
-                            'status': {'type': 'string'},
-                            'message': {'type': 'string'}
-                        }
-                    }
-                }
+                'total_count': {'type': 'integer'}
             }
         },
         400: {
@@ -891,6 +994,7 @@ def admin_stats(request):
         }
     }
 )
+@query_budget(8)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def upload_news_json(request):
@@ -898,16 +1002,15 @@ def upload_news_json(request):
     Upload de arquivo JSON com múltiplas notícias para processamento automático.
     
     Apenas administradores podem usar este endpoint.
-    O arquivo deve conter uma lista de objetos JSON com os campos:
-    - title: título da notícia
-    - content: conteúdo completo
-    - source: fonte da notícia
-    - published_at: data de publicação (ISO format)
-    - author: nome do autor (opcional)
-    - summary: resumo da notícia (opcional)
+    O arquivo deve conter uma lista JSON de objetos (ou, em .jsonl/.ndjson,
+    um objeto por linha), opcionalmente comprimida com gzip, com o campo:
+    - noticia: texto completo da notícia
     
-    NOTA: O campo 'category' é opcional. Se não fornecido, a IA classificará automaticamente
-    a notícia em uma das 10 categorias fixas do sistema.
+    A IA extrai título, resumo e fonte, classifica a notícia em uma das 10
+    categorias fixas do sistema e analisa o sentimento. O processamento é
+    feito em segundo plano (common.upload_jobs): a resposta (202) traz o job
+    criado, cujo andamento e resultados por notícia são consultados em
+    upload_job_status.
     """
     # Verificar se o usuário é admin
     if not hasattr(request.user, 'profile') or not request.user.profile.is_admin:
@@ -926,157 +1029,59 @@ def upload_news_json(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Processar o arquivo JSON
     try:
-        import json
-        from datetime import datetime
-        from django.utils import timezone
-        import logging
-        
-        logger = logging.getLogger(__name__)
+        from .news_upload import UploadFormatError, iter_upload_news
+        from .upload_jobs import create_upload_job
         
+        # Leitura e validação incrementais, em uma única passada pelo arquivo
         file = serializer.validated_data['file']
-        content = file.read().decode('utf-8')
-        news_data = json.loads(content)
-        
-        processed_count = 0
-        total_count = len(news_data)
-        results = []
-        
-        # Log inicial da fila de processamento
-        logger.info(f"INICIANDO PROCESSAMENTO DE NOTÍCIAS")
-        logger.info(f"Total de notícias na fila: {total_count}")
-        logger.info(f"Usuário: {request.user.username}")
-        logger.info(f"Arquivo: {file.name}")
-        logger.info(f"Timestamp: {datetime.now().isoformat()}")
-        logger.info(f"=" * 60)
-        
-        for index, news_item in enumerate(news_data, 1):
-            try:
-                # Log do progresso atual
-                logger.info(f"📰 Processando notícia {index}/{total_count}")
-                
-                # Extrair conteúdo completo da notícia no novo formato
-                news_content = news_item['noticia'].strip()
-                
-                if not news_content:
-                    logger.warning(f"Notícia {index}: Conteúdo vazio - PULANDO")
-                    results.append({
-                        'content_preview': 'Conteúdo vazio',
-                        'status': 'error',
-                        'message': 'Conteúdo da notícia está vazio'
-                    })
-                    continue
-                
-                logger.info(f"🔍 Notícia {index}: Extraindo informações com IA...")
-                
-                # Usar IA para extrair informações estruturadas do conteúdo
-                from .services import extract_news_info_from_content
-                extraction_result = extract_news_info_from_content(news_content)
-                
-                if not extraction_result['success']:
-                    logger.error(f"Notícia {index}: Falha na extração - {extraction_result['error']}")
-                    results.append({
-                        'content_preview': news_content[:100] + '...',
-                        'status': 'error',
-                        'message': f'Erro na extração de informações: {extraction_result["error"]}'
-                    })
-                    continue
-                
-                # Extrair dados da resposta da IA
-                extracted_data = extraction_result['data']
-                title = extracted_data.get('title', 'Título não identificado').strip()
-                content = extracted_data.get('content', news_content).strip()
-                summary = extracted_data.get('summary', '').strip()
-                source = extracted_data.get('source', 'Fonte não identificada').strip()
-                
-                logger.info(f"Notícia {index}: Informações extraídas - Título: '{title[:50]}...'")
-                logger.info(f" Notícia {index}: Classificando categoria com IA...")
-                
-                # Classificar automaticamente usando IA
-                from .services import classify_news_automatically
-                classification_result = classify_news_automatically(title, content, summary)
-                
-                category = Category.objects.get(name=classification_result['category'])
-                classification_info = f" (IA: {category.name}, confiança: {classification_result['confidence']:.2f})"
-                
-                logger.info(f"📂 Notícia {index}: Categoria classificada - {category.name} (confiança: {classification_result['confidence']:.2f})")
-                
-                # Usar data atual como padrão
-                published_at = timezone.now()
-                
-                logger.info(f"💾 Notícia {index}: Criando registro no banco de dados...")
-                
-                # Criar a notícia
-                news = News.objects.create(
-                    title=title,
-                    content=content,
-                    summary=summary[:500] if summary else '',  # Limitar resumo
-                    source=source,
-                    category=category,
-                    author=request.user,
-                    published_at=published_at,
-                    is_active=True
-                )
-                
-                logger.info(f"🧠 Notícia {index}: Iniciando análise de sentimento...")
-                
-                # Realizar análise automática da notícia
-                try:
-                    from .services import analyze_single_news
-                    analysis_result = analyze_single_news(news)
-                    
-                    if analysis_result['success']:
-                        sentiment_label = analysis_result['sentiment']['label']
-                        sentiment_score = analysis_result['sentiment']['score']
-                        logger.info(f"😊 Notícia {index}: Sentimento analisado - {sentiment_label} (score: {sentiment_score:.2f})")
-                        analysis_info = f" | Análise: {sentiment_label}"
-                    else:
-                        logger.error(f"❌ Notícia {index}: Erro na análise de sentimento")
-                        analysis_info = " | Análise: erro"
-                except Exception as analysis_error:
-                    logger.error(f"❌ Notícia {index}: Falha na análise - {str(analysis_error)}")
-                    analysis_info = f" | Análise: falhou - {str(analysis_error)}"
-                
-                processed_count += 1
-                logger.info(f"✅ Notícia {index}: CONCLUÍDA - ID: {news.id}")
-                logger.info(f"📊 Progresso: {processed_count}/{total_count} notícias processadas")
-                
-                results.append({
-                    'title': news.title,
-                    'status': 'success',
-                    'message': f'Notícia criada com sucesso{classification_info}{analysis_info}'
-                })
-                
-            except Exception as e:
-                logger.error(f"💥 Notícia {index}: ERRO CRÍTICO - {str(e)}")
-                results.append({
-                    'content_preview': news_item.get('noticia', 'Conteúdo não disponível')[:100] + '...',
-                    'status': 'error',
-                    'message': f'Erro ao processar: {str(e)}'
-                })
-        
-        # Log final do processamento
-        logger.info(f"=" * 60)
-        logger.info(f"🏁 PROCESSAMENTO FINALIZADO")
-        logger.info(f"✅ Sucessos: {processed_count}")
-        logger.info(f"❌ Falhas: {total_count - processed_count}")
-        logger.info(f"📊 Total: {total_count}")
-        logger.info(f"⏰ Concluído em: {datetime.now().isoformat()}")
-        logger.info(f"=" * 60)
-        
-        return Response({
-            'message': f'Processamento concluído. {processed_count} de {total_count} notícias foram criadas.',
-            'processed_count': processed_count,
-            'total_count': total_count,
-            'results': results
-        })
-        
+        job = create_upload_job(
+            request.user, file.name, iter_upload_news(file),
+            refresh_llm_cache=serializer.validated_data['refresh_llm_cache']
+        )
+    except UploadFormatError as e:
+        return Response(
+            {'error': 'Arquivo inválido', 'details': {'file': [str(e)]}},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     except Exception as e:
         return Response(
             {'error': f'Erro interno no processamento: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
         )
+    
+    return Response({
+        'message': f'Upload recebido. {job.total_count} notícias serão processadas em segundo plano.',
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': request.build_absolute_uri(reverse('upload_job_status', args=[job.id])),
+        'processed_count': job.processed_count,
+        'total_count': job.total_count,
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+@extend_schema(
+    methods=['GET'],
+    summary="Andamento de um upload de notícias",
+    description="Situação do job criado por upload_news_json, com contadores e o resultado de cada notícia",
+    tags=['News'],
+    responses={200: UploadJobSerializer, 404: OpenApiTypes.OBJECT}
+)
+@query_budget(5)
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def upload_job_status(request, job_id):
+    """
+    Andamento de um job de upload. Visível para quem o enviou e para
+    administradores; `results` traz o resultado de cada notícia, na ordem
+    do arquivo.
+    """
+    job = UploadJob.objects.filter(pk=job_id).prefetch_related('items').first()
+    is_admin = hasattr(request.user, 'profile') and request.user.profile.is_admin
+    if job is None or (job.user_id != request.user.id and not is_admin):
+        return Response({'error': 'Job de upload não encontrado'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response(UploadJobSerializer(job).data)
 
 
 @extend_schema(
@@ -1125,6 +1130,7 @@ def upload_news_json(request):
         400: {'description': 'Dados inválidos'}
     }
 )
+@query_budget(None)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def analyze_news(request):
@@ -1175,14 +1181,14 @@ def analyze_news(request):
         
         # Executar análise
         analysis_service = NewsAnalysisService()
-        results = analysis_service.batch_analyze_news(news_queryset)
+        results = analysis_service.batch_analyze_news(news_queryset, force_reanalyze=force_reanalysis)
         
         return Response({
-            'message': f'Análise concluída. {results["success_count"]} de {results["total_processed"]} notícias foram analisadas com sucesso.',
-            'total_processed': results['total_processed'],
-            'success_count': results['success_count'],
-            'error_count': results['error_count'],
-            'errors': results['errors']
+            'message': f'Análise concluída. {results["processed"]} de {results["total"]} notícias foram analisadas com sucesso.',
+            'total_processed': results['total'],
+            'success_count': results['processed'],
+            'error_count': results['errors'],
+            'errors': results['error_details']
         })
         
     except Exception as e:
@@ -1249,6 +1255,7 @@ def analyze_news(request):
         400: {'description': 'Dados inválidos'}
     }
 )
+@query_budget(None)
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def classify_news_categories(request):
@@ -1265,6 +1272,7 @@ def classify_news_categories(request):
         )
     
     try:
+        from .news_writes import NewsUpdateBuffer
         from .services import NewsAnalysisService
         
         # Obter parâmetros da requisição
@@ -1296,9 +1304,23 @@ def classify_news_categories(request):
         
         # Estatísticas
         total_processed = len(suggestions)
-        auto_assigned = 0
         high_confidence = 0
         
+        # Auto-atribuir se solicitado e confiança suficiente (gravadas em lote)
+        to_assign = {
+            suggestion['news_id']: suggestion['category_object'] for suggestion in suggestions
+            if (auto_assign and suggestion['category_object'] and
+                suggestion['classification']['confidence'] >= confidence_threshold)
+        }
+        assignments = NewsUpdateBuffer(['category'])
+        for news in News.objects.filter(id__in=to_assign):
+            news.category = to_assign[news.id]
+            assignments.add(news)
+        assigned_ids = {news.id for news in assignments.pending}
+        assignments.flush()
+        failed = {news.id: error for news, error in assignments.failed}
+        auto_assigned = assignments.written
+        
         # Processar sugestões
         processed_suggestions = []
         for suggestion in suggestions:
@@ -1308,22 +1330,12 @@ def classify_news_categories(request):
             if classification['confidence'] >= confidence_threshold:
                 high_confidence += 1
             
-            # Auto-atribuir se solicitado e confiança suficiente
-            if (auto_assign and 
-                classification['confidence'] >= confidence_threshold and 
-                suggestion['category_object']):
-                
-                try:
-                    news = News.objects.get(id=suggestion['news_id'])
-                    news.category = suggestion['category_object']
-                    news.save()
-                    auto_assigned += 1
-                    suggestion['auto_assigned'] = True
-                except Exception as e:
-                    suggestion['auto_assigned'] = False
-                    suggestion['assignment_error'] = str(e)
-            else:
-                suggestion['auto_assigned'] = False
+            # O objeto da categoria não faz parte da resposta (não é serializável)
+            suggestion.pop('category_object', None)
+            news_id = suggestion['news_id']
+            suggestion['auto_assigned'] = news_id in assigned_ids and news_id not in failed
+            if news_id in failed:
+                suggestion['assignment_error'] = str(failed[news_id])
             
             processed_suggestions.append(suggestion)
         
@@ -1369,6 +1381,7 @@ def classify_news_categories(request):
         500: {'description': 'Erro interno'}
     }
 )
+@query_budget(2)
 @api_view(['GET'])
 def test_simple_view(request, news_id=None):
     """
@@ -1379,6 +1392,7 @@ def test_simple_view(request, news_id=None):
     else:
         return Response({'message': 'Simple test successful'})
 
+@query_budget(6)
 @api_view(['GET'])
 def get_category_suggestions(request, news_id):
     """
@@ -0,0 +1,147 @@
+"""
+Batch analysis of articles with sparse document-term matrices
+
+Same engine as the backend's common/batch_analysis.py.
+NewsAnalysisService.batch_analyze used to score articles one at a time,
+walking the words of each text in Python. BatchTermEngine does the same
+work for a chunk of articles with scipy.sparse:
+
+- the vocabulary is fixed: the lexicon terms (sentiment words and context
+  keywords), each mapped to a column through a hash table; multi-word
+  terms are columns of their own;
+- term_matrix() builds the chunk's document-term matrix X (csr_matrix):
+  the words of each document are counted in C (Counter) and matched
+  against the vocabulary by set intersection, with no per-word loop;
+- each lexicon is a term-label weight matrix W (csr_matrix) built once
+  per process; the scores of the whole chunk are a single product X @ W
+  (product), with X.sign() for keywords.
+
+Output is identical to the per-article analysis.
+"""
+from collections import Counter
+
+import numpy as np
+from scipy import sparse
+
+from documents import WORD_RE
+
+
+class TermMatrix:
+    """Document-term matrix (csr_matrix) and the word count of each document"""
+
+    def __init__(self, matrix, lengths):
+        self.matrix = matrix
+        # Word count of each document (what scores are normalized by)
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.lengths)
+
+
+class BatchTermEngine:
+    """Fixed vocabulary and lexicon weight matrices, built once per process"""
+
+    def __init__(self, lexicons):
+        """
+        Args:
+            lexicons: Dict name -> iterable of (term, label, weight); the same
+                term may appear more than once (weights add up)
+        """
+        self.vocabulary = {}
+        self.words = {}
+        self.phrases = []
+
+        entries_by_lexicon = {}
+        for name, entries in lexicons.items():
+            cells = entries_by_lexicon[name] = []
+            for term, label, weight in entries:
+                column = self._column(tuple(WORD_RE.findall(term.lower())))
+                if column is not None:
+                    cells.append((column, label, weight))
+
+        # Term-label matrices, once the vocabulary is complete
+        self.labels = {}
+        self.weights = {}
+        for name, cells in entries_by_lexicon.items():
+            labels = self.labels[name] = list(dict.fromkeys(label for _, label, _ in cells))
+            label_columns = {label: index for index, label in enumerate(labels)}
+            # Repeated (term, label) entries are summed by csr_matrix
+            self.weights[name] = sparse.csr_matrix(
+                (
+                    np.array([weight for _, _, weight in cells], dtype=np.int64),
+                    (
+                        np.array([column for column, _, _ in cells], dtype=np.int64),
+                        np.array([label_columns[label] for _, label, _ in cells], dtype=np.int64),
+                    ),
+                ),
+                shape=(len(self.vocabulary), len(labels)),
+            )
+
+    def _column(self, words):
+        if not words:
+            return None
+        column = self.vocabulary.get(words)
+        if column is None:
+            column = self.vocabulary[words] = len(self.vocabulary)
+            if len(words) == 1:
+                self.words[words[0]] = column
+            else:
+                self.phrases.append((column, words, f" {' '.join(words)} "))
+        return column
+
+    def term_matrix(self, token_lists):
+        """Document-term matrix of the token lists (one per document)"""
+        indptr = [0]
+        indices = []
+        data = []
+        lengths = []
+        words = self.words
+
+        for tokens in token_lists:
+            counts = Counter(tokens)
+            row = {words[word]: counts[word] for word in counts.keys() & words.keys()}
+
+            joined = None
+            for column, phrase_words, phrase in self.phrases:
+                if all(word in counts for word in phrase_words):
+                    # Every word is in the text: check they appear in sequence
+                    if joined is None:
+                        joined = f" {' '.join(tokens)} "
+                    occurrences = joined.count(phrase)
+                    if occurrences:
+                        row[column] = occurrences
+
+            indices.extend(row.keys())
+            data.extend(row.values())
+            indptr.append(len(indices))
+            lengths.append(len(tokens))
+
+        matrix = sparse.csr_matrix(
+            (np.array(data, dtype=np.int64), np.array(indices, dtype=np.int64), np.array(indptr, dtype=np.int64)),
+            shape=(len(lengths), len(self.vocabulary)),
+        )
+        return TermMatrix(matrix, lengths)
+
+    def product(self, matrix, lexicon, binary=False):
+        """
+        Scores by label of each document: X @ W for the whole chunk
+
+        Args:
+            binary: Count each term once per document (keywords) instead of
+                by its number of occurrences: X.sign() @ W
+
+        Returns:
+            List with a Counter label -> score per document
+        """
+        terms = matrix.matrix.sign() if binary else matrix.matrix
+        scores = (terms @ self.weights[lexicon]).tocsr()
+        scores.eliminate_zeros()
+
+        labels = self.labels[lexicon]
+        indptr = scores.indptr.tolist()
+        indices = scores.indices.tolist()
+        data = scores.data.tolist()
+        return [
+            Counter({labels[column]: score for column, score in zip(indices[start:end], data[start:end])})
+            for start, end in zip(indptr, indptr[1:])
+        ]
@@ -31,6 +31,23 @@ OPENAI_CONFIG = {
     'temperature': float(os.getenv('OPENAI_TEMPERATURE', '0.7')),
 }
 
+# LLM gateway (llm_gateway.py): per-task model/timeout (seconds) and retries
+LLM_CONFIG = {
+    'tasks': {
+        'news_generation': {
+            'model': OPENAI_CONFIG['model'],
+            'timeout': float(os.getenv('LLM_GENERATION_TIMEOUT', '60')),
+        },
+    },
+    'max_retries': int(os.getenv('LLM_MAX_RETRIES', '3')),
+    'backoff_base': float(os.getenv('LLM_BACKOFF_BASE', '0.5')),
+    'backoff_max': float(os.getenv('LLM_BACKOFF_MAX', '20')),
+    # Result cache shared with the backend (common_llmcacheentry): validity in
+    # seconds (0 disables) and highest temperature whose answers are reused
+    'cache_timeout': int(os.getenv('LLM_CACHE_TIMEOUT', str(30 * 24 * 3600))),
+    'cache_max_temperature': float(os.getenv('LLM_CACHE_MAX_TEMPERATURE', '0.2')),
+}
+
 # RabbitMQ Configuration
 RABBITMQ_CONFIG = {
     'host': os.getenv('RABBITMQ_HOST', 'localhost'),
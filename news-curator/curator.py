@@ -35,7 +35,7 @@ class NewsCurator:
         
         try:
             self.db_manager = DatabaseManager()
-            self.news_generator = OpenAINewsGenerator()
+            self.news_generator = OpenAINewsGenerator(self.db_manager)
             
             # Initialize messaging system if enabled
             if self.messaging_enabled:
@@ -63,6 +63,7 @@ class NewsCurator:
         try:
             logger.info("Initializing News Curator Agent...")
             self.db_manager = DatabaseManager()
+            self.news_generator.db_manager = self.db_manager
             logger.info("News Curator Agent initialized successfully")
             return True
         except Exception as e:
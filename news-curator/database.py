@@ -3,6 +3,7 @@ Database connection and operations for News Curator Agent
 """
 import psycopg2
 import psycopg2.extras
+from psycopg2.extras import Json
 import logging
 from typing import Dict, List, Optional
 from config import DATABASE_CONFIG
@@ -68,6 +69,13 @@ class DatabaseManager:
                 VALUES (%(title)s, %(content)s, %(summary)s, %(source)s, %(published_at)s, %(category_id)s, %(author_id)s, %(is_active)s, NOW(), NOW())
                 """
                 cursor.execute(insert_query, news_data)
+                if news_data.get('is_active'):
+                    # Manter o contador de notícias ativas e a validade do cache do feed da categoria
+                    cursor.execute(
+                        "UPDATE common_category SET active_news_count = active_news_count + 1, "
+                        "news_version = news_version + 1, updated_at = NOW() WHERE id = %s",
+                        (news_data['category_id'],)
+                    )
                 self.connection.commit()
                 logger.info(f"News article saved: {news_data['title']}")
                 return True
@@ -88,4 +96,41 @@ class DatabaseManager:
                 return count > 0
         except Exception as e:
             logger.error(f"Failed to check for duplicate news: {e}")
+            return False
+    
+    def get_llm_cache_entry(self, key: str, max_age: int):
+        """Cached LLM result (common_llmcacheentry) younger than `max_age` seconds, or None"""
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    "UPDATE common_llmcacheentry SET hits = hits + 1, last_hit_at = NOW() "
+                    "WHERE key = %s AND created_at >= NOW() - make_interval(secs => %s) RETURNING response",
+                    (key, max_age)
+                )
+                row = cursor.fetchone()
+                self.connection.commit()
+                return row[0] if row else None
+        except Exception as e:
+            logger.error(f"Failed to read LLM cache: {e}")
+            self.connection.rollback()
+            return None
+    
+    def save_llm_cache_entry(self, key: str, task: str, model: str, prompt_version, response) -> bool:
+        """Store (or refresh) an LLM result in common_llmcacheentry"""
+        try:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    """
+                    INSERT INTO common_llmcacheentry (key, task, model, prompt_version, response, hits, created_at, last_hit_at)
+                    VALUES (%s, %s, %s, %s, %s, 0, NOW(), NULL)
+                    ON CONFLICT (key) DO UPDATE SET response = EXCLUDED.response, hits = 0,
+                        created_at = NOW(), last_hit_at = NULL
+                    """,
+                    (key, task, model, str(prompt_version), Json(response))
+                )
+                self.connection.commit()
+                return True
+        except Exception as e:
+            logger.error(f"Failed to write LLM cache: {e}")
+            self.connection.rollback()
             return False
\ No newline at end of file
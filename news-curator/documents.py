@@ -0,0 +1,75 @@
+"""
+Article text prepared once for every analyzer of the News Curator
+
+Same model as the backend's common/documents.py. NewsAnalysisService used
+to hand the full text to each analyzer, and each one normalized it again:
+sentiment lowercased it and ran two regex substitutions (twice, once more
+for the title alone) and context detection lowercased it once more.
+AnalyzedDocument does that work once per article (original text,
+lowercased text, tokens, offsets and counts) and the analyzers consume it.
+
+Tokens are runs of \\w in lowercase, the same words the previous sentiment
+normalization produced.
+"""
+import re
+from collections import Counter
+from functools import cached_property
+
+WORD_RE = re.compile(r'\w+')
+
+
+class AnalyzedDocument:
+    """
+    Article text with its tokens already extracted
+
+    Attributes:
+        text: Original text (entities depend on capitalization)
+        normalized: Lowercased text
+        tokens: Lowercased words of the text
+        title_tokens: How many of the leading tokens belong to the title
+    """
+
+    def __init__(self, text, title_tokens=0):
+        self.text = text
+        self.normalized = text.lower()
+        self.tokens = WORD_RE.findall(self.normalized)
+        self.title_tokens = title_tokens
+
+    @classmethod
+    def from_parts(cls, title, summary='', content=''):
+        """Document of title, summary and content (the full text analyzed)"""
+        title = title or ''
+        # The title comes first, separated from the summary by a space: its
+        # tokens are the leading tokens of the document
+        return cls(
+            f"{title} {summary or ''} {content or ''}",
+            title_tokens=len(WORD_RE.findall(title.lower())),
+        )
+
+    @classmethod
+    def of(cls, text):
+        """The document itself, or a document of the text"""
+        return text if isinstance(text, cls) else cls(text)
+
+    @cached_property
+    def offsets(self):
+        """(start, end) of each token in `normalized`"""
+        return [match.span() for match in WORD_RE.finditer(self.normalized)]
+
+    @cached_property
+    def counts(self):
+        """Occurrences of each token"""
+        return Counter(self.tokens)
+
+    def title_document(self):
+        """Document of the title alone, reusing the tokens already extracted"""
+        end = self.offsets[self.title_tokens - 1][1] if self.title_tokens else 0
+        document = AnalyzedDocument.__new__(AnalyzedDocument)
+        document.text = self.text[:end]
+        document.normalized = self.normalized[:end]
+        document.tokens = self.tokens[:self.title_tokens]
+        document.title_tokens = self.title_tokens
+        return document
+
+    def __len__(self):
+        return len(self.tokens)
@@ -0,0 +1,214 @@
+"""
+Single-pass named entity extraction for the News Curator
+
+Same rules as the backend's common/entities.py. ENTITY_RE is one compiled,
+case-sensitive regex run once over the text (finditer): dates, money
+values, percentages and runs of capitalized words ("names", with
+connectives such as 'de' / 'da' and an optional title such as 'Dr.' or
+'presidente' before them). Each name is classified with hash-set
+gazetteers of cities, states and countries, organizations, organization
+prefixes and person titles; single words outside the gazetteers (e.g. the
+first word of a sentence) are dropped.
+
+Entities of each type are ranked by frequency in the text, ties broken by
+first occurrence, so the output is deterministic.
+"""
+import re
+from collections import Counter
+from functools import lru_cache
+
+ENTITY_TYPES = ('pessoa', 'organizacao', 'local', 'data', 'valor_monetario', 'porcentagem')
+
+CITIES = frozenset({
+    'São Paulo', 'Rio de Janeiro', 'Brasília', 'Salvador', 'Fortaleza', 'Belo Horizonte',
+    'Manaus', 'Curitiba', 'Recife', 'Porto Alegre', 'Belém', 'Goiânia', 'Guarulhos',
+    'Campinas', 'São Luís', 'Maceió', 'Natal', 'Teresina', 'João Pessoa', 'Campo Grande',
+    'Cuiabá', 'Florianópolis', 'Vitória', 'Aracaju', 'Porto Velho', 'Macapá', 'Boa Vista',
+    'Rio Branco', 'Palmas', 'Santos', 'Niterói', 'Ribeirão Preto', 'Uberlândia',
+    'Sorocaba', 'Joinville', 'Londrina', 'Juiz de Fora', 'Feira de Santana',
+    'Nova York', 'Washington', 'Buenos Aires', 'Lisboa', 'Londres', 'Paris', 'Madri',
+    'Roma', 'Berlim', 'Pequim', 'Tóquio', 'Moscou', 'Genebra', 'Bruxelas',
+})
+
+STATES = frozenset({
+    'Acre', 'Alagoas', 'Amapá', 'Amazonas', 'Bahia', 'Ceará', 'Distrito Federal',
+    'Espírito Santo', 'Goiás', 'Maranhão', 'Mato Grosso', 'Mato Grosso do Sul',
+    'Minas Gerais', 'Pará', 'Paraíba', 'Paraná', 'Pernambuco', 'Piauí',
+    'Rio Grande do Norte', 'Rio Grande do Sul', 'Rondônia', 'Roraima', 'Santa Catarina',
+    'Sergipe', 'Tocantins',
+})
+
+STATE_CODES = frozenset({
+    'AC', 'AL', 'AP', 'AM', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MT', 'MS', 'MG', 'PA',
+    'PB', 'PR', 'PE', 'PI', 'RJ', 'RN', 'RS', 'RO', 'RR', 'SC', 'SP', 'SE', 'TO',
+})
+
+COUNTRIES = frozenset({
+    'Brasil', 'Argentina', 'Chile', 'Uruguai', 'Paraguai', 'Bolívia', 'Peru', 'Colômbia',
+    'Venezuela', 'México', 'Estados Unidos', 'Canadá', 'Portugal', 'Espanha', 'França',
+    'Alemanha', 'Itália', 'Reino Unido', 'Rússia', 'Ucrânia', 'China', 'Japão', 'Índia',
+    'Israel', 'Irã', 'Europa', 'América Latina', 'África', 'Ásia',
+})
+
+PLACES = CITIES | STATES | COUNTRIES
+
+ORGANIZATIONS = frozenset({
+    'Petrobras', 'Vale', 'Embraer', 'Eletrobras', 'Itaú', 'Bradesco', 'Santander',
+    'Caixa', 'Nubank', 'Ambev', 'Magazine Luiza', 'Globo', 'Anatel', 'Anvisa', 'Aneel',
+    'Fiocruz', 'Butantan', 'Ibama', 'Embrapa', 'Polícia Federal', 'Polícia Militar',
+    'Receita Federal', 'Banco Central', 'Congresso', 'Congresso Nacional', 'Senado',
+    'Senado Federal', 'Câmara dos Deputados', 'Supremo Tribunal Federal', 'Planalto',
+    'Itamaraty', 'Google', 'Apple', 'Microsoft', 'Meta', 'Amazon', 'Netflix', 'OpenAI',
+    'Tesla', 'Samsung', 'Nvidia', 'União Europeia', 'Nações Unidas', 'Fifa',
+    'Flamengo', 'Corinthians', 'Palmeiras',
+})
+
+ORGANIZATION_PREFIXES = frozenset({
+    'Ministério', 'Secretaria', 'Prefeitura', 'Governo', 'Empresa', 'Companhia', 'Banco',
+    'Universidade', 'Instituto', 'Tribunal', 'Agência', 'Polícia', 'Câmara', 'Assembleia',
+    'Fundação', 'Associação', 'Confederação', 'Federação', 'Partido', 'Grupo', 'Conselho',
+    'Comissão', 'Superintendência', 'Departamento', 'Hospital', 'Escola', 'Faculdade',
+})
+
+ORGANIZATION_SUFFIXES = ('S.A.', 'S/A', 'Ltda.', 'Ltda', 'Inc.', 'Corp.', 'Ltd.')
+
+# Abbreviated ('Dr. Fulano') and spelled-out titles that precede person names
+TITLE_ABBREVIATIONS = ('Sr', 'Sra', 'Srta', 'Dr', 'Dra', 'Prof', 'Profa')
+HONORIFICS = frozenset({
+    'presidente', 'presidenta',
+    'vice-presidente', 'ministro', 'ministra', 'deputado', 'deputada', 'senador',
+    'senadora', 'governador', 'governadora', 'prefeito', 'prefeita', 'vereador',
+    'vereadora', 'juiz', 'juíza', 'desembargador', 'desembargadora', 'técnico',
+    'treinador', 'papa', 'padre', 'general', 'delegado', 'delegada',
+})
+
+# Words capitalized only because they start a sentence
+LEADING_WORDS = frozenset({
+    'O', 'A', 'Os', 'As', 'Um', 'Uma', 'Uns', 'Umas', 'E', 'Mas', 'Ou', 'Em', 'No', 'Na',
+    'Nos', 'Nas', 'De', 'Do', 'Da', 'Dos', 'Das', 'Ao', 'Aos', 'À', 'Às', 'Para', 'Por',
+    'Pelo', 'Pela', 'Com', 'Sem', 'Sobre', 'Segundo', 'Após', 'Antes', 'Depois', 'Durante',
+    'Entre', 'Até', 'Desde', 'Este', 'Esta', 'Esse', 'Essa', 'Isso', 'Isto', 'Ele', 'Ela',
+    'Eles', 'Elas', 'Nesta', 'Neste', 'Nessa', 'Nesse', 'Já', 'Ainda', 'Também', 'Hoje',
+    'Ontem', 'Amanhã', 'Como', 'Quando', 'Se', 'Não', 'Mais', 'Outro', 'Outra',
+})
+
+_UPPER = 'A-ZÁÂÃÀÉÊÍÓÔÕÚÇ'
+# Capitalized word; never an abbreviated title or suffix ('Dr.', 'Ltda.')
+# nor the start of an abbreviation ('S.A.', 'S/A')
+_NAME_WORD = rf"(?!(?:{'|'.join(TITLE_ABBREVIATIONS)}|Ltda)\b)[{_UPPER}][\w'’-]*\b(?![./]\w)"
+_MONTHS = 'janeiro|fevereiro|março|abril|maio|junho|julho|agosto|setembro|outubro|novembro|dezembro'
+
+ENTITY_RE = re.compile(
+    rf"""
+    (?P<data>\b\d{{1,2}}/\d{{1,2}}/\d{{4}}\b|\b\d{{1,2}}\s+de\s+(?i:{_MONTHS})\s+de\s+\d{{4}}\b)
+    | (?P<valor_monetario>R\$\s*\d+(?:\.\d{{3}})*(?:,\d{{2}})?\b
+        |\b\d+(?:\.\d{{3}})*(?:,\d{{2}})?\s*(?i:reais|milhões|bilhões)\b)
+    | (?P<porcentagem>\b\d+(?:,\d+)?%)
+    | (?:(?P<titulo>\b(?:{'|'.join(TITLE_ABBREVIATIONS)})\.)[ \t]+)?
+      (?P<nome>\b{_NAME_WORD}(?:[ \t]+(?:(?:de|da|do|dos|das)[ \t]+)?{_NAME_WORD})*)
+      (?:[ \t]+(?P<sufixo>{'|'.join(re.escape(suffix) for suffix in ORGANIZATION_SUFFIXES)})
+        |[ \t]+[-–][ \t]+(?P<uf>{'|'.join(sorted(STATE_CODES))})\b)?
+    """,
+    re.VERBOSE,
+)
+
+
+def _classify_words(words, titled):
+    """Entity type and text for a run of capitalized words, or None"""
+    # 'Presidente Lula', 'Ministra Marina Silva'
+    if len(words) > 1 and words[0].lower() in HONORIFICS:
+        words = words[1:]
+        titled = True
+    if not words:
+        return None
+
+    name = ' '.join(words)
+    if name in PLACES:
+        return 'local', name
+    if name in ORGANIZATIONS or (len(words) > 1 and words[0] in ORGANIZATION_PREFIXES):
+        return 'organizacao', name
+    if titled:
+        return 'pessoa', name
+    if len(words) == 1:
+        # Acronyms (STF, IBGE); other single words are ambiguous
+        return ('organizacao', name) if name.isupper() and len(name) > 1 else None
+    if any(word in PLACES for word in words):
+        # 'Brasil Argentina', 'São Paulo Futebol Clube': not a person name
+        return None
+    return 'pessoa', name
+
+
+@lru_cache(maxsize=65536)
+def classify_name(name, titled=False, qualifier=None):
+    """
+    (type, text) entities of a run of capitalized words, cached: the same
+    names repeat across texts. The run is split at sentence-start words
+    ('Brasília O Ministério da Saúde', from title and text joined together);
+    the title (`titled`) applies to the first part.
+
+    `qualifier` is the (type, complement) of a run followed by an
+    organization suffix or state code, such as ('organizacao', ' S.A.') or
+    ('local', ' - SP'): it applies only to the last part
+    ('A Petrobras S.A.' -> 'Petrobras S.A.').
+    """
+    segments = [[]]
+    for word in name.split():
+        if word in LEADING_WORDS:
+            segments.append([])
+        else:
+            segments[-1].append(word)
+
+    entities = []
+    for index, words in enumerate(segments):
+        if qualifier and index == len(segments) - 1:
+            # Without the spelled-out title ('Presidente'), as in _classify_words
+            if len(words) > 1 and words[0].lower() in HONORIFICS:
+                words = words[1:]
+            if words:
+                entities.append((qualifier[0], ' '.join(words) + qualifier[1]))
+            continue
+        entity = _classify_words(words, titled and index == 0)
+        if entity:
+            entities.append(entity)
+    return tuple(entities)
+
+
+class EntityMatcher:
+    """Compiled extractor: one ENTITY_RE pass per text"""
+
+    def __init__(self, types=ENTITY_TYPES, limit=5):
+        self.types = tuple(types)
+        self.limit = limit
+
+    def extract(self, text):
+        """Entities by type, most frequent first (at most `limit` per type)"""
+        counts = {entity_type: Counter() for entity_type in ENTITY_TYPES}
+
+        for match in ENTITY_RE.finditer(text):
+            kind = match.lastgroup
+            if kind in ('nome', 'sufixo', 'uf'):
+                # Spelled-out title before the name ('o presidente Lula'): checked
+                # here rather than in the regex, which would try it at every position
+                titled = match.group('titulo') is not None
+                if not titled:
+                    before = text[max(0, match.start() - 24):match.start()].split()
+                    titled = bool(before) and before[-1].lower() in HONORIFICS
+                if kind == 'sufixo':
+                    qualifier = ('organizacao', f" {match.group('sufixo')}")
+                elif kind == 'uf':
+                    qualifier = ('local', f" - {match.group('uf')}")
+                else:
+                    qualifier = None
+                for entity_type, entity in classify_name(match.group('nome'), titled, qualifier):
+                    counts[entity_type][entity] += 1
+            else:
+                counts[kind][' '.join(match.group(kind).split())] += 1
+
+        # Counter keeps insertion order: the stable sort breaks ties by first occurrence
+        return {
+            entity_type: [
+                entity for entity in sorted(counts[entity_type], key=counts[entity_type].get, reverse=True)
+                if len(entity) > 2
+            ][:self.limit]
+            for entity_type in self.types
+        }
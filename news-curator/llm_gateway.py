@@ -0,0 +1,138 @@
+"""
+Process-wide OpenAI gateway for the News Curator
+
+Same design as the backend's common/llm_gateway.py: a single OpenAI client
+per process (get_gateway), whose keep-alive HTTP connection pool is reused
+by every call, with per-task model and timeout (LLM_CONFIG['tasks']),
+jittered exponential backoff on transient errors (timeouts, connection
+errors, 429 and 5xx) and latency / token accounting from response.usage.
+cache_key() is the backend's common.llm_cache key, so both services share
+the common_llmcacheentry table.
+"""
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+
+import openai
+from openai import OpenAI
+
+from config import LLM_CONFIG, OPENAI_CONFIG
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+def cache_key(task: str, model: str, prompt_version, text: str) -> str:
+    """SHA-256 of task, model, prompt version and NFC, whitespace-collapsed text"""
+    normalized = ' '.join(unicodedata.normalize('NFC', text).split())
+    payload = json.dumps([task, model, str(prompt_version), normalized], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LLMGateway:
+    """Shared OpenAI client with per-task options, retries and usage metrics"""
+
+    def __init__(self, api_key: str, tasks: dict, default_model: str, max_retries: int = 3,
+                 backoff_base: float = 0.5, backoff_max: float = 20.0, sleep=time.sleep):
+        self.tasks = tasks
+        self.default_model = default_model
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.sleep = sleep
+        # Retries are handled here, not by the SDK
+        self.client = OpenAI(api_key=api_key, max_retries=0)
+        self.usage = defaultdict(Counter)
+        self._usage_lock = threading.Lock()
+
+    def task_options(self, task: str):
+        """(model, timeout) for a task"""
+        options = self.tasks.get(task, {})
+        return options.get('model') or self.default_model, options.get('timeout', 30)
+
+    def backoff(self, attempt: int, error: Exception = None) -> float:
+        """Delay before retry `attempt` (1, 2, ...): full jitter, or the 429 Retry-After"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        response = getattr(error, 'response', None)
+        retry_after = response.headers.get('retry-after') if response is not None else None
+        try:
+            return max(delay, min(self.backoff_max, float(retry_after))) if retry_after else delay
+        except ValueError:
+            return delay
+
+    def complete(self, task: str, messages: list, **kwargs):
+        """chat.completions.create for `task`; re-raises the last error once retries run out"""
+        model, timeout = self.task_options(task)
+        attempt = 0
+        while True:
+            attempt += 1
+            start = time.perf_counter()
+            try:
+                response = self.client.chat.completions.create(
+                    model=model, messages=messages, timeout=timeout, **kwargs
+                )
+            except RETRYABLE_ERRORS as e:
+                if attempt > self.max_retries:
+                    self._record(task, model, time.perf_counter() - start, None, attempt, success=False)
+                    raise
+                delay = self.backoff(attempt, e)
+                logger.warning(f"LLM {task}: {type(e).__name__} na tentativa {attempt}; nova tentativa em {delay:.1f} s")
+                self.sleep(delay)
+                continue
+            except Exception:
+                self._record(task, model, time.perf_counter() - start, None, attempt, success=False)
+                raise
+            self._record(task, model, time.perf_counter() - start, response, attempt, success=True)
+            return response
+
+    def _record(self, task, model, elapsed, response, attempts, success):
+        usage = getattr(response, 'usage', None)
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        with self._usage_lock:
+            self.usage[task].update({
+                'calls': 1,
+                'errors': 0 if success else 1,
+                'retries': attempts - 1,
+                'prompt_tokens': prompt_tokens,
+                'completion_tokens': completion_tokens,
+                'latency_ms': round(elapsed * 1000),
+            })
+        logger.info(
+            f"LLM {task} ({model}): {elapsed * 1000:.0f} ms, {prompt_tokens}+{completion_tokens} tokens, "
+            f"{attempts} tentativa(s)"
+        )
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Process-wide gateway; None when OPENAI_API_KEY is not configured"""
+    global _gateway
+    api_key = OPENAI_CONFIG['api_key']
+    if not api_key or api_key == 'your_openai_api_key_here':
+        return None
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(
+                api_key,
+                tasks=LLM_CONFIG['tasks'],
+                default_model=OPENAI_CONFIG['model'],
+                max_retries=LLM_CONFIG['max_retries'],
+                backoff_base=LLM_CONFIG['backoff_base'],
+                backoff_max=LLM_CONFIG['backoff_max'],
+            )
+        return _gateway
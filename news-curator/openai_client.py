@@ -1,54 +1,95 @@
 """
 OpenAI Client for News Generation
 """
-from openai import OpenAI
 import logging
+from collections import Counter
 from typing import Dict, List, Optional
 from datetime import datetime
 import json
 
-from config import OPENAI_CONFIG
+from config import LLM_CONFIG, OPENAI_CONFIG
+from llm_gateway import cache_key, get_gateway
 
 logger = logging.getLogger(__name__)
 
+# Part of the LLM cache key: bump when the generation prompts or the parsing change
+GENERATION_PROMPT_VERSION = 1
+
 class OpenAINewsGenerator:
     """OpenAI-powered news generator"""
     
-    def __init__(self):
-        if not OPENAI_CONFIG['api_key'] or OPENAI_CONFIG['api_key'] == 'your_openai_api_key_here':
+    def __init__(self, db_manager=None, refresh_cache: bool = False):
+        """
+        With `db_manager`, answers for deterministic requests (temperature up
+        to LLM_CONFIG['cache_max_temperature']) are reused from the LLM cache
+        shared with the backend; `refresh_cache` skips cached answers and
+        stores the new ones.
+        """
+        try:
+            # Shared client with per-task timeout, retries and usage metrics
+            self.gateway = get_gateway()
+        except Exception as e:
+            logger.error(f"Erro ao inicializar cliente OpenAI: {e}")
+            self.gateway = None
+        if self.gateway is None:
             logger.warning("OPENAI_API_KEY não configurada. Usando gerador mock.")
-            self.client = None
-        else:
-            try:
-                self.client = OpenAI(api_key=OPENAI_CONFIG['api_key'])
-            except Exception as e:
-                logger.error(f"Erro ao inicializar cliente OpenAI: {e}")
-                self.client = None
         
         self.model = OPENAI_CONFIG['model']
         self.max_tokens = OPENAI_CONFIG['max_tokens']
         self.temperature = OPENAI_CONFIG['temperature']
+        self.db_manager = db_manager
+        self.refresh_cache = refresh_cache
+        self.cache_stats = Counter()
+    
+    def _cache_enabled(self) -> bool:
+        # Sampled answers are meant to vary: reusing one would repeat the same article
+        return (
+            self.db_manager is not None
+            and LLM_CONFIG['cache_timeout'] > 0
+            and self.temperature <= LLM_CONFIG['cache_max_temperature']
+        )
+    
+    def _complete_cached(self, prompt: str, messages: list) -> str:
+        """Generated text for the prompt, from the LLM cache when possible"""
+        use_cache = self._cache_enabled()
+        if use_cache:
+            model = self.gateway.task_options('news_generation')[0]
+            key = cache_key('news_generation', model, GENERATION_PROMPT_VERSION, prompt)
+            if self.refresh_cache:
+                self.cache_stats['bypass'] += 1
+            else:
+                cached = self.db_manager.get_llm_cache_entry(key, LLM_CONFIG['cache_timeout'])
+                self.cache_stats['miss' if cached is None else 'hit'] += 1
+                if cached is not None:
+                    logger.info(f"Cache LLM: acerto para news_generation ({self.cache_stats['hit']} acertos)")
+                    return cached['content']
+        
+        response = self.gateway.complete(
+            'news_generation',
+            messages=messages,
+            max_tokens=self.max_tokens,
+            temperature=self.temperature
+        )
+        content = response.choices[0].message.content
+        if use_cache:
+            self.db_manager.save_llm_cache_entry(
+                key, 'news_generation', model, GENERATION_PROMPT_VERSION, {'content': content}
+            )
+        return content
     
     def generate_news_article(self, category: str, category_id: int, author_id: int = 1) -> Optional[Dict]:
         """Generate a single news article using OpenAI or mock data"""
         try:
-            if self.client is None:
+            if self.gateway is None:
                 # Generate mock news when OpenAI is not available
                 return self._generate_mock_news(category, category_id, author_id)
             
             prompt = self._create_prompt(category)
             
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "Você é um jornalista especializado em criar notícias realistas e envolventes."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=self.max_tokens,
-                temperature=self.temperature
-            )
-            
-            content = response.choices[0].message.content
+            content = self._complete_cached(prompt, [
+                {"role": "system", "content": "Você é um jornalista especializado em criar notícias realistas e envolventes."},
+                {"role": "user", "content": prompt}
+            ])
             
             try:
                 # Try to parse as JSON first
@@ -1,12 +1,15 @@
 """
 Serviço de Análise de Sentimentos e Identificação de Entidades
 """
-import re
 import logging
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 import json
 
+from batch_analysis import BatchTermEngine
+from documents import AnalyzedDocument
+from entities import EntityMatcher
+
 logger = logging.getLogger(__name__)
 
 class SentimentAnalyzer:
@@ -38,58 +41,30 @@ class SentimentAnalyzer:
             'declaração', 'comunicado', 'anúncio', 'divulgação', 'publicação', 'lançamento'
         }
     
-    def analyze_sentiment(self, text: str) -> Dict[str, any]:
+    def analyze_sentiment(self, text) -> Dict[str, any]:
         """
         Analisa o sentimento de um texto
         
         Args:
-            text: Texto para análise
+            text: Texto (str ou AnalyzedDocument) para análise
             
         Returns:
             Dict com score, label e confiança
         """
         try:
-            # Normalizar texto
-            normalized_text = self._normalize_text(text)
-            words = normalized_text.split()
+            document = AnalyzedDocument.of(text)
             
             # Contar palavras por categoria
-            positive_count = sum(1 for word in words if word in self.positive_words)
-            negative_count = sum(1 for word in words if word in self.negative_words)
-            neutral_count = sum(1 for word in words if word in self.neutral_words)
-            
-            total_sentiment_words = positive_count + negative_count + neutral_count
-            
-            # Calcular score (-1 a 1)
-            if total_sentiment_words == 0:
-                score = 0.0
-                label = 'neutro'
-                confidence = 0.5
-            else:
-                score = (positive_count - negative_count) / len(words)
-                
-                # Determinar label
-                if score > 0.02:
-                    label = 'positivo'
-                elif score < -0.02:
-                    label = 'negativo'
-                else:
-                    label = 'neutro'
-                
-                # Calcular confiança baseada na densidade de palavras de sentimento
-                confidence = min(total_sentiment_words / len(words) * 2, 1.0)
+            positive_count = negative_count = neutral_count = 0
+            for word, count in document.counts.items():
+                if word in self.positive_words:
+                    positive_count += count
+                elif word in self.negative_words:
+                    negative_count += count
+                elif word in self.neutral_words:
+                    neutral_count += count
             
-            return {
-                'score': round(score, 3),
-                'label': label,
-                'confidence': round(confidence, 3),
-                'word_counts': {
-                    'positive': positive_count,
-                    'negative': negative_count,
-                    'neutral': neutral_count,
-                    'total_words': len(words)
-                }
-            }
+            return self.sentiment_from_counts(positive_count, negative_count, neutral_count, len(document))
             
         except Exception as e:
             logger.error(f"Erro na análise de sentimento: {e}")
@@ -100,51 +75,61 @@ class SentimentAnalyzer:
                 'error': str(e)
             }
     
-    def _normalize_text(self, text: str) -> str:
-        """Normaliza texto para análise"""
-        # Converter para minúsculas
-        text = text.lower()
+    def sentiment_from_counts(self, positive_count: int, negative_count: int,
+                              neutral_count: int, total_words: int) -> Dict[str, any]:
+        """
+        Sentimento a partir das contagens de palavras (também usado na análise em lote)
         
-        # Remover pontuação e caracteres especiais
-        text = re.sub(r'[^\w\s]', ' ', text)
+        Args:
+            positive_count: Ocorrências de palavras positivas
+            negative_count: Ocorrências de palavras negativas
+            neutral_count: Ocorrências de palavras neutras
+            total_words: Total de palavras do texto
+            
+        Returns:
+            Dict com score, label e confiança
+        """
+        total_sentiment_words = positive_count + negative_count + neutral_count
         
-        # Remover espaços extras
-        text = re.sub(r'\s+', ' ', text).strip()
+        # Calcular score (-1 a 1)
+        if total_sentiment_words == 0:
+            score = 0.0
+            label = 'neutro'
+            confidence = 0.5
+        else:
+            score = (positive_count - negative_count) / total_words
+            
+            # Determinar label
+            if score > 0.02:
+                label = 'positivo'
+            elif score < -0.02:
+                label = 'negativo'
+            else:
+                label = 'neutro'
+            
+            # Calcular confiança baseada na densidade de palavras de sentimento
+            confidence = min(total_sentiment_words / total_words * 2, 1.0)
         
-        return text
+        return {
+            'score': round(score, 3),
+            'label': label,
+            'confidence': round(confidence, 3),
+            'word_counts': {
+                'positive': positive_count,
+                'negative': negative_count,
+                'neutral': neutral_count,
+                'total_words': total_words
+            }
+        }
+    
 
 
 class EntityExtractor:
     """Extrator de entidades nomeadas"""
     
     def __init__(self):
-        # Padrões regex para diferentes tipos de entidades
-        self.patterns = {
-            'pessoa': [
-                r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',  # Nome Sobrenome
-                r'\b(?:Sr\.|Sra\.|Dr\.|Dra\.)\s[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',  # Títulos
-            ],
-            'organizacao': [
-                r'\b[A-Z][A-Za-z]*(?:\s[A-Z][A-Za-z]*)*\s(?:S\.A\.|Ltda\.|Inc\.|Corp\.|Ltd\.)\b',
-                r'\b(?:Ministério|Secretaria|Prefeitura|Governo|Empresa|Companhia)\s[A-Z][a-z]+(?:\s[A-Z][a-z]+)*\b',
-                r'\b[A-Z]{2,}\b',  # Siglas
-            ],
-            'local': [
-                r'\b(?:São Paulo|Rio de Janeiro|Brasília|Salvador|Fortaleza|Belo Horizonte|Manaus|Curitiba|Recife|Porto Alegre)\b',
-                r'\b[A-Z][a-z]+(?:\s[A-Z][a-z]+)*(?:\s-\s[A-Z]{2})?\b',  # Cidade - Estado
-            ],
-            'data': [
-                r'\b\d{1,2}/\d{1,2}/\d{4}\b',  # DD/MM/YYYY
-                r'\b\d{1,2}\s+de\s+(?:janeiro|fevereiro|março|abril|maio|junho|julho|agosto|setembro|outubro|novembro|dezembro)\s+de\s+\d{4}\b',
-            ],
-            'valor_monetario': [
-                r'R\$\s*\d+(?:\.\d{3})*(?:,\d{2})?\b',
-                r'\b\d+(?:\.\d{3})*(?:,\d{2})?\s*(?:reais|milhões|bilhões)\b',
-            ],
-            'porcentagem': [
-                r'\b\d+(?:,\d+)?%\b',
-            ]
-        }
+        # Regras compiladas uma vez por processo (entities.py)
+        self.matcher = EntityMatcher(limit=10)
         
         # Palavras-chave para contexto
         self.context_keywords = {
@@ -156,7 +141,7 @@ class EntityExtractor:
             'educacao': ['educação', 'escola', 'universidade', 'professor', 'aluno', 'ensino', 'curso']
         }
     
-    def extract_entities(self, text: str) -> Dict[str, List[str]]:
+    def extract_entities(self, text) -> Dict[str, List[str]]:
         """
         Extrai entidades nomeadas do texto
         
@@ -164,34 +149,17 @@ class EntityExtractor:
             text: Texto para extração
             
         Returns:
-            Dict com entidades por categoria
+            Dict com entidades por categoria, as 10 mais frequentes de cada
         """
         try:
-            entities = {}
-            
-            for entity_type, patterns in self.patterns.items():
-                found_entities = set()
-                
-                for pattern in patterns:
-                    matches = re.findall(pattern, text, re.IGNORECASE)
-                    found_entities.update(matches)
-                
-                # Filtrar e limpar entidades
-                cleaned_entities = []
-                for entity in found_entities:
-                    entity = entity.strip()
-                    if len(entity) > 2 and entity not in cleaned_entities:
-                        cleaned_entities.append(entity)
-                
-                entities[entity_type] = cleaned_entities[:10]  # Limitar a 10 por tipo
-            
-            return entities
+            # Entidades dependem das maiúsculas: usa o texto original
+            return self.matcher.extract(AnalyzedDocument.of(text).text)
             
         except Exception as e:
             logger.error(f"Erro na extração de entidades: {e}")
             return {}
     
-    def identify_context(self, text: str) -> List[str]:
+    def identify_context(self, text) -> List[str]:
         """
         Identifica o contexto/domínio do texto
         
@@ -202,19 +170,29 @@ class EntityExtractor:
             Lista de contextos identificados
         """
         try:
-            text_lower = text.lower()
-            contexts = []
+            counts = AnalyzedDocument.of(text).counts
             
-            for context, keywords in self.context_keywords.items():
-                score = sum(1 for keyword in keywords if keyword in text_lower)
-                if score >= 2:  # Pelo menos 2 palavras-chave
-                    contexts.append(context)
-            
-            return contexts
+            return self.contexts_from_scores({
+                context: sum(1 for keyword in keywords if keyword in counts)
+                for context, keywords in self.context_keywords.items()
+            })
             
         except Exception as e:
             logger.error(f"Erro na identificação de contexto: {e}")
             return []
+    
+    def contexts_from_scores(self, scores: Dict[str, int]) -> List[str]:
+        """
+        Contextos a partir das palavras-chave presentes (também usado na análise em lote)
+        
+        Args:
+            scores: Quantas palavras-chave distintas de cada contexto estão no texto
+            
+        Returns:
+            Lista de contextos identificados
+        """
+        # Pelo menos 2 palavras-chave
+        return [context for context in self.context_keywords if scores.get(context, 0) >= 2]
 
 
 class NewsAnalysisService:
@@ -237,34 +215,24 @@ class NewsAnalysisService:
             Dict com todas as análises
         """
         try:
-            # Combinar textos para análise
-            full_text = f"{title} {summary} {content}"
+            # Texto preparado uma vez para todos os analisadores
+            document = AnalyzedDocument.from_parts(title, summary, content)
             
             # Análise de sentimento
-            sentiment = self.sentiment_analyzer.analyze_sentiment(full_text)
+            sentiment = self.sentiment_analyzer.analyze_sentiment(document)
             
             # Extração de entidades
-            entities = self.entity_extractor.extract_entities(full_text)
+            entities = self.entity_extractor.extract_entities(document)
             
             # Identificação de contexto
-            contexts = self.entity_extractor.identify_context(full_text)
+            contexts = self.entity_extractor.identify_context(document)
             
-            # Análise específica do título
-            title_sentiment = self.sentiment_analyzer.analyze_sentiment(title)
+            # Análise específica do título (as primeiras palavras do documento)
+            title_sentiment = self.sentiment_analyzer.analyze_sentiment(document.title_document())
             
-            return {
-                'sentiment': sentiment,
-                'title_sentiment': title_sentiment,
-                'entities': entities,
-                'contexts': contexts,
-                'analysis_timestamp': datetime.now().isoformat(),
-                'text_stats': {
-                    'title_length': len(title),
-                    'content_length': len(content),
-                    'summary_length': len(summary),
-                    'total_words': len(full_text.split())
-                }
-            }
+            return self._build_analysis(
+                title, content, summary, document, sentiment, title_sentiment, entities, contexts
+            )
             
         except Exception as e:
             logger.error(f"Erro na análise completa: {e}")
@@ -273,10 +241,32 @@ class NewsAnalysisService:
                 'analysis_timestamp': datetime.now().isoformat()
             }
     
+    def _build_analysis(self, title, content, summary, document, sentiment, title_sentiment,
+                        entities, contexts) -> Dict[str, any]:
+        """Resultado de analyze_news (e de cada notícia de batch_analyze)"""
+        return {
+            'sentiment': sentiment,
+            'title_sentiment': title_sentiment,
+            'entities': entities,
+            'contexts': contexts,
+            'analysis_timestamp': datetime.now().isoformat(),
+            'text_stats': {
+                'title_length': len(title),
+                'content_length': len(content),
+                'summary_length': len(summary),
+                'total_words': len(document.text.split())
+            }
+        }
+    
     def batch_analyze(self, news_list: List[Dict]) -> List[Dict]:
         """
         Análise em lote de múltiplas notícias
         
+        Sentimento (do texto e do título) e contextos de cada bloco de
+        ANALYSIS_BATCH_SIZE notícias são calculados de uma vez, por produto de
+        matrizes esparsas (batch_analysis.py), com o mesmo resultado de
+        analyze_news.
+        
         Args:
             news_list: Lista de dicionários com notícias
             
@@ -285,28 +275,93 @@ class NewsAnalysisService:
         """
         results = []
         
-        for i, news in enumerate(news_list):
+        for start in range(0, len(news_list), ANALYSIS_BATCH_SIZE):
+            chunk = news_list[start:start + ANALYSIS_BATCH_SIZE]
             try:
-                title = news.get('title', '')
-                content = news.get('content', '')
-                summary = news.get('summary', '')
-                
-                analysis = self.analyze_news(title, content, summary)
-                analysis['news_index'] = i
-                analysis['news_id'] = news.get('id')
-                
-                results.append(analysis)
-                
+                analyses = self._analyze_chunk(chunk)
             except Exception as e:
-                logger.error(f"Erro na análise da notícia {i}: {e}")
-                results.append({
-                    'news_index': i,
-                    'news_id': news.get('id'),
-                    'error': str(e),
-                    'analysis_timestamp': datetime.now().isoformat()
-                })
+                # Falha no bloco: cada notícia é analisada (e falha) individualmente
+                logger.error(f"Erro na análise em lote, analisando notícia a notícia: {e}")
+                analyses = [None] * len(chunk)
+            
+            for i, (news, analysis) in enumerate(zip(chunk, analyses), start):
+                try:
+                    if analysis is None:
+                        analysis = self.analyze_news(
+                            news.get('title', ''), news.get('content', ''), news.get('summary', '')
+                        )
+                    analysis['news_index'] = i
+                    analysis['news_id'] = news.get('id')
+                    
+                    results.append(analysis)
+                    
+                except Exception as e:
+                    logger.error(f"Erro na análise da notícia {i}: {e}")
+                    results.append({
+                        'news_index': i,
+                        'news_id': news.get('id'),
+                        'error': str(e),
+                        'analysis_timestamp': datetime.now().isoformat()
+                    })
         
         return results
+    
+    def _analyze_chunk(self, news_list: List[Dict]) -> List[Dict]:
+        """Análises de um bloco de batch_analyze, na ordem de news_list"""
+        parts = [
+            (news.get('title', ''), news.get('content', ''), news.get('summary', ''))
+            for news in news_list
+        ]
+        documents = [AnalyzedDocument.from_parts(title, summary, content) for title, content, summary in parts]
+        
+        engine = get_batch_engine(self.sentiment_analyzer, self.entity_extractor)
+        matrix = engine.term_matrix(document.tokens for document in documents)
+        title_matrix = engine.term_matrix(document.tokens[:document.title_tokens] for document in documents)
+        sentiment_counts = engine.product(matrix, 'sentiment')
+        title_counts = engine.product(title_matrix, 'sentiment')
+        context_scores = engine.product(matrix, 'contexts', binary=True)
+        
+        analyses = []
+        for index, ((title, content, summary), document) in enumerate(zip(parts, documents)):
+            sentiment = self._sentiment(sentiment_counts[index], matrix.lengths[index])
+            title_sentiment = self._sentiment(title_counts[index], title_matrix.lengths[index])
+            entities = self.entity_extractor.extract_entities(document)
+            contexts = self.entity_extractor.contexts_from_scores(context_scores[index])
+            analyses.append(self._build_analysis(
+                title, content, summary, document, sentiment, title_sentiment, entities, contexts
+            ))
+        return analyses
+    
+    def _sentiment(self, counts, total_words):
+        return self.sentiment_analyzer.sentiment_from_counts(
+            counts['positivo'], counts['negativo'], counts['neutro'], total_words
+        )
+
+
+# Notícias por bloco de NewsAnalysisService.batch_analyze
+ANALYSIS_BATCH_SIZE = 500
+
+_batch_engine = None
+
+
+def get_batch_engine(sentiment_analyzer: SentimentAnalyzer, entity_extractor: EntityExtractor) -> BatchTermEngine:
+    """
+    BatchTermEngine dos léxicos da análise (palavras de sentimento e
+    palavras-chave de contexto), montado uma vez por processo
+    """
+    global _batch_engine
+    if _batch_engine is None:
+        _batch_engine = BatchTermEngine({
+            'sentiment': [(word, 'positivo', 1) for word in sentiment_analyzer.positive_words]
+            + [(word, 'negativo', 1) for word in sentiment_analyzer.negative_words]
+            + [(word, 'neutro', 1) for word in sentiment_analyzer.neutral_words],
+            'contexts': [
+                (keyword, context, 1)
+                for context, keywords in entity_extractor.context_keywords.items()
+                for keyword in keywords
+            ],
+        })
+    return _batch_engine
 
 
 # Função utilitária para uso direto